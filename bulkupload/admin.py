@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from bulkupload.models import UsersModel
+from bulkupload.models import UploadJob, UsersModel
 # Register your models here.
 
 admin.site.register(UsersModel)
+admin.site.register(UploadJob)
@@ -0,0 +1,166 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Tuple
+import datetime
+import os
+import platform
+import tempfile
+
+from django.db import connection, transaction
+from pandas import DataFrame
+import numpy as np
+import pandas as pd
+
+from bulkupload.instrumentation import Instrumentation
+from bulkupload.models import UsersModel
+from bulkupload.schema import BusinessUnitEnum, DepartmentEnum, InsertMode, StageMetrics
+from bulkupload.services import BulkUploadService
+
+# Columns of a synthetic upload, in the order of the upload template
+UPLOAD_COLUMNS = ['User ID', 'User Name', 'Email', 'Business Unit', 'Department', 'Date of Joining', 'Mobile Number']
+BENCHMARK_FORMATS = ['xlsx', 'csv']
+
+
+@dataclass
+class SyntheticUploadMix:
+    """Share of rows (0-1) given each kind of problem in a synthetic upload."""
+    invalid_email_rate: float = 0.01
+    bad_mobile_rate: float = 0.01
+    duplicate_rate: float = 0.02
+    existing_rate: float = 0.05
+
+
+def generate_users_frame(rows: int, mix: SyntheticUploadMix, seed: int = 0) -> Tuple[DataFrame, List[str]]:
+    """
+    Build a DataFrame shaped like an upload, with the problems described by mix.
+
+    Returns the frame and the user IDs that should already exist in the database (mix.existing_rate of the
+    unique IDs), which the caller inserts before the upload.
+    """
+    rng = np.random.default_rng(seed)
+    numbers = np.arange(rows)
+    user_ids = np.char.add('B', np.char.zfill(numbers.astype(str), 9))
+
+    duplicates = rng.random(rows) < mix.duplicate_rate
+    duplicates[0] = False
+    # A duplicate repeats the User ID of an earlier row
+    user_ids[duplicates] = user_ids[(rng.random(duplicates.sum()) * numbers[duplicates]).astype(int)]
+
+    emails = np.char.add(np.char.add('user', numbers.astype(str)), '@example.com').astype(object)
+    emails[rng.random(rows) < mix.invalid_email_rate] = 'not-an-email'
+    mobile_numbers = np.char.add('+91 98', np.char.zfill((numbers % 100000000).astype(str), 8)).astype(object)
+    mobile_numbers[rng.random(rows) < mix.bad_mobile_rate] = '12ab'
+
+    frame = DataFrame({
+        'User ID': user_ids,
+        'User Name': np.char.add('User ', numbers.astype(str)),
+        'Email': emails,
+        'Business Unit': rng.choice([member.value for member in BusinessUnitEnum], rows),
+        'Department': rng.choice([member.value for member in DepartmentEnum], rows),
+        'Date of Joining': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 1500, rows), unit='D'),
+        'Mobile Number': mobile_numbers,
+    }, columns=UPLOAD_COLUMNS)
+
+    unique_ids = pd.unique(user_ids)
+    existing_ids = unique_ids[rng.random(len(unique_ids)) < mix.existing_rate].tolist()
+    return frame, existing_ids
+
+
+def write_upload_file(frame: DataFrame, file_format: str, directory: str) -> str:
+    """Write a synthetic upload as .xlsx or .csv and return its path."""
+    path = os.path.join(directory, f'benchmark_{len(frame)}.{file_format}')
+    if file_format == 'xlsx':
+        frame.to_excel(path, index=False, engine='openpyxl')
+    elif file_format == 'csv':
+        frame.to_csv(path, index=False, date_format='%Y-%m-%d')
+    else:
+        raise ValueError(f"Unsupported benchmark format '{file_format}'. Use one of: {', '.join(BENCHMARK_FORMATS)}")
+    return path
+
+
+def insert_existing_users(user_ids: List[str]) -> None:
+    UsersModel.objects.bulk_create([
+        UsersModel(user_id=user_id, user_name='Existing user', email=f'{user_id.lower()}@example.com',
+                   business_unit=BusinessUnitEnum.CHENNAI.value, department=DepartmentEnum.SOFTWARE.value,
+                   date_of_joining=datetime.date(2020, 1, 1), mobile_number='+91 9876543210')
+        for user_id in user_ids
+    ], batch_size=5000)
+
+
+def summarize_stage(metrics: StageMetrics) -> Dict[str, Any]:
+    """Turn the metrics of one stage into a JSON-friendly benchmark entry."""
+    rows_handled = metrics['rows_out'] if metrics['rows_in'] is None else metrics['rows_in']
+    seconds = metrics['wall_seconds']
+    return {
+        "seconds": round(seconds, 6),
+        "cpu_seconds": round(metrics['cpu_seconds'], 6),
+        "rows_in": metrics['rows_in'],
+        "rows_out": metrics['rows_out'],
+        "rows_per_second": round(rows_handled / seconds, 1) if rows_handled is not None and seconds > 0 else None,
+        "query_count": metrics['query_count'],
+        "query_seconds": round(metrics['query_seconds'], 6),
+        "peak_memory_bytes": metrics['peak_memory_bytes'],
+        "peak_rss_bytes": metrics['peak_rss_bytes'],
+    }
+
+
+def run_upload_benchmark(path: str, insert_mode: InsertMode = InsertMode.SKIP, trace_memory: bool = False) -> Dict[str, Any]:
+    """
+    Time each stage of save_bulk_data on an upload file.
+
+    Unlike save_bulk_data, the save stage also runs when some rows fail validation, writing the valid rows,
+    so that every stage is measured whatever the mix of bad rows. trace_memory adds tracemalloc peaks, at a
+    large cost in speed.
+    """
+    with Instrumentation.collect(trace_memory) as collector:
+        with Instrumentation.stage('read') as read_stage:
+            chunks = list(BulkUploadService.read_upload_in_chunks(path, path))
+            read_stage.rows_out = sum(len(chunk) for chunk in chunks)
+        data_frame = pd.concat(chunks) if chunks else DataFrame(columns=UPLOAD_COLUMNS)
+
+        # Each of these is an instrumented stage
+        cleaned_df = BulkUploadService.clean_dataframe(data_frame)
+        dedup_df, _ = BulkUploadService.deduplicate_dataframe(cleaned_df)
+        existing_user_ids = BulkUploadService.get_existing_user_ids(dedup_df['user_id'])
+        new_users_df = BulkUploadService.select_rows_to_write(dedup_df, existing_user_ids, insert_mode)
+        _, model_instances, failures = BulkUploadService.validate_new_users(new_users_df)
+        BulkUploadService.save_new_users(model_instances, insert_mode)
+
+    stages = {metrics['stage']: summarize_stage(metrics) for metrics in collector.records}
+    return {
+        "stages": stages,
+        "total_seconds": round(sum(stage['seconds'] for stage in stages.values()), 6),
+        "failed_rows": len(failures),
+        "existing_user_ids": len(existing_user_ids),
+    }
+
+
+def run_benchmark(rows: int, file_format: str, mix: SyntheticUploadMix, insert_mode: InsertMode = InsertMode.SKIP, seed: int = 0,
+                  trace_memory: bool = False) -> Dict[str, Any]:
+    """
+    Generate a synthetic upload, then benchmark it against the database.
+
+    Everything the run writes (the pre-existing users and the upload itself) is rolled back afterwards.
+    """
+    frame, existing_ids = generate_users_frame(rows, mix, seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_upload_file(frame, file_format, directory)
+        file_size = os.path.getsize(path)
+        with transaction.atomic():
+            insert_existing_users(existing_ids)
+            result = run_upload_benchmark(path, insert_mode, trace_memory)
+            transaction.set_rollback(True)
+
+    return {
+        "rows": rows,
+        "format": file_format,
+        "file_size_bytes": file_size,
+        "insert_mode": insert_mode.value,
+        "mix": asdict(mix),
+        "seed": seed,
+        "trace_memory": trace_memory,
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "recorded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        **result,
+    }
@@ -0,0 +1,240 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Tuple, Type
+import io
+import logging
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, models, transaction
+from django.db.models.constants import OnConflict
+
+from bulkupload.schema import InsertMode
+
+logger = logging.getLogger('bulkupload.bulk_write')
+
+# Upper bound on rows per INSERT (or per executemany/COPY batch), whatever the backend allows.
+DEFAULT_MAX_INSERT_BATCH_SIZE = 5000
+# synchronous level used on SQLite while loading; override with BULK_UPLOAD_SQLITE_SYNCHRONOUS.
+DEFAULT_SQLITE_SYNCHRONOUS = 'NORMAL'
+
+
+class BulkWriter:
+    """
+    Write model instances in batches inside one transaction, with Django's bulk_create.
+
+    Subclasses provide faster, backend-specific ways of loading the same rows. write() returns the number of
+    rows written (for InsertMode.SKIP with bulk_create, the number of rows sent).
+    """
+
+    def write(self, model_instances: List[models.Model], insert_mode: InsertMode, unique_fields: List[str],
+              update_fields: List[str], batch_size: int) -> int:
+        manager = type(model_instances[0])._default_manager
+        if insert_mode == InsertMode.UPDATE:
+            manager.bulk_create(model_instances, batch_size=batch_size, update_conflicts=True,
+                                unique_fields=unique_fields, update_fields=update_fields)
+        elif insert_mode == InsertMode.SKIP:
+            manager.bulk_create(model_instances, batch_size=batch_size, ignore_conflicts=True)
+        else:
+            manager.bulk_create(model_instances, batch_size=batch_size)
+        return len(model_instances)
+
+    @staticmethod
+    def get_insert_fields(model: Type[models.Model]) -> List[models.Field]:
+        """Concrete fields to insert; auto-incremented primary keys are left to the database."""
+        return [field for field in model._meta.concrete_fields if not isinstance(field, models.AutoField)]
+
+    @staticmethod
+    def get_row_values(model_instances: Sequence[models.Model], fields: List[models.Field]) -> List[Tuple[Any, ...]]:
+        """Database-ready values of each instance, as bulk_create would prepare them."""
+        return [
+            tuple(field.get_db_prep_save(field.pre_save(instance, True), connection) for field in fields)
+            for instance in model_instances
+        ]
+
+    @staticmethod
+    def get_conflict_sql(fields: List[models.Field], insert_mode: InsertMode, unique_fields: List[str],
+                         update_fields: List[str]) -> Tuple[str, str]:
+        """Return the INSERT keyword and the ON CONFLICT suffix the backend uses for the insert mode."""
+        on_conflict = {InsertMode.SKIP: OnConflict.IGNORE, InsertMode.UPDATE: OnConflict.UPDATE}.get(insert_mode)
+        insert_statement = connection.ops.insert_statement(on_conflict=on_conflict)
+        suffix = connection.ops.on_conflict_suffix_sql(fields, on_conflict, update_fields, unique_fields) if on_conflict else ''
+        return insert_statement, suffix
+
+
+class ExecutemanyWriter(BulkWriter):
+    """
+    Send one parameterized single-row INSERT per row with cursor.executemany.
+
+    Skips building model-level INSERT statements and is not bound by the backend's parameter limit; on SQLite
+    it is the fastest way to load rows. Returns the rows actually inserted or updated.
+    """
+
+    def write(self, model_instances: List[models.Model], insert_mode: InsertMode, unique_fields: List[str],
+              update_fields: List[str], batch_size: int) -> int:
+        model = type(model_instances[0])
+        fields = self.get_insert_fields(model)
+        quote_name = connection.ops.quote_name
+        insert_statement, conflict_suffix = self.get_conflict_sql(fields, insert_mode, unique_fields, update_fields)
+        sql = (
+            f"{insert_statement} {quote_name(model._meta.db_table)} ({', '.join(quote_name(field.column) for field in fields)}) "
+            f"VALUES ({', '.join(['%s'] * len(fields))}) {conflict_suffix}"
+        )
+        written_count = 0
+        with connection.cursor() as cursor:
+            for start in range(0, len(model_instances), batch_size):
+                cursor.executemany(sql, self.get_row_values(model_instances[start:start + batch_size], fields))
+                written_count += max(cursor.rowcount, 0)
+        return written_count
+
+
+class PostgresCopyWriter(BulkWriter):
+    """
+    Stream rows into a temporary table with COPY FROM STDIN, then move them to the model's table with one
+    INSERT ... SELECT, which applies the insert mode's ON CONFLICT clause. Works with psycopg 3 and psycopg2.
+    """
+
+    def write(self, model_instances: List[models.Model], insert_mode: InsertMode, unique_fields: List[str],
+              update_fields: List[str], batch_size: int) -> int:
+        model = type(model_instances[0])
+        fields = self.get_insert_fields(model)
+        quote_name = connection.ops.quote_name
+        table = quote_name(model._meta.db_table)
+        temp_table = quote_name(f'bulkupload_copy_{uuid.uuid4().hex[:12]}')
+        columns = ', '.join(quote_name(field.column) for field in fields)
+        insert_statement, conflict_suffix = self.get_conflict_sql(fields, insert_mode, unique_fields, update_fields)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TEMPORARY TABLE {temp_table} AS SELECT {columns} FROM {table} WITH NO DATA')
+            try:
+                copy_sql = f'COPY {temp_table} ({columns}) FROM STDIN'
+                for start in range(0, len(model_instances), batch_size):
+                    self.copy_rows(cursor.cursor, copy_sql, self.get_row_values(model_instances[start:start + batch_size], fields))
+                cursor.execute(f'{insert_statement} {table} ({columns}) SELECT {columns} FROM {temp_table} {conflict_suffix}')
+                return max(cursor.rowcount, 0)
+            finally:
+                cursor.execute(f'DROP TABLE {temp_table}')
+
+    @staticmethod
+    def copy_rows(raw_cursor: Any, copy_sql: str, rows: List[Tuple[Any, ...]]) -> None:
+        if hasattr(raw_cursor, 'copy'):
+            # psycopg 3 adapts every value itself
+            with raw_cursor.copy(copy_sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+        else:
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write('\t'.join(PostgresCopyWriter.to_copy_text(value) for value in row))
+                buffer.write('\n')
+            buffer.seek(0)
+            raw_cursor.copy_expert(copy_sql, buffer)
+
+    @staticmethod
+    def to_copy_text(value: Any) -> str:
+        """Render a value in COPY's text format."""
+        if value is None:
+            return '\\N'
+        return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+# Writers by name, for BULK_UPLOAD_BULK_WRITER; register more with BulkWriteEngine.register_writer
+BULK_WRITERS: Dict[str, Type[BulkWriter]] = {
+    'orm': BulkWriter,
+    'executemany': ExecutemanyWriter,
+    'copy': PostgresCopyWriter,
+}
+# Writer picked by 'auto' for each database vendor; other vendors use 'orm'
+VENDOR_WRITERS: Dict[str, str] = {
+    'sqlite': 'executemany',
+    'postgresql': 'copy',
+}
+
+
+class BulkWriteEngine:
+    @staticmethod
+    def register_writer(name: str, writer_class: Type[BulkWriter], vendor: str | None = None) -> None:
+        """Make a writer selectable by name, and the 'auto' choice for a database vendor if one is given."""
+        BULK_WRITERS[name] = writer_class
+        if vendor:
+            VENDOR_WRITERS[vendor] = name
+
+    @staticmethod
+    def get_writer() -> BulkWriter:
+        """Return the writer set by BULK_UPLOAD_BULK_WRITER: 'auto' (default) picks one for the database vendor."""
+        name = getattr(settings, 'BULK_UPLOAD_BULK_WRITER', 'auto')
+        if name == 'auto':
+            name = VENDOR_WRITERS.get(connection.vendor, 'orm')
+        if name not in BULK_WRITERS:
+            raise ValueError(f"Invalid BULK_UPLOAD_BULK_WRITER '{name}'. Expected 'auto' or one of: {', '.join(BULK_WRITERS)}")
+        return BULK_WRITERS[name]()
+
+    @staticmethod
+    def get_batch_size(field_count: int) -> int:
+        """
+        Rows per batch: BULK_UPLOAD_INSERT_BATCH_SIZE if set, otherwise as many rows as fit in the backend's
+        query parameter limit with field_count parameters per row, capped at DEFAULT_MAX_INSERT_BATCH_SIZE.
+        """
+        batch_size = getattr(settings, 'BULK_UPLOAD_INSERT_BATCH_SIZE', None)
+        if batch_size:
+            return batch_size
+        max_query_params = connection.features.max_query_params
+        if not max_query_params:
+            return DEFAULT_MAX_INSERT_BATCH_SIZE
+        return max(1, min(max_query_params // max(field_count, 1), DEFAULT_MAX_INSERT_BATCH_SIZE))
+
+    @staticmethod
+    def write(model_instances: List[models.Model], insert_mode: InsertMode, unique_fields: List[str],
+              update_fields: List[str]) -> int:
+        """
+        Write the instances in batches inside one transaction and return the count of rows written.
+
+        In InsertMode.FAIL a conflicting row rolls the whole write back and raises ValueError.
+        """
+        if not model_instances:
+            return 0
+        writer = BulkWriteEngine.get_writer()
+        batch_size = BulkWriteEngine.get_batch_size(len(BulkWriter.get_insert_fields(type(model_instances[0]))))
+        try:
+            with transaction.atomic():
+                return writer.write(model_instances, insert_mode, unique_fields, update_fields, batch_size)
+        except IntegrityError as e:
+            if insert_mode == InsertMode.FAIL:
+                raise ValueError(f"Some users in the file already exist: {e}")
+            raise
+
+    @staticmethod
+    @contextmanager
+    def bulk_load() -> Iterator[None]:
+        """
+        Tune the database connection for a large load while the block runs.
+
+        On SQLite this switches to WAL journaling (so readers keep working during the load) and lowers
+        synchronous to BULK_UPLOAD_SQLITE_SYNCHRONOUS, restoring both afterwards. Leaving WAL needs the database
+        to itself, so if another connection still has it open the database is left in WAL mode, with a warning.
+        SQLite refuses these pragmas inside a transaction, so wrap the whole load; inside a transaction this does
+        nothing. Set BULK_UPLOAD_SQLITE_PRAGMAS to False to leave the connection alone.
+        """
+        if (connection.vendor != 'sqlite' or connection.in_atomic_block
+                or not getattr(settings, 'BULK_UPLOAD_SQLITE_PRAGMAS', True)):
+            yield
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            previous_synchronous = cursor.fetchone()[0]
+            cursor.execute('PRAGMA journal_mode')
+            previous_journal_mode = cursor.fetchone()[0]
+            cursor.execute('PRAGMA journal_mode=WAL')
+            journal_mode = cursor.fetchone()[0]
+            cursor.execute(f"PRAGMA synchronous={getattr(settings, 'BULK_UPLOAD_SQLITE_SYNCHRONOUS', DEFAULT_SQLITE_SYNCHRONOUS)}")
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA synchronous={int(previous_synchronous)}')
+                if journal_mode != previous_journal_mode:
+                    try:
+                        cursor.execute(f'PRAGMA journal_mode={previous_journal_mode}')
+                    except OperationalError as e:
+                        logger.warning("Could not switch SQLite back to journal_mode=%s after a bulk load: %s",
+                                       previous_journal_mode, e)
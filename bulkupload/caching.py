@@ -0,0 +1,65 @@
+from typing import Any, Awaitable, Callable
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Seconds cached counts and pages live; override with BULK_UPLOAD_PAGE_CACHE_TIMEOUT.
+# Uploads invalidate them straight away, the timeout only bounds staleness after other writes (e.g. the admin).
+DEFAULT_PAGE_CACHE_TIMEOUT = 300
+VERSION_CACHE_KEY = 'bulkupload:users:version'
+_MISSING = object()
+
+
+class UserListCache:
+    """
+    Cache of the user count, user pages and rendered table fragments.
+
+    Every key embeds a version stamp that is replaced whenever users are written, so a write invalidates all
+    cached reads at once without having to know which keys exist.
+    """
+
+    @staticmethod
+    def get_timeout() -> int:
+        return getattr(settings, 'BULK_UPLOAD_PAGE_CACHE_TIMEOUT', DEFAULT_PAGE_CACHE_TIMEOUT)
+
+    @staticmethod
+    def get_version() -> int:
+        """Return the current version stamp, starting a new one if the cache lost it."""
+        # A timestamp rather than a counter, so a version evicted from the cache is never handed out again
+        return cache.get_or_set(VERSION_CACHE_KEY, time.time_ns, None)
+
+    @staticmethod
+    async def aget_version() -> int:
+        return await cache.aget_or_set(VERSION_CACHE_KEY, time.time_ns, None)
+
+    @staticmethod
+    def bump_version() -> None:
+        """Invalidate every cached count, page and fragment."""
+        cache.set(VERSION_CACHE_KEY, time.time_ns(), None)
+
+    @staticmethod
+    def bump_version_on_commit() -> None:
+        """Invalidate once the current transaction commits; nothing changes if it rolls back."""
+        transaction.on_commit(UserListCache.bump_version)
+
+    @staticmethod
+    def make_key(name: str, *parts: Any, version: int | None = None) -> str:
+        version = UserListCache.get_version() if version is None else version
+        return ':'.join(['bulkupload:users', str(version), name, *map(str, parts)])
+
+    @staticmethod
+    def get_or_set(name: str, *parts: Any, default: Callable[[], Any]) -> Any:
+        """Return the cached value for (name, *parts) at the current version, computing it on a miss."""
+        return cache.get_or_set(UserListCache.make_key(name, *parts), default, UserListCache.get_timeout())
+
+    @staticmethod
+    async def aget_or_set(name: str, *parts: Any, default: Callable[[], Awaitable[Any]]) -> Any:
+        """Async get_or_set, for async views: default is a coroutine function, awaited on a miss."""
+        key = UserListCache.make_key(name, *parts, version=await UserListCache.aget_version())
+        value = await cache.aget(key, _MISSING)
+        if value is _MISSING:
+            value = await default()
+            await cache.aset(key, value, UserListCache.get_timeout())
+        return value
@@ -0,0 +1,111 @@
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from django.conf import settings
+import pandas as pd
+
+# Upload column headers and the Users fields they map to
+UPLOAD_COLUMN_MAPPING = {
+    'User ID': 'user_id', 'User Name': 'user_name', 'Email': 'email',
+    'Business Unit': 'business_unit', 'Department': 'department',
+    'Date of Joining': 'date_of_joining', 'Mobile Number': 'mobile_number'
+}
+# Profile made of the headers above; every other profile also accepts them
+DEFAULT_COLUMN_PROFILE = 'default'
+# Leading rows searched for the header row (titles or notes may sit above it); override with BULK_UPLOAD_HEADER_SEARCH_ROWS.
+DEFAULT_HEADER_SEARCH_ROWS = 10
+
+
+class ColumnMapping:
+    """
+    Match the headers of an upload to Users fields.
+
+    Profiles are configured in BULK_UPLOAD_COLUMN_PROFILES as {profile: {field: [header aliases]}}, e.g.
+    {'madurai': {'user_id': ['Emp Code'], 'date_of_joining': ['DOJ']}}. Headers match case- and
+    whitespace-insensitively, and every profile also accepts the default headers.
+    """
+
+    @staticmethod
+    def get_profiles() -> Dict[str, Dict[str, List[str]]]:
+        default_profile = {field: [header] for header, field in UPLOAD_COLUMN_MAPPING.items()}
+        profiles = {DEFAULT_COLUMN_PROFILE: default_profile}
+        for name, aliases in getattr(settings, 'BULK_UPLOAD_COLUMN_PROFILES', {}).items():
+            unknown_fields = set(aliases) - set(UPLOAD_COLUMN_MAPPING.values())
+            if unknown_fields:
+                raise ValueError(f"Column profile '{name}' maps unknown fields: {', '.join(sorted(unknown_fields))}")
+            profiles[name] = {field: [*aliases.get(field, []), *headers] for field, headers in default_profile.items()}
+        return profiles
+
+    @staticmethod
+    def get_profile_names() -> List[str]:
+        return list(ColumnMapping.get_profiles())
+
+    @staticmethod
+    def get_candidate_profiles(column_profile: str | None = None) -> List[Dict[str, List[str]]]:
+        """
+        Return the profiles to try, in order: the one named (or set by BULK_UPLOAD_COLUMN_PROFILE), or all of
+        them when neither is set.
+        """
+        profiles = ColumnMapping.get_profiles()
+        column_profile = column_profile or getattr(settings, 'BULK_UPLOAD_COLUMN_PROFILE', None)
+        if not column_profile:
+            return list(profiles.values())
+        if column_profile not in profiles:
+            raise ValueError(f"Unknown column profile '{column_profile}'. Expected one of: {', '.join(profiles)}")
+        return [profiles[column_profile]]
+
+    @staticmethod
+    def get_header_search_rows() -> int:
+        return getattr(settings, 'BULK_UPLOAD_HEADER_SEARCH_ROWS', DEFAULT_HEADER_SEARCH_ROWS)
+
+    @staticmethod
+    def normalize_header(header: Any) -> str:
+        if header is None or (isinstance(header, float) and pd.isna(header)):
+            return ''
+        return ' '.join(str(header).split()).casefold()
+
+    @staticmethod
+    def match_headers(headers: Sequence[Any], profile: Dict[str, List[str]]) -> Dict[int, str]:
+        """Map the position of each matching header to its field; the first of several matching columns wins."""
+        lookup = {ColumnMapping.normalize_header(alias): field for field, aliases in profile.items() for alias in aliases}
+        positions: Dict[int, str] = {}
+        for position, header in enumerate(headers):
+            field = lookup.get(ColumnMapping.normalize_header(header))
+            if field and field not in positions.values():
+                positions[position] = field
+        return positions
+
+    @staticmethod
+    def resolve(headers: Sequence[Any], column_profile: str | None = None) -> Dict[int, str]:
+        """
+        Return {column position: field} for a header row, raising ValueError naming the missing columns if no
+        candidate profile matches every field.
+        """
+        return ColumnMapping.find_header_row([headers], column_profile)[1]
+
+    @staticmethod
+    def find_header_row(rows: Iterable[Sequence[Any]], column_profile: str | None = None) -> Tuple[int, Dict[int, str]]:
+        """
+        Find the header row among the first rows of a sheet: the first row whose headers match every field under
+        a candidate profile. Returns its position and {column position: field}.
+        """
+        profiles = ColumnMapping.get_candidate_profiles(column_profile)
+        search_rows = ColumnMapping.get_header_search_rows()
+        best_match: Dict[int, str] = {}
+        for row_position, row in enumerate(rows):
+            if row_position >= search_rows:
+                break
+            for profile in profiles:
+                positions = ColumnMapping.match_headers(row, profile)
+                if len(positions) == len(UPLOAD_COLUMN_MAPPING):
+                    return row_position, positions
+                if len(positions) > len(best_match):
+                    best_match = positions
+
+        missing_columns = [header for header, field in UPLOAD_COLUMN_MAPPING.items() if field not in best_match.values()]
+        raise ValueError(f"Missing columns: {', '.join(missing_columns)}")
+
+    @staticmethod
+    def get_upload_headers(positions: Dict[int, str]) -> Dict[int, str]:
+        """Turn {column position: field} into {column position: default header}, the names readers give columns."""
+        headers = {field: header for header, field in UPLOAD_COLUMN_MAPPING.items()}
+        return {position: headers[field] for position, field in positions.items()}
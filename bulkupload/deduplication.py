@@ -0,0 +1,127 @@
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from pandas import DataFrame, Series
+import numpy as np
+import pandas as pd
+
+from bulkupload.schema import DuplicateGroup
+
+# Duplicate groups reported per upload; later duplicates are still removed and counted. Override with BULK_UPLOAD_MAX_DUPLICATE_GROUPS.
+DEFAULT_MAX_DUPLICATE_GROUPS = 1000
+# Fields compared to tell whether duplicate rows agree. user_id is left out, so rows sharing an email under different IDs can agree too.
+COMPARED_FIELDS = ['user_name', 'email', 'business_unit', 'department', 'date_of_joining', 'mobile_number']
+
+
+class SeenKeys:
+    """
+    Compact set of 64-bit key hashes, each stored with the row number and row hash of its first occurrence.
+
+    Keys live in sorted numpy runs, 24 bytes each, rather than in a Python set. A new run is merged into the
+    one before it while that one is at most twice its size, so there are O(log n) runs to search and each key
+    is re-sorted O(log n) times.
+    """
+
+    def __init__(self) -> None:
+        self.runs: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys, _, _ in self.runs)
+
+    def lookup(self, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return whether each hash was seen, and the first row number and row hash stored with it."""
+        # Searching for sorted hashes walks each run in order, which is several times faster than random probes
+        order = np.argsort(hashes)
+        sorted_hashes = hashes[order]
+        found = np.zeros(len(hashes), dtype=bool)
+        first_rows = np.zeros(len(hashes), dtype=np.int64)
+        first_row_hashes = np.zeros(len(hashes), dtype=np.uint64)
+        for keys, rows, row_hashes in self.runs:
+            positions = np.searchsorted(keys, sorted_hashes).clip(max=len(keys) - 1)
+            hit = keys[positions] == sorted_hashes
+            found[order[hit]] = True
+            first_rows[order[hit]] = rows[positions[hit]]
+            first_row_hashes[order[hit]] = row_hashes[positions[hit]]
+        return found, first_rows, first_row_hashes
+
+    def add(self, hashes: np.ndarray, rows: np.ndarray, row_hashes: np.ndarray) -> None:
+        """Add hashes that are not in the set yet and are unique among themselves."""
+        if not len(hashes):
+            return
+        order = np.argsort(hashes)
+        self.runs.append((hashes[order], rows[order], row_hashes[order]))
+        while len(self.runs) > 1 and len(self.runs[-2][0]) <= 2 * len(self.runs[-1][0]):
+            last = self.runs.pop()
+            merged = [np.concatenate(parts) for parts in zip(self.runs.pop(), last)]
+            order = np.argsort(merged[0], kind='stable')  # Timsort merges the two sorted halves in linear time
+            self.runs.append((merged[0][order], merged[1][order], merged[2][order]))
+
+
+class DuplicateDetector:
+    """
+    Find rows of an upload that repeat a user_id or a normalized email, one cleaned chunk at a time.
+
+    Rows repeating an earlier user_id are dropped (the first occurrence is kept); rows sharing an email under
+    different user_ids are all kept and only reported. Keys are held as 64-bit hashes in SeenKeys, about 48
+    bytes per unique row, so the file never has to be in memory at once. Two different keys hashing alike (a
+    chance of about 1 in 10^7 for a million rows) would be taken for duplicates.
+    """
+
+    def __init__(self, max_groups: int | None = None) -> None:
+        self.user_ids = SeenKeys()
+        self.emails = SeenKeys()
+        self.max_groups = max_groups if max_groups is not None else DuplicateDetector.get_max_groups()
+        self.duplicates_removed = 0
+        self.groups: Dict[Tuple[str, int], DuplicateGroup] = {}
+
+    @staticmethod
+    def get_max_groups() -> int:
+        return getattr(settings, 'BULK_UPLOAD_MAX_DUPLICATE_GROUPS', DEFAULT_MAX_DUPLICATE_GROUPS)
+
+    @staticmethod
+    def hash_values(values: Series) -> np.ndarray:
+        return pd.util.hash_pandas_object(values, index=False, categorize=False).to_numpy()
+
+    def process(self, df: DataFrame) -> DataFrame:
+        """Return the rows of a cleaned chunk whose user_id was not seen before, recording the duplicates."""
+        if df.empty:
+            return df
+        row_numbers = df.index.to_numpy(dtype=np.int64) + 2  # Excel row numbers, as in ValidationFailure
+        row_hashes = pd.util.hash_pandas_object(df[COMPARED_FIELDS], index=False, categorize=False).to_numpy()
+
+        user_ids = df['user_id'].to_numpy(dtype=object)
+        is_first = self._record_keys(self.user_ids, 'user_id', user_ids, DuplicateDetector.hash_values(df['user_id']), row_numbers, row_hashes)
+        self.duplicates_removed += int((~is_first).sum())
+
+        emails = df['email'][is_first].str.casefold()
+        has_email = (emails != '').to_numpy()
+        emails = emails[has_email]
+        self._record_keys(self.emails, 'email', emails.to_numpy(dtype=object), DuplicateDetector.hash_values(emails),
+                          row_numbers[is_first][has_email], row_hashes[is_first][has_email])
+        return df[is_first]
+
+    def _record_keys(self, seen: SeenKeys, field: str, values: np.ndarray, hashes: np.ndarray, row_numbers: np.ndarray,
+                     row_hashes: np.ndarray) -> np.ndarray:
+        """Add new keys to seen and group the repeated ones; returns a mask of the rows that are first occurrences."""
+        found, _, _ = seen.lookup(hashes)
+        is_first = ~found & ~pd.Series(hashes).duplicated().to_numpy()
+        seen.add(hashes[is_first], row_numbers[is_first], row_hashes[is_first])
+        repeated = ~is_first
+        if repeated.any():
+            # Looked up after adding this chunk's keys, so repeats of a key first seen in this chunk find it too
+            _, first_rows, first_row_hashes = seen.lookup(hashes[repeated])
+            for value, key_hash, first_row, first_row_hash, row_number, row_hash in zip(
+                    values[repeated], hashes[repeated], first_rows, first_row_hashes, row_numbers[repeated], row_hashes[repeated]):
+                group = self.groups.get((field, key_hash))
+                if group is None:
+                    if len(self.groups) >= self.max_groups:
+                        continue
+                    group = self.groups[(field, key_hash)] = {
+                        'field': field, 'value': str(value), 'row_indexes': [int(first_row)], 'conflicting': False}
+                group['row_indexes'].append(int(row_number))
+                group['conflicting'] = group['conflicting'] or bool(row_hash != first_row_hash)
+        return is_first
+
+    def get_groups(self) -> List[DuplicateGroup]:
+        """The duplicate groups found so far (at most max_groups), in order of their first row."""
+        return sorted(self.groups.values(), key=lambda group: (group['row_indexes'][0], group['field']))
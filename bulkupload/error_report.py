@@ -0,0 +1,134 @@
+from typing import IO, Dict, Iterator, List, Tuple
+import csv
+import io
+import itertools
+import json
+import tempfile
+import uuid
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from openpyxl import Workbook
+from pandas import DataFrame
+
+from bulkupload.column_mapping import UPLOAD_COLUMN_MAPPING
+from bulkupload.schema import ErrorGroup, ErrorSummary, ValidationFailure
+
+# Where error reports are kept, relative to the default storage: <id>.csv holds every failed row, <id>.json the
+# summary and <id>.xlsx the workbook, written the first time it is downloaded
+REJECTS_DIRECTORY = 'bulkupload/rejects'
+# Row numbers kept as samples for each group of errors
+ERROR_SAMPLE_ROWS = 5
+# Failed rows per page of the error table
+ERROR_PAGE_SIZE = 20
+
+
+class ErrorReport:
+    """
+    Report of the rows of one upload that failed validation, built chunk by chunk as validation runs.
+
+    Errors are counted by column and error type, with a few sample row numbers and the first message of each
+    group, and the failed rows themselves are appended to a temporary CSV file instead of being kept in memory.
+    save() moves both to the default storage, from where the error table pages through them and the rows can
+    be downloaded as CSV or .xlsx.
+    """
+
+    def __init__(self) -> None:
+        self.report_id = str(uuid.uuid4())
+        self.failed_count = 0
+        self.groups: Dict[Tuple[str, str], ErrorGroup] = {}
+        self.rows_file: IO[bytes] | None = None  # Created with the first failure
+
+    def add(self, rejects_df: DataFrame, failures: List[ValidationFailure]) -> None:
+        """Add the failures of a chunk, with their rows as built by BulkUploadService.build_rejects_frame."""
+        if not failures:
+            return
+        headers = {field: header for header, field in UPLOAD_COLUMN_MAPPING.items()}
+        for failure in failures:
+            for error in failure['errors']:
+                loc = error.get('loc') or ['general']
+                column = headers.get(loc[0], str(loc[0]))
+                error_type = str(error.get('type', 'value_error'))
+                group = self.groups.get((column, error_type))
+                if group is None:
+                    group = self.groups[(column, error_type)] = {
+                        'column': column, 'error_type': error_type, 'message': str(error.get('msg', '')), 'count': 0, 'sample_rows': []}
+                group['count'] += 1
+                if len(group['sample_rows']) < ERROR_SAMPLE_ROWS:
+                    group['sample_rows'].append(failure['row_index'])
+        if self.rows_file is None:
+            self.rows_file = tempfile.TemporaryFile()
+        self.rows_file.write(rejects_df.to_csv(index=False, header=self.failed_count == 0).encode())
+        self.failed_count += len(failures)
+
+    def get_summary(self) -> ErrorSummary:
+        return {
+            'failed_count': self.failed_count,
+            'groups': sorted(self.groups.values(), key=lambda group: group['count'], reverse=True),
+        }
+
+    def save(self) -> str | None:
+        """Store the failed rows and the summary and return the report id, or None if no row failed."""
+        if self.rows_file is None:
+            return None
+        try:
+            self.rows_file.seek(0)
+            default_storage.save(ErrorReport.get_file_name(self.report_id, 'csv'), File(self.rows_file))
+            default_storage.save(ErrorReport.get_file_name(self.report_id, 'json'), ContentFile(json.dumps(self.get_summary()).encode()))
+            return self.report_id
+        finally:
+            self.rows_file.close()
+
+    @staticmethod
+    def get_file_name(report_id: str, extension: str) -> str:
+        return f'{REJECTS_DIRECTORY}/{report_id}.{extension}'
+
+    @staticmethod
+    def load_summary(report_id: str) -> ErrorSummary | None:
+        file_name = ErrorReport.get_file_name(report_id, 'json')
+        if not default_storage.exists(file_name):
+            return None
+        with default_storage.open(file_name, 'rb') as summary_file:
+            return json.load(summary_file)
+
+    @staticmethod
+    def iter_rows(report_id: str) -> Iterator[List[str]]:
+        """Stream the failed rows from the stored CSV, header row first."""
+        with default_storage.open(ErrorReport.get_file_name(report_id, 'csv'), 'rb') as rows_file:
+            yield from csv.reader(io.TextIOWrapper(rows_file, encoding='utf-8', newline=''))
+
+    @staticmethod
+    def get_page(report_id: str, page_number: int, page_size: int = ERROR_PAGE_SIZE) -> Tuple[List[str], List[List[str]]]:
+        """Return the header row and one 1-based page of failed rows, read without loading the whole file."""
+        rows = ErrorReport.iter_rows(report_id)
+        try:
+            header = next(rows, [])
+            start = (max(page_number, 1) - 1) * page_size
+            return header, list(itertools.islice(rows, start, start + page_size))
+        finally:
+            rows.close()
+
+    @staticmethod
+    def get_workbook_name(report_id: str) -> str | None:
+        """
+        Return the storage name of the report's .xlsx workbook, writing it from the CSV on first use (in
+        openpyxl's write-only mode, so rows are streamed rather than held in memory). None if the report is gone.
+        """
+        workbook_name = ErrorReport.get_file_name(report_id, 'xlsx')
+        if default_storage.exists(workbook_name):
+            return workbook_name
+        if not default_storage.exists(ErrorReport.get_file_name(report_id, 'csv')):
+            return None
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        rows = ErrorReport.iter_rows(report_id)
+        worksheet.append(next(rows))
+        for row in rows:
+            # Row numbers as numbers; the other cells stay text, as typed in the upload
+            worksheet.append([int(row[0]), *row[1:]])
+        with tempfile.TemporaryFile() as workbook_file:
+            workbook.save(workbook_file)
+            workbook_file.seek(0)
+            return default_storage.save(workbook_name, File(workbook_file))
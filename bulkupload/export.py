@@ -0,0 +1,210 @@
+from typing import IO, Any, AsyncIterator, Iterator, List, Tuple
+import csv
+import importlib.util
+import itertools
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import QuerySet
+from openpyxl import Workbook
+
+from bulkupload.column_mapping import UPLOAD_COLUMN_MAPPING
+from bulkupload.schema import UserFilters
+from bulkupload.services import BulkUploadService
+
+# Users fetched from the database per query while exporting; override with BULK_UPLOAD_EXPORT_CHUNK_SIZE.
+DEFAULT_EXPORT_CHUNK_SIZE = 2000
+# Bytes of a finished .xlsx export sent per chunk of the response
+EXPORT_FILE_BLOCK_SIZE = 64 * 1024
+# Export formats with their content types; Parquet needs pyarrow.
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class ExportBuffer:
+    """
+    Write-only file object that hands back what was written to it, so writers that expect a file (csv,
+    pyarrow) can feed a streaming response. tell() counts every byte written, as Parquet's footer needs.
+    """
+
+    def __init__(self) -> None:
+        self.parts: List[Any] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def drain(self) -> Any:
+        """Return and forget everything written since the last drain."""
+        data = ''.join(self.parts) if self.parts and isinstance(self.parts[0], str) else b''.join(self.parts)
+        self.parts = []
+        return data
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class CsvExportWriter:
+    """Encode chunks of users as CSV text, starting with the header row."""
+
+    def __init__(self) -> None:
+        self.buffer = ExportBuffer()
+        self.writer = csv.writer(self.buffer)
+
+    def begin(self) -> str:
+        self.writer.writerow(UPLOAD_COLUMN_MAPPING)
+        return self.buffer.drain()
+
+    def write(self, rows: List[Tuple[Any, ...]]) -> str:
+        self.writer.writerows(rows)
+        return self.buffer.drain()
+
+    def end(self) -> str:
+        return ''
+
+
+class ParquetExportWriter:
+    """Encode each chunk of users as a Parquet row group; end() returns the footer."""
+
+    def __init__(self) -> None:
+        self.pa = BulkUploadService._import_pyarrow('Parquet', 'pyarrow')
+        parquet = BulkUploadService._import_pyarrow('Parquet', 'pyarrow.parquet')
+        self.schema = self.pa.schema([
+            (header, self.pa.date32() if field == 'date_of_joining' else self.pa.string())
+            for header, field in UPLOAD_COLUMN_MAPPING.items()
+        ])
+        self.buffer = ExportBuffer()
+        self.writer = parquet.ParquetWriter(self.buffer, self.schema)
+
+    def begin(self) -> bytes:
+        return self.buffer.drain()
+
+    def write(self, rows: List[Tuple[Any, ...]]) -> bytes:
+        columns = [self.pa.array(column, type=field.type) for column, field in zip(zip(*rows), self.schema)]
+        self.writer.write_table(self.pa.Table.from_arrays(columns, schema=self.schema))
+        return self.buffer.drain()
+
+    def end(self) -> bytes:
+        self.writer.close()
+        return self.buffer.drain()
+
+
+class UserExportService:
+    """
+    Export users matching the user list filters as CSV, .xlsx or Parquet.
+
+    Users are read in chunks of BULK_UPLOAD_EXPORT_CHUNK_SIZE and written as they arrive, so memory use does
+    not grow with the number of users. iter_export() reads them with QuerySet.iterator() for WSGI;
+    aiter_export() reads them with QuerySet.aiterator() so that ASGI servers, which would otherwise load a
+    synchronous response whole before sending it, stream it too. Exports use the upload column headers and
+    can be uploaded again.
+    """
+
+    @staticmethod
+    def get_formats() -> List[str]:
+        """The export formats available here: Parquet only when pyarrow is installed."""
+        return [name for name in EXPORT_CONTENT_TYPES if name != 'parquet' or importlib.util.find_spec('pyarrow')]
+
+    @staticmethod
+    def get_chunk_size() -> int:
+        return int(getattr(settings, 'BULK_UPLOAD_EXPORT_CHUNK_SIZE', DEFAULT_EXPORT_CHUNK_SIZE))
+
+    @staticmethod
+    def get_writer(export_format: str) -> CsvExportWriter | ParquetExportWriter:
+        if export_format == 'csv':
+            return CsvExportWriter()
+        if export_format == 'parquet':
+            return ParquetExportWriter()
+        raise ValueError(f"Unknown export format '{export_format}'.")
+
+    @staticmethod
+    def get_user_rows(filters: UserFilters | None = None) -> QuerySet:
+        """The matching users as tuples of the exported fields, in User ID order."""
+        return BulkUploadService.filter_users(filters).order_by('user_id').values_list(*UPLOAD_COLUMN_MAPPING.values())
+
+    @staticmethod
+    def iter_user_chunks(filters: UserFilters | None = None) -> Iterator[List[Tuple[Any, ...]]]:
+        chunk_size = UserExportService.get_chunk_size()
+        users = UserExportService.get_user_rows(filters).iterator(chunk_size=chunk_size)
+        while rows := list(itertools.islice(users, chunk_size)):
+            yield rows
+
+    @staticmethod
+    async def aiter_user_chunks(filters: UserFilters | None = None) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        chunk_size = UserExportService.get_chunk_size()
+        rows = []
+        # values() rather than values_list(): Django 5.1's aiterator() runs values_list() queries in the event loop
+        user_rows = BulkUploadService.filter_users(filters).order_by('user_id').values(*UPLOAD_COLUMN_MAPPING.values())
+        async for row in user_rows.aiterator(chunk_size=chunk_size):
+            rows.append(tuple(row.values()))
+            if len(rows) == chunk_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+    @staticmethod
+    def iter_export(export_format: str, filters: UserFilters | None = None) -> Iterator[Any]:
+        """Yield the export in the given format chunk by chunk, for a StreamingHttpResponse under WSGI."""
+        if export_format == 'xlsx':
+            yield from UserExportService.iter_file(UserExportService.write_xlsx(filters))
+            return
+        writer = UserExportService.get_writer(export_format)
+        yield writer.begin()
+        for rows in UserExportService.iter_user_chunks(filters):
+            yield writer.write(rows)
+        yield writer.end()
+
+    @staticmethod
+    async def aiter_export(export_format: str, filters: UserFilters | None = None) -> AsyncIterator[Any]:
+        """Yield the export in the given format chunk by chunk, for a StreamingHttpResponse under ASGI."""
+        if export_format == 'xlsx':
+            workbook_file = await sync_to_async(UserExportService.write_xlsx)(filters)
+            try:
+                while block := await sync_to_async(workbook_file.read)(EXPORT_FILE_BLOCK_SIZE):
+                    yield block
+            finally:
+                workbook_file.close()
+            return
+        writer = UserExportService.get_writer(export_format)
+        yield writer.begin()
+        async for rows in UserExportService.aiter_user_chunks(filters):
+            yield writer.write(rows)
+        yield writer.end()
+
+    @staticmethod
+    def write_xlsx(filters: UserFilters | None = None) -> IO[bytes]:
+        """
+        Write the workbook in openpyxl's write-only mode, which spools rows to disk, and return it as an open
+        temporary file. An .xlsx file is a zip archive whose directory comes last, so nothing can be sent
+        before it is complete.
+        """
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Users')
+        worksheet.append(list(UPLOAD_COLUMN_MAPPING))
+        for rows in UserExportService.iter_user_chunks(filters):
+            for row in rows:
+                worksheet.append(row)
+        workbook_file = tempfile.TemporaryFile()
+        workbook.save(workbook_file)
+        workbook_file.seek(0)
+        return workbook_file
+
+    @staticmethod
+    def iter_file(export_file: IO[bytes]) -> Iterator[bytes]:
+        with export_file:
+            while block := export_file.read(EXPORT_FILE_BLOCK_SIZE):
+                yield block
@@ -0,0 +1,284 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from bulkupload.schema import StageMetrics
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger('bulkupload.instrumentation')
+
+_added_hooks: List['InstrumentationHook'] = []
+_settings_hooks: Tuple[Tuple[str, ...], List['InstrumentationHook']] = ((), [])
+_hooks_lock = threading.Lock()
+# Stages currently tracing memory, across threads, and whether they started tracemalloc (rather than finding it on)
+_traced_stages = 0
+_started_tracemalloc = False
+_tracing_lock = threading.Lock()
+
+
+def peak_rss_bytes() -> int | None:
+    """Return the peak resident set size of this process so far, or None where it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _start_tracing() -> None:
+    """Start tracemalloc for a stage unless it is already on; tracemalloc is process-wide, so stages share it."""
+    global _traced_stages, _started_tracemalloc
+    with _tracing_lock:
+        if _traced_stages == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracemalloc = True
+        _traced_stages += 1
+
+
+def _stop_tracing() -> None:
+    """Stop tracemalloc once the last traced stage (in any thread) ends, if a stage started it."""
+    global _traced_stages, _started_tracemalloc
+    with _tracing_lock:
+        _traced_stages -= 1
+        if _traced_stages == 0 and _started_tracemalloc:
+            tracemalloc.stop()
+            _started_tracemalloc = False
+
+
+class InstrumentationHook(ABC):
+    """Receives the metrics of every instrumented stage. Set trace_memory to have tracemalloc peaks measured."""
+    trace_memory = False
+
+    @abstractmethod
+    def record(self, metrics: StageMetrics) -> None:
+        ...
+
+
+class LoggingHook(InstrumentationHook):
+    """Log one line per stage to the 'bulkupload.instrumentation' logger."""
+
+    def record(self, metrics: StageMetrics) -> None:
+        logger.info(
+            "%s: %.3fs wall, %.3fs cpu, rows %s -> %s, %d queries in %.3fs, peak memory %s",
+            metrics['stage'], metrics['wall_seconds'], metrics['cpu_seconds'], metrics['rows_in'], metrics['rows_out'],
+            metrics['query_count'], metrics['query_seconds'], metrics['peak_memory_bytes']
+        )
+
+
+class InMemoryCollector(InstrumentationHook):
+    """Keep every recorded stage in a list, for tests and benchmarks."""
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.records: List[StageMetrics] = []
+        self._lock = threading.Lock()
+
+    def record(self, metrics: StageMetrics) -> None:
+        with self._lock:
+            self.records.append(metrics)
+
+    def by_stage(self, stage: str) -> List[StageMetrics]:
+        return [metrics for metrics in self.records if metrics['stage'] == stage]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+
+class PrometheusHook(InstrumentationHook):
+    """Accumulate per-stage totals in-process and render them in the Prometheus text exposition format."""
+    COUNTERS = [
+        ('bulkupload_stage_runs_total', 'Times the stage ran', None),
+        ('bulkupload_stage_wall_seconds_total', 'Wall time spent in the stage', 'wall_seconds'),
+        ('bulkupload_stage_cpu_seconds_total', 'CPU time spent in the stage', 'cpu_seconds'),
+        ('bulkupload_stage_rows_in_total', 'Rows passed into the stage', 'rows_in'),
+        ('bulkupload_stage_rows_out_total', 'Rows produced by the stage', 'rows_out'),
+        ('bulkupload_stage_queries_total', 'SQL queries run by the stage', 'query_count'),
+        ('bulkupload_stage_query_seconds_total', 'Time spent in SQL queries by the stage', 'query_seconds'),
+    ]
+
+    def __init__(self) -> None:
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._peak_memory: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, metrics: StageMetrics) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(metrics['stage'], {name: 0.0 for name, _, _ in self.COUNTERS})
+            for name, _, field in self.COUNTERS:
+                totals[name] += 1 if field is None else (metrics[field] or 0)
+            if metrics['peak_memory_bytes'] is not None:
+                self._peak_memory[metrics['stage']] = max(self._peak_memory.get(metrics['stage'], 0), metrics['peak_memory_bytes'])
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, description, _ in self.COUNTERS:
+                lines.append(f'# HELP {name} {description}.')
+                lines.append(f'# TYPE {name} counter')
+                lines.extend(f'{name}{{stage="{stage}"}} {totals[name]:g}' for stage, totals in sorted(self._totals.items()))
+            if self._peak_memory:
+                lines.append('# HELP bulkupload_stage_peak_memory_bytes Largest tracemalloc peak seen in the stage.')
+                lines.append('# TYPE bulkupload_stage_peak_memory_bytes gauge')
+                lines.extend(f'bulkupload_stage_peak_memory_bytes{{stage="{stage}"}} {peak}' for stage, peak in sorted(self._peak_memory.items()))
+        return '\n'.join(lines) + '\n'
+
+
+class StageRecorder:
+    """Handed to the body of an instrumented stage so it can report how many rows it produced."""
+
+    def __init__(self, stage: str, rows_in: int | None) -> None:
+        self.stage = stage
+        self.rows_in = rows_in
+        self.rows_out: int | None = None
+        self.discarded = False  # Set to skip reporting this run of the stage
+        self.query_count = 0
+        self.query_seconds = 0.0
+
+    def count_query(self, execute: Callable, sql: str, params: Any, many: bool, context: Dict) -> Any:
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.query_seconds += time.perf_counter() - started
+
+
+class Instrumentation:
+    @staticmethod
+    def get_hooks() -> List[InstrumentationHook]:
+        """
+        Return the active hooks: those listed (as dotted paths) in BULK_UPLOAD_INSTRUMENTATION_HOOKS plus any
+        added with add_hook. Hooks from settings are instantiated once, so counters accumulate across requests.
+        """
+        global _settings_hooks
+        paths = tuple(getattr(settings, 'BULK_UPLOAD_INSTRUMENTATION_HOOKS', ()))
+        if paths != _settings_hooks[0]:
+            with _hooks_lock:
+                if paths != _settings_hooks[0]:
+                    _settings_hooks = (paths, [import_string(path)() for path in paths])
+        if not _added_hooks:
+            return _settings_hooks[1]
+        return _settings_hooks[1] + _added_hooks
+
+    @staticmethod
+    def add_hook(hook: InstrumentationHook) -> None:
+        with _hooks_lock:
+            _added_hooks.append(hook)
+
+    @staticmethod
+    def remove_hook(hook: InstrumentationHook) -> None:
+        with _hooks_lock:
+            _added_hooks.remove(hook)
+
+    @staticmethod
+    @contextmanager
+    def collect(trace_memory: bool = False) -> Iterator[InMemoryCollector]:
+        """Collect the metrics of every stage run inside the block."""
+        collector = InMemoryCollector(trace_memory)
+        Instrumentation.add_hook(collector)
+        try:
+            yield collector
+        finally:
+            Instrumentation.remove_hook(collector)
+
+    @staticmethod
+    @contextmanager
+    def stage(name: str, rows_in: int | None = None) -> Iterator[StageRecorder]:
+        """
+        Measure the block as stage `name` and hand the metrics to every hook.
+
+        With no hooks configured this only builds the recorder, so instrumented code costs next to nothing.
+        Memory is traced with tracemalloc only if BULK_UPLOAD_TRACE_MEMORY is set or a hook asks for it; a
+        stage nested in, or running alongside, another traced stage (e.g. in another job thread) reports the peak
+        since tracing started, as tracemalloc measures the whole process.
+        """
+        recorder = StageRecorder(name, rows_in)
+        hooks = Instrumentation.get_hooks()
+        if not hooks:
+            yield recorder
+            return
+
+        trace_memory = getattr(settings, 'BULK_UPLOAD_TRACE_MEMORY', False) or any(hook.trace_memory for hook in hooks)
+        if trace_memory:
+            _start_tracing()
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            with connection.execute_wrapper(recorder.count_query):
+                yield recorder
+        finally:
+            wall_seconds = time.perf_counter() - wall_started
+            cpu_seconds = time.process_time() - cpu_started
+            peak_memory = None
+            if trace_memory:
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                _stop_tracing()
+            metrics: StageMetrics = {
+                "stage": name,
+                "wall_seconds": wall_seconds,
+                "cpu_seconds": cpu_seconds,
+                "rows_in": recorder.rows_in,
+                "rows_out": recorder.rows_out,
+                "query_count": recorder.query_count,
+                "query_seconds": recorder.query_seconds,
+                "peak_memory_bytes": peak_memory,
+                "peak_rss_bytes": peak_rss_bytes(),
+            }
+            for hook in hooks if not recorder.discarded else []:
+                try:
+                    hook.record(metrics)
+                except Exception:
+                    logger.exception("Instrumentation hook %r failed", hook)
+
+    @staticmethod
+    def instrumented(name: str, rows_in: Callable[..., int | None], rows_out: Callable[[Any], int | None]) -> Callable:
+        """Decorate a function as a stage, counting rows from its arguments and from its return value."""
+        def decorator(function: Callable) -> Callable:
+            @wraps(function)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not Instrumentation.get_hooks():
+                    return function(*args, **kwargs)
+                with Instrumentation.stage(name, rows_in(*args, **kwargs)) as recorder:
+                    result = function(*args, **kwargs)
+                    recorder.rows_out = rows_out(result)
+                return result
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def iterate(name: str, items: Iterable[Any]) -> Iterator[Any]:
+        """Measure producing each item of a lazy iterable (e.g. reading each chunk of a file) as a stage."""
+        iterator = iter(items)
+        while True:
+            if not Instrumentation.get_hooks():
+                item = next(iterator, _EXHAUSTED)
+            else:
+                with Instrumentation.stage(name) as recorder:
+                    item = next(iterator, _EXHAUSTED)
+                    recorder.rows_out = len(item) if item is not _EXHAUSTED else 0
+                    recorder.discarded = item is _EXHAUSTED
+            if item is _EXHAUSTED:
+                return
+            yield item
+
+    @staticmethod
+    def get_prometheus_hook() -> PrometheusHook | None:
+        return next((hook for hook in Instrumentation.get_hooks() if isinstance(hook, PrometheusHook)), None)
+
+
+_EXHAUSTED = object()
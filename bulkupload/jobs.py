@@ -0,0 +1,181 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Dict
+import os
+import socket
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connections, transaction
+from django.utils import timezone
+
+from bulkupload.models import UploadJob, UploadJobStatus
+from bulkupload.schema import BulkUploadResult, UploadProgress
+from bulkupload.services import BulkUploadService
+
+# Worker threads of the in-process executor; override with BULK_UPLOAD_JOB_WORKERS.
+DEFAULT_JOB_WORKERS = 2
+# Live progress is kept in the cache, since the upload itself runs in one long transaction.
+PROGRESS_CACHE_TIMEOUT = 60 * 60
+# Seconds after which a job running on another host is assumed to be orphaned; override with BULK_UPLOAD_JOB_STALE_AFTER.
+# Jobs on this host are requeued as soon as the process running them has exited.
+DEFAULT_JOB_STALE_AFTER = 6 * 60 * 60
+
+_executor: Executor | None = None
+_executor_lock = threading.Lock()
+
+
+class UploadJobService:
+    @staticmethod
+    def get_executor() -> Executor:
+        """Return the process-wide thread pool that runs upload jobs."""
+        global _executor
+        with _executor_lock:
+            if _executor is None:
+                workers = getattr(settings, 'BULK_UPLOAD_JOB_WORKERS', DEFAULT_JOB_WORKERS)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulkupload-job')
+            return _executor
+
+    @staticmethod
+    def create_job(uploaded_file: UploadedFile, insert_mode: str | None = None, commit_policy: str | None = None,
+                   column_profile: str | None = None) -> UploadJob:
+        """Store the uploaded file and queue a job for it."""
+        job = UploadJob(original_name=uploaded_file.name, insert_mode=insert_mode or '', commit_policy=commit_policy or '',
+                        column_profile=column_profile or '')
+        job.file.save(f'{uuid.uuid4().hex}_{uploaded_file.name}', uploaded_file, save=False)
+        job.save()
+        UploadJobService.enqueue(job)
+        return job
+
+    @staticmethod
+    def enqueue(job: UploadJob) -> None:
+        """
+        Hand a queued job to the executor set by BULK_UPLOAD_JOB_EXECUTOR.
+
+        'thread' (default) runs it on the in-process thread pool once the job row is committed; 'inline' runs it
+        right away in the calling thread, which keeps tests deterministic.
+        """
+        if getattr(settings, 'BULK_UPLOAD_JOB_EXECUTOR', 'thread') == 'inline':
+            UploadJobService.run_job(job.pk)
+        else:
+            transaction.on_commit(lambda: UploadJobService.get_executor().submit(UploadJobService._run_in_thread, job.pk))
+
+    @staticmethod
+    def _run_in_thread(job_id: uuid.UUID) -> None:
+        try:
+            UploadJobService.run_job(job_id)
+        finally:
+            connections.close_all()
+
+    @staticmethod
+    def run_job(job_id: uuid.UUID) -> None:
+        """Run a queued job to completion, recording its result or error on the job row."""
+        # Claim the job so that a job is never run twice, recording which process runs it
+        claimed = UploadJob.objects.filter(pk=job_id, status=UploadJobStatus.queued).update(
+            status=UploadJobStatus.running, worker=UploadJobService.get_worker_name(), started_at=timezone.now())
+        if not claimed:
+            return
+        job = UploadJob.objects.get(pk=job_id)
+
+        def report_progress(progress: UploadProgress) -> None:
+            cache.set(UploadJobService.progress_cache_key(job_id), progress, PROGRESS_CACHE_TIMEOUT)
+
+        try:
+            try:
+                with job.file.open('rb') as stored_file:
+                    row_count = BulkUploadService.count_upload_rows(stored_file, job.original_name)
+                    chunks = BulkUploadService.read_upload_in_chunks(stored_file, job.original_name, column_profile=job.column_profile or None)
+                    upload_result = BulkUploadService.save_bulk_data_in_chunks(
+                        chunks, job.insert_mode or None, report_progress, job.commit_policy or None, row_count)
+                job.result = UploadJobService.serialize_result(upload_result)
+                job.rows_read = upload_result['rows_read_count']
+                job.rows_validated = upload_result['attempted_new_rows_count']
+                job.rows_inserted = upload_result['newly_created_count'] + upload_result['updated_count']
+                job.rows_failed = upload_result['failed_count']
+                job.status = UploadJobStatus.succeeded
+            except Exception as e:
+                job.error = str(e)
+                job.status = UploadJobStatus.failed
+            job.finished_at = timezone.now()
+            with transaction.atomic():  # A savepoint, so a failed save leaves the connection usable below
+                job.save()
+        except Exception as e:
+            # The result could not be saved: still finish the job, so it is not left running
+            UploadJob.objects.filter(pk=job_id).update(status=UploadJobStatus.failed, error=f"Could not save the job result: {e}", finished_at=timezone.now())
+        finally:
+            job.file.delete(save=False)
+            cache.delete(UploadJobService.progress_cache_key(job_id))
+
+    @staticmethod
+    def resume_pending_jobs() -> int:
+        """Requeue orphaned jobs (see is_orphaned) and run every queued job; return how many were run."""
+        for job in UploadJob.objects.filter(status=UploadJobStatus.running):
+            if UploadJobService.is_orphaned(job):
+                # Only if it is still the same claim, so a job finishing meanwhile is left alone
+                UploadJob.objects.filter(pk=job.pk, status=UploadJobStatus.running, worker=job.worker).update(
+                    status=UploadJobStatus.queued, worker='', started_at=None)
+        job_ids = list(UploadJob.objects.filter(status=UploadJobStatus.queued).order_by('created_at').values_list('pk', flat=True))
+        for job_id in job_ids:
+            UploadJobService.run_job(job_id)
+        return len(job_ids)
+
+    @staticmethod
+    def get_worker_name() -> str:
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    @staticmethod
+    def is_orphaned(job: UploadJob) -> bool:
+        """
+        Tell whether a running job was abandoned by the process that claimed it. On this host, that is when the
+        process has exited; jobs claimed on other hosts are only assumed orphaned once they have been running
+        for BULK_UPLOAD_JOB_STALE_AFTER seconds, as are jobs whose worker cannot be read. Jobs claimed before
+        workers were recorded count as orphaned.
+        """
+        if not job.worker or job.started_at is None:
+            return True
+        hostname, _, pid = job.worker.rpartition(':')
+        pid = int(pid) if pid.isdigit() else None
+        if hostname != socket.gethostname() or pid is None:
+            stale_after = getattr(settings, 'BULK_UPLOAD_JOB_STALE_AFTER', DEFAULT_JOB_STALE_AFTER)
+            return timezone.now() - job.started_at > timedelta(seconds=stale_after)
+        if pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:  # Alive, run by another user
+            return False
+        return False
+
+    @staticmethod
+    def progress_cache_key(job_id: uuid.UUID) -> str:
+        return f'bulkupload:job:{job_id}:progress'
+
+    @staticmethod
+    def get_progress(job: UploadJob) -> UploadProgress:
+        """Return the live counters of a running job, or the recorded ones once it has finished."""
+        if job.status == UploadJobStatus.running:
+            progress = cache.get(UploadJobService.progress_cache_key(job.pk))
+            if progress:
+                return progress
+        return {
+            "rows_read": job.rows_read,
+            "rows_validated": job.rows_validated,
+            "rows_inserted": job.rows_inserted,
+            "rows_failed": job.rows_failed
+        }
+
+    @staticmethod
+    def serialize_result(upload_result: BulkUploadResult) -> Dict[str, Any]:
+        """
+        Keep the JSON-safe parts of a BulkUploadResult: its counters, the error summary and the duplicate groups.
+        The failed rows themselves are in the error report.
+        """
+        return {
+            key: value for key, value in upload_result.items()
+            if key not in ('successful_users', 'total_users_after_upload', 'failed_rows')
+        }
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from bulkupload.benchmark import BENCHMARK_FORMATS, SyntheticUploadMix, run_benchmark
+from bulkupload.schema import InsertMode
+
+class Command(BaseCommand):
+    help = 'Benchmark each stage of the bulk upload pipeline on synthetic files and record the timings as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000], help='Row counts to benchmark, e.g. 1000 100000 1000000')
+        parser.add_argument('--format', dest='formats', choices=BENCHMARK_FORMATS, nargs='+', default=['xlsx'])
+        parser.add_argument('--invalid-email-rate', type=float, default=SyntheticUploadMix.invalid_email_rate)
+        parser.add_argument('--bad-mobile-rate', type=float, default=SyntheticUploadMix.bad_mobile_rate)
+        parser.add_argument('--duplicate-rate', type=float, default=SyntheticUploadMix.duplicate_rate)
+        parser.add_argument('--existing-rate', type=float, default=SyntheticUploadMix.existing_rate)
+        parser.add_argument('--insert-mode', choices=[mode.value for mode in InsertMode], default=InsertMode.SKIP.value)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--trace-memory', action='store_true', help='Also record tracemalloc peaks (much slower)')
+        parser.add_argument('--output', help='Write the results to this JSON file instead of stdout')
+
+    def handle(self, *args, **options):
+        mix = SyntheticUploadMix(
+            invalid_email_rate=options['invalid_email_rate'],
+            bad_mobile_rate=options['bad_mobile_rate'],
+            duplicate_rate=options['duplicate_rate'],
+            existing_rate=options['existing_rate'],
+        )
+        results = []
+        for file_format in options['formats']:
+            for rows in options['rows']:
+                try:
+                    result = run_benchmark(rows, file_format, mix, InsertMode(options['insert_mode']), options['seed'], options['trace_memory'])
+                except ValueError as e:
+                    raise CommandError(f'Benchmark of {rows} {file_format} rows failed: {e}')
+                results.append(result)
+                self.stderr.write(f"{rows} rows ({file_format}): {result['total_seconds']:.2f}s")
+
+        report = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(report)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} benchmark result(s) to {options['output']}"))
+        else:
+            self.stdout.write(report)
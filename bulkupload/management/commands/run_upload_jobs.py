@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from bulkupload.jobs import UploadJobService
+
+class Command(BaseCommand):
+    help = 'Run queued bulk upload jobs, including jobs interrupted by a restart'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='Keep running, looking for queued and orphaned jobs every this many seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            job_count = UploadJobService.resume_pending_jobs()
+            if job_count or not options['interval']:
+                self.stdout.write(self.style.SUCCESS(f'Ran {job_count} upload job(s)'))
+            if not options['interval']:
+                return
+            connections.close_all()
+            time.sleep(options['interval'])
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:49
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Duplicated user_ids listed in the error when the unique index cannot be created
+MAX_REPORTED_DUPLICATES = 20
+
+
+def check_duplicate_user_ids(apps, schema_editor):
+    """
+    Refuse to make user_id unique while some user_ids repeat, listing them, rather than deleting users: which
+    row of each duplicate to keep is for the operator to decide.
+    """
+    UsersModel = apps.get_model('bulkupload', 'UsersModel')
+    duplicates = (UsersModel.objects.values('user_id').annotate(row_count=Count('id'))
+                  .filter(row_count__gt=1).order_by('user_id'))
+    duplicate_count = duplicates.count()
+    if duplicate_count:
+        listed = ', '.join(f"{row['user_id']} ({row['row_count']} rows)" for row in duplicates[:MAX_REPORTED_DUPLICATES])
+        more = f' and {duplicate_count - MAX_REPORTED_DUPLICATES} more' if duplicate_count > MAX_REPORTED_DUPLICATES else ''
+        raise ValueError(
+            f'Cannot make user_id unique: {duplicate_count} user_id(s) belong to more than one user: {listed}{more}. '
+            'Delete or rename the extra rows, then run migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulkupload', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_user_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='usersmodel',
+            name='user_id',
+            field=models.CharField(max_length=10, unique=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:52
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulkupload', '0002_unique_user_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file', models.FileField(upload_to='bulkupload/jobs/')),
+                ('original_name', models.CharField(max_length=255)),
+                ('insert_mode', models.CharField(blank=True, max_length=10)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('rows_read', models.PositiveIntegerField(default=0)),
+                ('rows_validated', models.PositiveIntegerField(default=0)),
+                ('rows_inserted', models.PositiveIntegerField(default=0)),
+                ('rows_failed', models.PositiveIntegerField(default=0)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
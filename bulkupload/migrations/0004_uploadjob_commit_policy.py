@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 17:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulkupload', '0003_uploadjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadjob',
+            name='commit_policy',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+    ]
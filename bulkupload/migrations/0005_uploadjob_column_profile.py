@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulkupload', '0004_uploadjob_commit_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadjob',
+            name='column_profile',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+    ]
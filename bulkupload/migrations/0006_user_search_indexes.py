@@ -0,0 +1,74 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+# Name/email search index per database vendor. On SQLite an FTS5 table mirrors the two columns through
+# triggers, so it stays current whichever way rows are written (ORM, executemany or raw SQL).
+# SQLite migrations that rebuild bulkupload_usersmodel drop the triggers, so they must create them again.
+SEARCH_INDEX_SQL = {
+    'sqlite': {
+        'create': [
+            "CREATE VIRTUAL TABLE bulkupload_usersmodel_fts USING fts5("
+            "user_name, email, content='bulkupload_usersmodel', content_rowid='id')",
+            "CREATE TRIGGER bulkupload_usersmodel_fts_insert AFTER INSERT ON bulkupload_usersmodel BEGIN "
+            "INSERT INTO bulkupload_usersmodel_fts(rowid, user_name, email) VALUES (new.id, new.user_name, new.email); "
+            "END",
+            "CREATE TRIGGER bulkupload_usersmodel_fts_delete AFTER DELETE ON bulkupload_usersmodel BEGIN "
+            "INSERT INTO bulkupload_usersmodel_fts(bulkupload_usersmodel_fts, rowid, user_name, email) "
+            "VALUES ('delete', old.id, old.user_name, old.email); "
+            "END",
+            "CREATE TRIGGER bulkupload_usersmodel_fts_update AFTER UPDATE OF user_name, email ON bulkupload_usersmodel BEGIN "
+            "INSERT INTO bulkupload_usersmodel_fts(bulkupload_usersmodel_fts, rowid, user_name, email) "
+            "VALUES ('delete', old.id, old.user_name, old.email); "
+            "INSERT INTO bulkupload_usersmodel_fts(rowid, user_name, email) VALUES (new.id, new.user_name, new.email); "
+            "END",
+            "INSERT INTO bulkupload_usersmodel_fts(bulkupload_usersmodel_fts) VALUES ('rebuild')",
+        ],
+        'drop': [
+            "DROP TRIGGER IF EXISTS bulkupload_usersmodel_fts_update",
+            "DROP TRIGGER IF EXISTS bulkupload_usersmodel_fts_delete",
+            "DROP TRIGGER IF EXISTS bulkupload_usersmodel_fts_insert",
+            "DROP TABLE IF EXISTS bulkupload_usersmodel_fts",
+        ],
+    },
+    'postgresql': {
+        'create': [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX users_name_trgm_idx ON bulkupload_usersmodel USING gin (user_name gin_trgm_ops)",
+            "CREATE INDEX users_email_trgm_idx ON bulkupload_usersmodel USING gin (email gin_trgm_ops)",
+        ],
+        'drop': [
+            "DROP INDEX IF EXISTS users_email_trgm_idx",
+            "DROP INDEX IF EXISTS users_name_trgm_idx",
+        ],
+    },
+}
+
+
+def create_search_index(apps, schema_editor):
+    for statement in SEARCH_INDEX_SQL.get(schema_editor.connection.vendor, {}).get('create', []):
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    for statement in SEARCH_INDEX_SQL.get(schema_editor.connection.vendor, {}).get('drop', []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulkupload', '0005_uploadjob_column_profile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersmodel',
+            index=models.Index(fields=['business_unit', 'department', 'user_id'], name='users_unit_dept_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersmodel',
+            index=models.Index(fields=['date_of_joining'], name='users_joined_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulkupload', '0006_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadjob',
+            name='worker',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='uploadjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
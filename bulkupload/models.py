@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 
 
@@ -25,7 +27,7 @@ class DepartmentChoices(models.TextChoices):
 
 
 class UsersModel(models.Model):
-    user_id = models.CharField(max_length=10)
+    user_id = models.CharField(max_length=10, unique=True)
     user_name = models.CharField(max_length=50)
     email = models.EmailField(max_length=50)
     business_unit = models.CharField(
@@ -39,5 +41,47 @@ class UsersModel(models.Model):
     date_of_joining = models.DateField()
     mobile_number = models.CharField(max_length=15)
 
+    class Meta:
+        indexes = [
+            # Filtering on business unit and department, with user_id to page through the matches in order
+            models.Index(fields=['business_unit', 'department', 'user_id'], name='users_unit_dept_idx'),
+            models.Index(fields=['date_of_joining'], name='users_joined_idx'),
+        ]
+
     def __str__(self):
         return self.user_name
+
+
+class UploadJobStatus(models.TextChoices):
+    queued = 'queued'
+    running = 'running'
+    succeeded = 'succeeded'
+    failed = 'failed'
+
+
+class UploadJob(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    file = models.FileField(upload_to='bulkupload/jobs/')
+    original_name = models.CharField(max_length=255)
+    insert_mode = models.CharField(max_length=10, blank=True)
+    commit_policy = models.CharField(max_length=20, blank=True)
+    column_profile = models.CharField(max_length=50, blank=True)
+    status = models.CharField(
+        max_length=10,
+        choices=UploadJobStatus,
+        default=UploadJobStatus.queued,
+    )
+    rows_read = models.PositiveIntegerField(default=0)
+    rows_validated = models.PositiveIntegerField(default=0)
+    rows_inserted = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when a process claims the job: '<hostname>:<pid>' of that process, and when it started running it
+    worker = models.CharField(max_length=255, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.original_name} ({self.status})'
@@ -1,12 +1,28 @@
 from datetime import date
 from enum import Enum
 from pydantic import BaseModel, EmailStr, field_validator
-from typing import Any, List, TypedDict
+from typing import Any, Iterator, List, TypedDict
 import re
 import pandas as pd  # For pd.isna
 
 # Assuming bulkupload.models is in the same Django app 'bulkupload'
-from bulkupload.models import BusinessUnitChoices, DepartmentChoices
+from django.db.models import QuerySet
+from bulkupload.models import BusinessUnitChoices, DepartmentChoices, UsersModel
+
+# Mobile number rules, shared by the Users validator and the vectorized validator
+MOBILE_NUMBER_ALLOWED_PATTERN = r'[\d\s\-\(\)]+'
+MOBILE_NUMBER_MAX_LENGTH = 15
+MOBILE_NUMBER_MIN_DIGITS = 7
+
+# Set by clean_dataframe, only when some cells of a field could not be converted: their original values
+INVALID_DATE_COLUMN = '_invalid_date_of_joining'
+INVALID_BUSINESS_UNIT_COLUMN = '_invalid_business_unit'
+INVALID_DEPARTMENT_COLUMN = '_invalid_department'
+INVALID_VALUE_COLUMNS = {
+    'date_of_joining': INVALID_DATE_COLUMN,
+    'business_unit': INVALID_BUSINESS_UNIT_COLUMN,
+    'department': INVALID_DEPARTMENT_COLUMN,
+}
 
 # Create Pydantic Enums from Django TextChoices
 
@@ -32,12 +48,44 @@ class DepartmentEnum(str, Enum):
     ADMIN = DepartmentChoices.admin
 
 
+class InsertMode(str, Enum):
+    SKIP = 'skip'  # Leave users that already exist untouched
+    UPDATE = 'update'  # Overwrite the fields of users that already exist
+    FAIL = 'fail'  # Reject the upload if any user already exists
+
+
+class CommitPolicy(str, Enum):
+    ALL_OR_NOTHING = 'all_or_nothing'  # Save nothing if any row fails validation
+    COMMIT_VALID = 'commit_valid'  # Save the valid rows whatever fails
+    MAX_FAILURE_RATE = 'max_failure_rate'  # Save the valid rows if few enough rows fail (BULK_UPLOAD_MAX_FAILURE_RATE)
+
+
 class ValidationFailure(TypedDict):
     row_index: int  # Excel row number
     data: dict[str, Any]
     errors: List[Any]
 
 
+class DuplicateGroup(TypedDict):
+    field: str  # 'user_id' or 'email'
+    value: str  # The repeated user_id, or the normalized email
+    row_indexes: List[int]  # Excel row numbers, the first occurrence (the row kept) first
+    conflicting: bool  # Some rows differ from the first in the other fields
+
+
+class ErrorGroup(TypedDict):
+    column: str  # Upload column header, or 'general'
+    error_type: str  # Pydantic error type, e.g. 'value_error' or 'enum'
+    message: str  # Message of the first error in the group
+    count: int
+    sample_rows: List[int]  # Excel row numbers of the first few errors
+
+
+class ErrorSummary(TypedDict):
+    failed_count: int
+    groups: List[ErrorGroup]  # Most frequent first
+
+
 class Users(BaseModel):
     user_id: str
     user_name: str
@@ -66,20 +114,20 @@ class Users(BaseModel):
 
         # Validate characters: only digits, or digits with specific punctuation if allowed.
         # Allows digits, spaces, hyphens, parentheses.
-        if not re.fullmatch(r'[\d\s\-\(\)]+', s):
+        if not re.fullmatch(MOBILE_NUMBER_ALLOWED_PATTERN, s):
             raise ValueError(
                 'Mobile number contains invalid characters. Allowed: digits, spaces, hyphens, parentheses (after optional leading "+").')
 
         # Validate overall length for DB storage (max_length=15 in model).
-        if len(s) > 15:
+        if len(s) > MOBILE_NUMBER_MAX_LENGTH:
             raise ValueError(
-                f'Mobile number too long (max 15 chars after stripping "+"), got {len(s)} chars.')
+                f'Mobile number too long (max {MOBILE_NUMBER_MAX_LENGTH} chars after stripping "+"), got {len(s)} chars.')
 
         # Validate minimum number of actual digits (e.g. at least 7).
         num_digits = len(re.sub(r'\D', '', s))  # Count only digits
-        if num_digits < 7:
+        if num_digits < MOBILE_NUMBER_MIN_DIGITS:
             raise ValueError(
-                f'Mobile number must contain at least 7 digits, found {num_digits}.')
+                f'Mobile number must contain at least {MOBILE_NUMBER_MIN_DIGITS} digits, found {num_digits}.')
 
         return s  # Return the processed string (e.g., without leading '+')
 
@@ -90,12 +138,77 @@ class Users(BaseModel):
         from_attributes = True
 
 
+class LazyUsers:
+    """
+    Lazy handle on the users table, ordered by user_id.
+
+    Nothing is queried until the caller counts, pages or iterates it, and iteration streams rows from the
+    database in chunks instead of loading the whole table.
+    """
+
+    def __init__(self, queryset: QuerySet | None = None, chunk_size: int = 2000):
+        self.queryset = queryset if queryset is not None else UsersModel.objects.order_by('user_id')
+        self.chunk_size = chunk_size
+
+    def count(self) -> int:
+        return self.queryset.count()
+
+    def page(self, page_number: int, per_page: int) -> List[Users]:
+        """Return one 1-based page of users."""
+        offset = (max(page_number, 1) - 1) * per_page
+        return [Users.model_validate(user) for user in self.queryset[offset:offset + per_page]]
+
+    def __iter__(self) -> Iterator[Users]:
+        for user in self.queryset.iterator(chunk_size=self.chunk_size):
+            yield Users.model_validate(user)
+
+
+class FrameValidationResult(TypedDict):
+    valid_mask: pd.Series  # Boolean, aligned with the validated DataFrame's index
+    failures: List[ValidationFailure]
+    valid_users: pd.DataFrame  # Normalized Users field values of the valid rows
+
+
+class UploadProgress(TypedDict):
+    rows_read: int
+    rows_validated: int
+    rows_inserted: int  # Created or updated so far; rolled back if the upload fails validation
+    rows_failed: int
+
+
 class BulkUploadResult(TypedDict):
     successful_users: List[Users]
     failed_rows: List[ValidationFailure]
     newly_created_count: int
-    total_users_after_upload: List[Users]
+    total_users_after_upload: LazyUsers  # Not evaluated unless the caller asks for it
     attempted_new_rows_count: int
     all_users_in_file_existed: bool
     input_data_was_empty_after_cleaning: bool
     file_internal_duplicates_removed_count: int  # New field
+    rows_read_count: int  # Data rows read from the file, before cleaning
+    updated_count: int  # Existing users overwritten in InsertMode.UPDATE
+    rejected_by_commit_policy: bool  # Nothing was saved because too many rows failed validation
+    failed_count: int  # Rows that failed validation; failed_rows is empty for chunked uploads, see the error report
+    error_summary: ErrorSummary | None  # Failures grouped by column and error type, if any row failed
+    rejects_file_id: str | None  # Error report (see ErrorReport) of the rows that failed validation, if any
+    duplicate_groups: List[DuplicateGroup]  # User IDs and emails repeated within the file
+
+
+class StageMetrics(TypedDict):
+    stage: str  # e.g. 'clean_dataframe' or 'save_new_users'
+    wall_seconds: float
+    cpu_seconds: float  # Process CPU time, so it includes other threads
+    rows_in: int | None  # None when not known up front
+    rows_out: int | None
+    query_count: int  # SQL queries run on the default database by this thread
+    query_seconds: float
+    peak_memory_bytes: int | None  # tracemalloc peak, or None when memory tracing is off
+    peak_rss_bytes: int | None  # Peak RSS of the process so far, where the platform reports it
+
+
+class UserFilters(TypedDict, total=False):
+    search: str  # Words that user names or emails must contain words starting with
+    business_unit: str
+    department: str
+    joined_from: date  # Inclusive
+    joined_to: date  # Inclusive
@@ -1,190 +1,1165 @@
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from typing import List, Tuple, Set, Dict
-from pydantic import ValidationError
-from pandas import DataFrame
+from django.conf import settings
+from django.core.paginator import Page, Paginator, PageNotAnInteger, EmptyPage
+from django.db import connection, transaction
+from django.db.models import Max, Q, QuerySet
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Tuple, Set, Dict
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime
+from operator import itemgetter
+from urllib.parse import urlencode
+import base64
+import csv
+import hashlib
+import importlib
+import importlib.util
+import itertools
+import os
+import re
+import uuid
+import numpy as np
+from openpyxl import load_workbook
+from pandas import DataFrame, Series
 import pandas as pd
 
-from bulkupload.schema import Users, ValidationFailure, BulkUploadResult
-from bulkupload.models import UsersModel
+from bulkupload.bulk_write import BulkWriteEngine
+from bulkupload.caching import UserListCache
+from bulkupload.column_mapping import UPLOAD_COLUMN_MAPPING, ColumnMapping
+from bulkupload.deduplication import DuplicateDetector
+from bulkupload.error_report import ErrorReport
+from bulkupload.instrumentation import Instrumentation
+from bulkupload.schema import INVALID_VALUE_COLUMNS, DuplicateGroup, FrameValidationResult, Users, ValidationFailure, BulkUploadResult, CommitPolicy, InsertMode, LazyUsers, UploadProgress, UserFilters
+from bulkupload.models import BusinessUnitChoices, DepartmentChoices, UsersModel
+from bulkupload.validation import VectorizedUsersValidator
+
+# Rows per chunk when streaming an upload; override with BULK_UPLOAD_CHUNK_SIZE.
+DEFAULT_CHUNK_SIZE = 5000
+# File extensions accepted for upload. Parquet and Arrow IPC files need pyarrow.
+SUPPORTED_UPLOAD_EXTENSIONS = ['xlsx', 'csv', 'parquet', 'arrow', 'feather']
+# How existing users are handled unless a mode is passed in; override with BULK_UPLOAD_INSERT_MODE.
+DEFAULT_INSERT_MODE = InsertMode.SKIP
+# Bytes read at a time when counting the lines of a CSV upload
+UPLOAD_COUNT_BLOCK_SIZE = 1024 * 1024
+# Upper bound on user IDs per `user_id__in` query, for backends without a parameter limit.
+MAX_EXISTING_ID_BATCH_SIZE = 5000
+# Files with more unique user IDs than this are matched against the table through a temporary table.
+DEFAULT_TEMP_TABLE_MIN_IDS = 20000
+# The whole user_id column is only loaded when the table is at most this big (and no bigger than the file).
+DEFAULT_FULL_SCAN_MAX_ROWS = 50000
+# Uploads with at least this many rows to validate are validated in worker processes when
+# BULK_UPLOAD_PARALLEL_VALIDATION is 'auto'; override with BULK_UPLOAD_PARALLEL_MIN_ROWS.
+DEFAULT_PARALLEL_MIN_ROWS = 200000
+# How the user list is paginated unless overridden with BULK_UPLOAD_PAGINATION: 'page' or 'keyset'.
+DEFAULT_PAGINATION_MODE = 'page'
+# Page links shown either side of the current page (plus the first and last pages); override with BULK_UPLOAD_PAGE_LINKS_ON_EACH_SIDE.
+DEFAULT_PAGE_LINKS_ON_EACH_SIDE = 2
+# Name/email search index of SQLite databases, an FTS5 table kept in sync by triggers (migration 0006)
+USER_SEARCH_TABLE = 'bulkupload_usersmodel_fts'
+# Longer searches are cut to this many characters
+MAX_SEARCH_LENGTH = 100
+# What to do with the valid rows of an upload in which some rows fail; override with BULK_UPLOAD_COMMIT_POLICY.
+DEFAULT_COMMIT_POLICY = CommitPolicy.ALL_OR_NOTHING
+# Highest percentage of validated rows that may fail in CommitPolicy.MAX_FAILURE_RATE; override with BULK_UPLOAD_MAX_FAILURE_RATE.
+DEFAULT_MAX_FAILURE_RATE = 5.0
+# Excel stores dates as days since 1899-12-30; serials outside this range are not dates. Excel goes up to
+# 9999-12-31, but dates are parsed to datetime64[ns], which ends in April 2262; later dates are invalid.
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+EXCEL_SERIAL_MIN = 1
+EXCEL_SERIAL_MAX = (pd.Timestamp.max.date() - EXCEL_EPOCH.date()).days
+# Text date formats accepted in upload files, tried in this order; ISO8601 also takes datetime objects.
+DATE_FORMATS = ['ISO8601', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y']
+# UTC offset ('Z', '+05:30', '-0800', ...) after the time of an ISO datetime string; group 1 is the time.
+ISO_UTC_OFFSET_PATTERN = r'(\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?)\s*(?:Z|[+-]\d{2}(?::?\d{2})?)$'
+# Choice fields are held as categoricals of their choices; unknown values become missing (code -1).
+CHOICE_DTYPES = {
+    'business_unit': pd.CategoricalDtype(BusinessUnitChoices.values),
+    'department': pd.CategoricalDtype(DepartmentChoices.values),
+}
+# Free-text fields are held as pyarrow-backed strings, far smaller than Python str objects, when pyarrow is installed.
+TEXT_DTYPE = pd.StringDtype('pyarrow') if importlib.util.find_spec('pyarrow') else pd.StringDtype()
+# Fields compared, and overwritten if any differs, when an uploaded user already exists in InsertMode.UPDATE.
+UPSERT_UPDATE_FIELDS = ['user_name', 'email', 'business_unit', 'department', 'date_of_joining', 'mobile_number']
+
+
+class CountedPaginator(Paginator):
+    """A Paginator that is handed its item count instead of running COUNT(*) itself."""
+
+    def __init__(self, object_list: Any, per_page: int, count: int, **kwargs: Any) -> None:
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self) -> int:
+        return self._count
 
 
 class BulkUploadService:
     @staticmethod
-    def get_empty_result_payload(users_list: List[Users], file_duplicates_count: int = 0, input_empty_after_clean: bool = True) -> BulkUploadResult:
-        """Return an empty result payload with the current list of all users."""
+    def get_empty_result_payload(all_users: LazyUsers, file_duplicates_count: int = 0, input_empty_after_clean: bool = True, rows_read_count: int = 0,
+                                 duplicate_groups: List[DuplicateGroup] | None = None) -> BulkUploadResult:
+        """Return an empty result payload with a lazy handle on all users."""
         return {
             "successful_users": [],
             "failed_rows": [],
             "newly_created_count": 0,
-            "total_users_after_upload": users_list,
+            "total_users_after_upload": all_users,
             "attempted_new_rows_count": 0,
             "all_users_in_file_existed": False,
             "input_data_was_empty_after_cleaning": input_empty_after_clean,
-            "file_internal_duplicates_removed_count": file_duplicates_count
+            "file_internal_duplicates_removed_count": file_duplicates_count,
+            "rows_read_count": rows_read_count,
+            "updated_count": 0,
+            "rejected_by_commit_policy": False,
+            "failed_count": 0,
+            "error_summary": None,
+            "rejects_file_id": None,
+            "duplicate_groups": duplicate_groups or []
         }
 
     @staticmethod
+    def get_insert_mode(insert_mode: InsertMode | str | None = None) -> InsertMode:
+        """Resolve the insert mode to use, falling back to the BULK_UPLOAD_INSERT_MODE setting."""
+        if insert_mode is None:
+            insert_mode = getattr(settings, 'BULK_UPLOAD_INSERT_MODE', DEFAULT_INSERT_MODE)
+        try:
+            return InsertMode(insert_mode)
+        except ValueError:
+            raise ValueError(f"Invalid insert mode '{insert_mode}'. Expected one of: {', '.join(mode.value for mode in InsertMode)}")
+
+    @staticmethod
+    def get_commit_policy(commit_policy: CommitPolicy | str | None = None) -> CommitPolicy:
+        """Resolve the commit policy to use, falling back to the BULK_UPLOAD_COMMIT_POLICY setting."""
+        if commit_policy is None:
+            commit_policy = getattr(settings, 'BULK_UPLOAD_COMMIT_POLICY', DEFAULT_COMMIT_POLICY)
+        try:
+            return CommitPolicy(commit_policy)
+        except ValueError:
+            raise ValueError(f"Invalid commit policy '{commit_policy}'. Expected one of: {', '.join(policy.value for policy in CommitPolicy)}")
+
+    @staticmethod
+    def allows_commit(commit_policy: CommitPolicy, failed_count: int, validated_count: int) -> bool:
+        """Return whether the valid rows may be saved when failed_count of validated_count rows failed validation."""
+        if failed_count == 0 or commit_policy == CommitPolicy.COMMIT_VALID:
+            return True
+        if commit_policy == CommitPolicy.ALL_OR_NOTHING:
+            return False
+        max_failure_rate = getattr(settings, 'BULK_UPLOAD_MAX_FAILURE_RATE', DEFAULT_MAX_FAILURE_RATE)
+        return failed_count * 100 <= max_failure_rate * validated_count
+
+    @staticmethod
+    def build_rejects_frame(users_df: DataFrame, failed_rows: List[ValidationFailure]) -> DataFrame:
+        """
+        Return the rows of users_df that failed validation under their upload column headers, with the row number
+        and the errors of each, so that the rejects can be fixed and uploaded again.
+        """
+        # row_index is the DataFrame label plus 2 (header row and 1-based numbering)
+        labels = [failure['row_index'] - 2 for failure in failed_rows]
+        rejects_df = users_df.loc[labels, [field for field in UPLOAD_COLUMN_MAPPING.values() if field in users_df.columns]]
+        for field, invalid_column in INVALID_VALUE_COLUMNS.items():
+            if invalid_column in users_df.columns:
+                invalid_values = users_df.loc[labels, invalid_column]
+                rejects_df[field] = rejects_df[field].astype(object).where(invalid_values.isna(), invalid_values)
+        rejects_df = rejects_df.rename(columns={field: header for header, field in UPLOAD_COLUMN_MAPPING.items()})
+        rejects_df.insert(0, 'Row', [failure['row_index'] for failure in failed_rows])
+        rejects_df['Errors'] = [
+            '; '.join(f"{' -> '.join(map(str, error.get('loc', [])))}: {error.get('msg', '')}" for error in failure['errors'])
+            for failure in failed_rows
+        ]
+        return rejects_df
+
+    @staticmethod
+    def get_chunk_size() -> int:
+        """Return the configured number of rows per streamed chunk."""
+        return getattr(settings, 'BULK_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+    @staticmethod
+    def get_file_extension(file_name: str) -> str:
+        return file_name.rsplit('.', 1)[-1].lower() if '.' in file_name else ''
+
+    @staticmethod
+    def read_upload_in_chunks(uploaded_file: Any, file_name: str, chunk_size: int | None = None,
+                              column_profile: str | None = None) -> Iterator[DataFrame]:
+        """
+        Open an uploaded .xlsx, .csv, .parquet or Arrow IPC (.arrow/.feather) file as an iterator of DataFrame chunks.
+
+        Every reader finds the header row with ColumnMapping, parses only the mapped columns and names them after
+        the default upload headers. Chunks are indexed so that `index + 2` is the row number in the file, so all
+        formats share clean_dataframe and the row numbering downstream. Raises ValueError for unsupported
+        extensions and missing columns.
+        """
+        chunk_size = chunk_size or BulkUploadService.get_chunk_size()
+        extension = BulkUploadService.get_file_extension(file_name)
+        if extension == 'xlsx':
+            return BulkUploadService.read_excel_in_chunks(uploaded_file, chunk_size, column_profile)
+        if extension == 'csv':
+            return BulkUploadService.read_csv_in_chunks(uploaded_file, chunk_size, column_profile)
+        if extension == 'parquet':
+            return BulkUploadService.read_parquet_in_chunks(uploaded_file, chunk_size, column_profile)
+        if extension in ('arrow', 'feather'):
+            return BulkUploadService.read_arrow_in_chunks(uploaded_file, chunk_size, column_profile)
+        raise ValueError(f"Unsupported file type '.{extension}'. Supported: {', '.join('.' + ext for ext in SUPPORTED_UPLOAD_EXTENSIONS)}")
+
+    @staticmethod
+    def count_upload_rows(uploaded_file: Any, file_name: str) -> int | None:
+        """
+        Cheaply count the rows of an upload file without parsing its cells: the sheet dimensions of an .xlsx
+        file, the row count in a Parquet or Arrow IPC file's metadata, or the line count of a CSV file. Rows above
+        the data (header, titles) are counted too. Returns None when the file does not record it (e.g. Arrow
+        streams) or cannot be read; the file is rewound either way.
+        """
+        extension = BulkUploadService.get_file_extension(file_name)
+        try:
+            if extension == 'xlsx':
+                workbook = load_workbook(uploaded_file, read_only=True)
+                try:
+                    return workbook.active.max_row
+                finally:
+                    workbook.close()
+            if extension == 'csv':
+                with (open(uploaded_file, 'rb') if isinstance(uploaded_file, (str, os.PathLike)) else nullcontext(uploaded_file)) as csv_file:
+                    return sum(block.count(b'\n') for block in iter(lambda: csv_file.read(UPLOAD_COUNT_BLOCK_SIZE), b''))
+            if extension == 'parquet':
+                return BulkUploadService._import_pyarrow('Parquet', 'pyarrow.parquet').ParquetFile(uploaded_file).metadata.num_rows
+            if extension in ('arrow', 'feather'):
+                return BulkUploadService._import_pyarrow('Arrow', 'pyarrow').ipc.open_file(uploaded_file).count_rows()
+        except Exception:
+            return None
+        finally:
+            BulkUploadService._rewind(uploaded_file)
+        return None
+
+    @staticmethod
+    def read_excel(uploaded_file: Any, column_profile: str | None = None) -> DataFrame:
+        """Load a whole .xlsx sheet with pd.read_excel, parsing only the mapped columns below the header row."""
+        preview = pd.read_excel(uploaded_file, header=None, nrows=ColumnMapping.get_header_search_rows())
+        header_position, positions = ColumnMapping.find_header_row(preview.itertuples(index=False), column_profile)
+        BulkUploadService._rewind(uploaded_file)
+        data_frame = pd.read_excel(uploaded_file, header=None, skiprows=header_position + 1, usecols=list(positions))
+        return next(BulkUploadService._label_chunks([data_frame], ColumnMapping.get_upload_headers(positions), header_position))
+
+    @staticmethod
+    def read_csv_in_chunks(uploaded_file: Any, chunk_size: int | None = None, column_profile: str | None = None) -> Iterator[DataFrame]:
+        """
+        Read a CSV file with pandas' C parser, chunk_size rows at a time. Only the mapped columns are parsed;
+        cells are read as text, keeping leading zeros.
+        """
+        leading_rows = BulkUploadService._peek_csv_rows(uploaded_file, ColumnMapping.get_header_search_rows())
+        header_position, positions = ColumnMapping.find_header_row(leading_rows, column_profile)
+        chunks = pd.read_csv(uploaded_file, chunksize=chunk_size or BulkUploadService.get_chunk_size(), dtype=str, engine='c',
+                             header=None, skiprows=header_position + 1, usecols=list(positions))
+        return BulkUploadService._label_chunks(chunks, ColumnMapping.get_upload_headers(positions), header_position)
+
+    @staticmethod
+    def _peek_csv_rows(uploaded_file: Any, row_count: int) -> List[List[str]]:
+        """Parse the first row_count lines of a CSV file (a path or a binary file, which is rewound)."""
+        if isinstance(uploaded_file, (str, os.PathLike)):
+            with open(uploaded_file, newline='', encoding='utf-8-sig') as csv_file:
+                lines = list(itertools.islice(csv_file, row_count))
+        else:
+            uploaded_file.seek(0)
+            lines = [line.decode('utf-8-sig') if isinstance(line, bytes) else line for line in itertools.islice(uploaded_file, row_count)]
+            uploaded_file.seek(0)
+        return list(csv.reader(lines))
+
+    @staticmethod
+    def _rewind(uploaded_file: Any) -> None:
+        if hasattr(uploaded_file, 'seek'):
+            uploaded_file.seek(0)
+
+    @staticmethod
+    def _label_chunks(chunks: Iterable[DataFrame], headers: Dict[int, str], header_position: int) -> Iterator[DataFrame]:
+        """Name positionally read columns after the upload headers and shift the index past the rows above the header."""
+        for chunk in chunks:
+            chunk = chunk.rename(columns=headers)
+            chunk.index += header_position
+            yield chunk
+
+    @staticmethod
+    def read_parquet_in_chunks(uploaded_file: Any, chunk_size: int | None = None, column_profile: str | None = None) -> Iterator[DataFrame]:
+        """Read the mapped columns of a Parquet file batch by batch with pyarrow; the other columns are never decoded."""
+        chunk_size = chunk_size or BulkUploadService.get_chunk_size()
+        parquet = BulkUploadService._import_pyarrow('Parquet', 'pyarrow.parquet')
+        parquet_file = parquet.ParquetFile(uploaded_file)
+        headers = BulkUploadService._get_schema_headers(parquet_file.schema_arrow.names, column_profile)
+        batches = parquet_file.iter_batches(batch_size=chunk_size, columns=list(headers))
+        return BulkUploadService._iter_record_batches(batches, chunk_size, headers)
+
+    @staticmethod
+    def read_arrow_in_chunks(uploaded_file: Any, chunk_size: int | None = None, column_profile: str | None = None) -> Iterator[DataFrame]:
+        """Read the mapped columns of an Arrow IPC file (file or stream format, e.g. .arrow/.feather v2) batch by batch with pyarrow."""
+        pa = BulkUploadService._import_pyarrow('Arrow', 'pyarrow')
+        try:
+            reader = pa.ipc.open_file(uploaded_file)
+            batches = (reader.get_batch(position) for position in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            uploaded_file.seek(0)
+            reader = pa.ipc.open_stream(uploaded_file)
+            batches = iter(reader)
+        headers = BulkUploadService._get_schema_headers(reader.schema.names, column_profile)
+        batches = (batch.select(list(headers)) for batch in batches)
+        return BulkUploadService._iter_record_batches(batches, chunk_size or BulkUploadService.get_chunk_size(), headers)
+
+    @staticmethod
+    def _get_schema_headers(names: List[str], column_profile: str | None) -> Dict[str, str]:
+        """Map the mapped column names of a pyarrow schema to the default upload headers."""
+        headers = ColumnMapping.get_upload_headers(ColumnMapping.resolve(names, column_profile))
+        return {names[position]: header for position, header in headers.items()}
+
+    @staticmethod
+    def _import_pyarrow(format_name: str, module_name: str) -> Any:
+        try:
+            return importlib.import_module(module_name)
+        except ImportError:
+            raise ValueError(f"Reading {format_name} files requires pyarrow to be installed.")
+
+    @staticmethod
+    def _iter_record_batches(batches: Iterable[Any], chunk_size: int, headers: Dict[str, str]) -> Iterator[DataFrame]:
+        """Convert pyarrow record batches to DataFrames of at most chunk_size rows, indexed by row position."""
+        start = 0
+        for batch in batches:
+            for offset in range(0, batch.num_rows, chunk_size):
+                chunk = batch.slice(offset, chunk_size).to_pandas().rename(columns=headers)
+                chunk.index = pd.RangeIndex(start, start + len(chunk))
+                start += len(chunk)
+                yield chunk
+
+    @staticmethod
+    def read_excel_in_chunks(uploaded_file: Any, chunk_size: int | None = None, column_profile: str | None = None) -> Iterator[DataFrame]:
+        """
+        Open an .xlsx file in read-only mode and return an iterator of DataFrames of at most chunk_size rows.
+
+        The workbook is opened and its header row found eagerly, so unreadable files and missing columns fail
+        here rather than mid-upload. Each chunk is indexed so that `index + 2` is the Excel row number downstream.
+        """
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        try:
+            leading_rows = workbook.active.iter_rows(max_row=ColumnMapping.get_header_search_rows(), values_only=True)
+            header_position, positions = ColumnMapping.find_header_row(leading_rows, column_profile)
+        except Exception:
+            workbook.close()
+            raise
+        return BulkUploadService._iter_worksheet_chunks(workbook, chunk_size or BulkUploadService.get_chunk_size(),
+                                                        header_position, ColumnMapping.get_upload_headers(positions))
+
+    @staticmethod
+    def _iter_worksheet_chunks(workbook: Any, chunk_size: int, header_position: int, headers: Dict[int, str]) -> Iterator[DataFrame]:
+        """Yield the mapped columns of the active worksheet of a read-only workbook as fixed-size DataFrame chunks."""
+        try:
+            columns = list(headers.values())
+            select_cells = itemgetter(*headers)
+            # Cells right of the last mapped column are never parsed
+            width = max(headers) + 1
+            rows = workbook.active.iter_rows(min_row=header_position + 2, max_col=width, values_only=True)
+
+            buffer = []
+            start = header_position
+            for row in rows:
+                buffer.append(select_cells(row + (None,) * (width - len(row))))
+                if len(buffer) == chunk_size:
+                    yield DataFrame.from_records(buffer, columns=columns, index=pd.RangeIndex(start, start + len(buffer)))
+                    start += len(buffer)
+                    buffer = []
+            if buffer:
+                yield DataFrame.from_records(buffer, columns=columns, index=pd.RangeIndex(start, start + len(buffer)))
+        finally:
+            workbook.close()
+
+    @staticmethod
+    @Instrumentation.instrumented('clean_dataframe', rows_in=lambda data_frame: len(data_frame), rows_out=len)
     def clean_dataframe(data_frame: DataFrame) -> DataFrame:
-        """Clean and standardize the DataFrame by renaming columns and formatting data."""
-        column_mapping = {
-            'User ID': 'user_id', 'User Name': 'user_name', 'Email': 'email',
-            'Business Unit': 'business_unit', 'Department': 'department',
-            'Date of Joining': 'date_of_joining', 'Mobile Number': 'mobile_number'
-        }
-        missing_columns = [col for col in column_mapping.keys() if col not in data_frame.columns]
-        if missing_columns:
-            raise ValueError(f"Missing columns: {', '.join(missing_columns)}")
+        """
+        Clean and standardize the DataFrame by keeping the mapped columns under their field names and formatting data.
 
-        df = data_frame.rename(columns=column_mapping)
+        Columns come out compact: dates as datetime64, business_unit and department as categoricals of their
+        choices, and the rest as TEXT_DTYPE strings. Cells that could not be converted keep their original value
+        in the field's INVALID_VALUE_COLUMNS column, for the validation report.
+        """
+        positions = ColumnMapping.resolve(list(data_frame.columns))
+        df = data_frame.iloc[:, list(positions)].set_axis(list(positions.values()), axis=1)
         for field in Users.model_fields.keys():
             if field in df.columns:
                 if field == 'date_of_joining':
-                    df[field] = df[field].apply(lambda x: pd.to_datetime('1899-12-30') + pd.to_timedelta(x, 'D') 
-                        if isinstance(x, (int, float)) and not pd.isna(x) else x)
+                    raw_values = df[field]
+                    df[field], invalid = BulkUploadService.normalize_dates(raw_values)
+                elif field in CHOICE_DTYPES:
+                    raw_values = BulkUploadService.to_text(df[field])
+                    df[field] = raw_values.astype(CHOICE_DTYPES[field])
+                    invalid = df[field].cat.codes == -1
                 else:
-                    df[field] = df[field].astype(str).str.strip().replace('nan', '').replace('None', '')
+                    df[field] = BulkUploadService.to_text(df[field])
+                    continue
+                if invalid.any():
+                    df[INVALID_VALUE_COLUMNS[field]] = raw_values.where(invalid)
 
-        df['user_id'] = df['user_id'].astype(str).str.strip().replace('nan', '').replace('None', '')
-        df = df.dropna(subset=['user_id']).query("user_id != ''")
+        df = df[df['user_id'] != '']
         return df
 
     @staticmethod
-    def deduplicate_dataframe(df: DataFrame) -> Tuple[DataFrame, int]:
-        """Remove duplicates within the DataFrame based on 'user_id' and return the count of removed duplicates."""
+    def to_text(column: Series) -> Series:
+        """Convert a column to stripped TEXT_DTYPE strings, with empty strings for missing cells."""
+        return column.astype(TEXT_DTYPE).fillna('').str.strip().replace(['nan', 'None'], '')
+
+    @staticmethod
+    def normalize_dates(column: Series) -> Tuple[Series, Series]:
+        """
+        Convert a column of dates in any of the accepted forms to datetime64 values at midnight.
+
+        Excel serial numbers (as numbers or digit strings), datetimes, ISO strings and DD/MM/YYYY (or DD-MM-YYYY,
+        DD.MM.YYYY) strings are each parsed in bulk with pd.to_datetime on the cells still unparsed; times of day are
+        dropped. Returns the converted column (NaT where empty or unparseable) and a mask of the cells that held a
+        value but could not be parsed.
+        """
+        if pd.api.types.is_datetime64_any_dtype(column):
+            parsed = column.dt.tz_localize(None) if getattr(column.dt, 'tz', None) else column
+            return parsed.dt.normalize(), Series(False, index=column.index)
+
+        missing = column.isna() | column.astype(str).str.strip().isin(['', 'nan', 'None', 'NaT'])
+        parsed = Series(pd.NaT, index=column.index, dtype='datetime64[ns]')
+
+        serials = pd.to_numeric(column.where(~missing), errors='coerce')
+        is_serial = serials.notna() & serials.between(EXCEL_SERIAL_MIN, EXCEL_SERIAL_MAX)
+        if is_serial.any():
+            # Day arithmetic, since timedelta64[ns] only spans 292 years
+            days = np.floor(serials[is_serial].to_numpy()).astype('int64').astype('timedelta64[D]')
+            parsed[is_serial] = (np.datetime64(EXCEL_EPOCH.date(), 'D') + days).astype('datetime64[ns]')
+
+        for date_format in DATE_FORMATS:
+            pending = ~missing & parsed.isna() & serials.isna()
+            if not pending.any():
+                break
+            values = column[pending]
+            if date_format == 'ISO8601':
+                values = BulkUploadService.drop_utc_offsets(values)
+            else:
+                values = values.astype(str).str.strip()
+            converted = pd.to_datetime(values, format=date_format, errors='coerce')
+            parsed = parsed.fillna(converted)
+
+        return parsed.dt.normalize(), ~missing & parsed.isna()
+
+    @staticmethod
+    def drop_utc_offsets(values: Series) -> Series:
+        """
+        Drop the UTC offsets of ISO datetime strings and timezone-aware datetimes, keeping their local date and
+        time: 2024-03-01T00:00+05:30 was typed as 1 March and stays 1 March rather than becoming 28 February UTC.
+        """
+        if pd.api.types.infer_dtype(values, skipna=True) == 'string':
+            return values.str.replace(ISO_UTC_OFFSET_PATTERN, r'\1', regex=True)
+        return values.map(
+            lambda value: re.sub(ISO_UTC_OFFSET_PATTERN, r'\1', value) if isinstance(value, str)
+            else value.replace(tzinfo=None) if isinstance(value, datetime) else value
+        )
+
+    @staticmethod
+    @Instrumentation.instrumented('deduplicate_dataframe', rows_in=lambda df, *args, **kwargs: len(df), rows_out=lambda result: len(result[0]))
+    def deduplicate_dataframe(df: DataFrame, detector: DuplicateDetector | None = None) -> Tuple[DataFrame, int]:
+        """
+        Remove rows repeating an earlier user_id and return the count of removed duplicates.
+
+        Pass the same detector for every chunk of an upload to deduplicate across chunks; it also collects the
+        duplicate groups (repeated user_ids and emails) for the upload result.
+        """
         if df.empty:
             return df, 0
-        original_count = len(df)
-        df_dedup = df.drop_duplicates(subset=['user_id'], keep='first')
-        return df_dedup, original_count - len(df_dedup)
+        detector = detector or DuplicateDetector()
+        duplicates_removed = detector.duplicates_removed
+        df_dedup = detector.process(df)
+        return df_dedup, detector.duplicates_removed - duplicates_removed
 
     @staticmethod
-    def get_existing_user_ids() -> Set[str]:
-        """Fetch all existing user IDs from the database."""
-        return set(UsersModel.objects.values_list('user_id', flat=True))
+    @Instrumentation.instrumented('get_existing_user_ids', rows_in=lambda user_ids, *args, **kwargs: len(user_ids) if hasattr(user_ids, '__len__') else None, rows_out=len)
+    def get_existing_user_ids(user_ids: Iterable[str], strategy: str | None = None) -> Set[str]:
+        """
+        Return which of the given user IDs already exist in the database.
+
+        Unless a strategy is given (chunked uploads choose one for the whole file), it is picked by
+        get_existing_id_strategy from the number of IDs given.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return set()
+
+        strategy = strategy or BulkUploadService.get_existing_id_strategy(len(user_ids))
+        if strategy == 'full_scan':
+            return BulkUploadService._existing_ids_full_scan(user_ids)
+        if strategy == 'temp_table':
+            return BulkUploadService._existing_ids_temp_table(user_ids)
+        if strategy == 'in_batches':
+            return BulkUploadService._existing_ids_in_batches(user_ids)
+        raise ValueError(f"Invalid existing user ID lookup strategy '{strategy}'.")
 
     @staticmethod
+    def get_existing_id_strategy(file_id_count: int) -> str:
+        """
+        Return the existing-id lookup for a file with this many user IDs: BULK_UPLOAD_EXISTING_ID_STRATEGY
+        ('full_scan', 'in_batches' or 'temp_table'), or for 'auto' (default) choose_existing_id_strategy.
+        """
+        strategy = getattr(settings, 'BULK_UPLOAD_EXISTING_ID_STRATEGY', 'auto')
+        if strategy == 'auto':
+            strategy = BulkUploadService.choose_existing_id_strategy(file_id_count)
+        return strategy
+
+    @staticmethod
+    def choose_existing_id_strategy(file_id_count: int) -> str:
+        """
+        Pick the cheapest existing-id lookup for a file with this many unique user IDs, given the (estimated)
+        table size: loading the whole user_id column is only done for small tables no bigger than the file,
+        moderate files probe the user_id index with batched `user_id__in` queries, and very large files are
+        joined against the table through a temporary table.
+        """
+        full_scan_max_rows = getattr(settings, 'BULK_UPLOAD_FULL_SCAN_MAX_ROWS', DEFAULT_FULL_SCAN_MAX_ROWS)
+        table_size = BulkUploadService.estimate_user_count()
+        if table_size <= min(file_id_count, full_scan_max_rows):
+            return 'full_scan'
+        if file_id_count >= getattr(settings, 'BULK_UPLOAD_TEMP_TABLE_MIN_IDS', DEFAULT_TEMP_TABLE_MIN_IDS):
+            return 'temp_table'
+        return 'in_batches'
+
+    @staticmethod
+    def estimate_user_count() -> int:
+        """Cheap upper bound of the users table size: the highest primary key, read from the index."""
+        return UsersModel.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+
+    @staticmethod
+    def get_existing_id_batch_size() -> int:
+        """Largest `user_id__in` batch the database backend accepts in one query."""
+        max_query_params = connection.features.max_query_params
+        return min(max_query_params, MAX_EXISTING_ID_BATCH_SIZE) if max_query_params else MAX_EXISTING_ID_BATCH_SIZE
+
+    @staticmethod
+    def _existing_ids_full_scan(user_ids: Set[str]) -> Set[str]:
+        return user_ids.intersection(UsersModel.objects.values_list('user_id', flat=True).iterator())
+
+    @staticmethod
+    def _existing_ids_in_batches(user_ids: Set[str]) -> Set[str]:
+        user_ids = list(user_ids)
+        batch_size = BulkUploadService.get_existing_id_batch_size()
+        existing_user_ids = set()
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            existing_user_ids.update(UsersModel.objects.filter(user_id__in=batch).values_list('user_id', flat=True))
+        return existing_user_ids
+
+    @staticmethod
+    def _existing_ids_temp_table(user_ids: Set[str]) -> Set[str]:
+        quote_name = connection.ops.quote_name
+        temp_table = quote_name(f'bulkupload_upload_ids_{uuid.uuid4().hex[:12]}')
+        users_table = quote_name(UsersModel._meta.db_table)
+        user_id_column = quote_name('user_id')
+        max_length = UsersModel._meta.get_field('user_id').max_length
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TEMPORARY TABLE {temp_table} ({user_id_column} varchar({max_length}) PRIMARY KEY)')
+            try:
+                # IDs longer than the column cannot exist in the table
+                cursor.executemany(f'INSERT INTO {temp_table} ({user_id_column}) VALUES (%s)',
+                                   [(user_id,) for user_id in user_ids if len(user_id) <= max_length])
+                cursor.execute(
+                    f'SELECT u.{user_id_column} FROM {users_table} u '
+                    f'INNER JOIN {temp_table} t ON t.{user_id_column} = u.{user_id_column}'
+                )
+                return {row[0] for row in cursor.fetchall()}
+            finally:
+                cursor.execute(f'DROP TABLE {temp_table}')
+
+    @staticmethod
+    def select_rows_to_write(dedup_df: DataFrame, existing_user_ids: Set[str], insert_mode: InsertMode) -> DataFrame:
+        """Pick the rows to write for the insert mode, raising ValueError in FAIL mode if any user already exists."""
+        if insert_mode == InsertMode.UPDATE:
+            return dedup_df
+        if insert_mode == InsertMode.FAIL and existing_user_ids:
+            sample = ', '.join(sorted(existing_user_ids)[:5])
+            raise ValueError(f"{len(existing_user_ids)} user(s) in the file already exist (e.g. {sample}).")
+        return dedup_df[~dedup_df['user_id'].isin(existing_user_ids)]
+
+    @staticmethod
+    def get_validation_workers(row_count: int) -> int:
+        """
+        Return how many processes should validate this many rows; 1 means validate in this process.
+
+        BULK_UPLOAD_PARALLEL_VALIDATION is True (always), False (never) or 'auto' (from
+        BULK_UPLOAD_PARALLEL_MIN_ROWS rows). BULK_UPLOAD_VALIDATION_WORKERS defaults to the CPU count.
+        """
+        mode = getattr(settings, 'BULK_UPLOAD_PARALLEL_VALIDATION', 'auto')
+        if mode == 'auto':
+            mode = row_count >= getattr(settings, 'BULK_UPLOAD_PARALLEL_MIN_ROWS', DEFAULT_PARALLEL_MIN_ROWS)
+        if not mode:
+            return 1
+        return getattr(settings, 'BULK_UPLOAD_VALIDATION_WORKERS', None) or os.cpu_count() or 1
+
+    @staticmethod
+    @Instrumentation.instrumented('validate_new_users', rows_in=lambda new_users_df: len(new_users_df), rows_out=lambda result: len(result[1]))
     def validate_new_users(new_users_df: DataFrame) -> Tuple[List[Users], List[UsersModel], List[ValidationFailure]]:
-        """Validate new user data against the Pydantic schema and prepare Django model instances."""
+        """Validate new user data against the Users schema rules column-wise and prepare Django model instances."""
+        workers = BulkUploadService.get_validation_workers(len(new_users_df))
+        if workers > 1:
+            validation = VectorizedUsersValidator.validate_parallel(new_users_df, workers)
+        else:
+            validation = VectorizedUsersValidator.validate(new_users_df)
+        return BulkUploadService.prepare_valid_users(validation)
+
+    @staticmethod
+    def prepare_valid_users(validation: FrameValidationResult) -> Tuple[List[Users], List[UsersModel], List[ValidationFailure]]:
+        """Build Users and model instances from the valid rows of a validation result."""
         validated_users = []
         model_instances = []
-        failed_rows = []
+        for values in validation['valid_users'].to_dict('records'):
+            # Values were already checked (or produced by Users itself), so skip re-validation
+            validated_users.append(Users.model_construct(**values))
+            model_instances.append(UsersModel(**values))
 
-        for index, row in new_users_df.iterrows():
-            row_data = row.to_dict()
-            if 'date_of_joining' in row_data and pd.isna(row_data['date_of_joining']):
-                row_data['date_of_joining'] = None
-            try:
-                user = Users.model_validate(row_data)
-                validated_users.append(user)
-                model_instances.append(UsersModel(**user.model_dump()))
-            except ValidationError as e:
-                failed_rows.append({
-                    "row_index": index + 2,
-                    "data": {k: str(v)[:50] for k, v in row_data.items()},
-                    "errors": e.errors()
-                })
-            except Exception as e:
-                failed_rows.append({
-                    "row_index": index + 2,
-                    "data": {k: str(v)[:50] for k, v in row_data.items()},
-                    "errors": [{"loc": ["general"], "msg": str(e), "type": "runtime_error"}]
-                })
-
-        return validated_users, model_instances, failed_rows
-
-    @staticmethod
-    def save_new_users(model_instances: List[UsersModel]) -> int:
-        """Bulk create new users in the database and return the count of created users."""
+        return validated_users, model_instances, validation['failures']
+
+    @staticmethod
+    @Instrumentation.instrumented('save_new_users', rows_in=lambda model_instances, *args, **kwargs: len(model_instances), rows_out=lambda written: written)
+    def save_new_users(model_instances: List[UsersModel], insert_mode: InsertMode = InsertMode.SKIP) -> int:
+        """
+        Bulk write users in the database and return the count of rows written.
+
+        SKIP ignores rows whose user_id already exists, UPDATE overwrites them in the same statement and FAIL
+        raises ValueError if any of them exists. Rows are written in batches in one transaction by the
+        BulkWriteEngine writer for the database backend.
+        """
         if not model_instances:
             return 0
-        created_objects = UsersModel.objects.bulk_create(model_instances, ignore_conflicts=True)
-        return len(created_objects)
+        with BulkWriteEngine.bulk_load():
+            written_count = BulkWriteEngine.write(model_instances, insert_mode, unique_fields=['user_id'], update_fields=UPSERT_UPDATE_FIELDS)
+        UserListCache.bump_version_on_commit()
+        return written_count
+
+    @staticmethod
+    def drop_unchanged_users(model_instances: List[UsersModel], existing_user_ids: Set[str], insert_mode: InsertMode) -> List[UsersModel]:
+        """
+        In InsertMode.UPDATE, leave out the existing users whose UPSERT_UPDATE_FIELDS already hold the uploaded
+        values, so only users that change are written (and counted as updated).
+        """
+        if insert_mode != InsertMode.UPDATE or not existing_user_ids:
+            return model_instances
+        fields = [UsersModel._meta.get_field(name) for name in UPSERT_UPDATE_FIELDS]
+        uploaded_ids = [instance.user_id for instance in model_instances if instance.user_id in existing_user_ids]
+        stored_values = {}
+        for start in range(0, len(uploaded_ids), MAX_EXISTING_ID_BATCH_SIZE):
+            for user_id, *values in UsersModel.objects.filter(user_id__in=uploaded_ids[start:start + MAX_EXISTING_ID_BATCH_SIZE]).values_list('user_id', *UPSERT_UPDATE_FIELDS):
+                stored_values[user_id] = tuple(values)
+        return [
+            instance for instance in model_instances
+            if stored_values.get(instance.user_id) != tuple(field.to_python(getattr(instance, field.attname)) for field in fields)
+        ]
+
+    @staticmethod
+    def count_updated_users(model_instances: List[UsersModel], existing_user_ids: Set[str], insert_mode: InsertMode) -> int:
+        """Return how many of the written users overwrote an existing user (see drop_unchanged_users)."""
+        if insert_mode != InsertMode.UPDATE:
+            return 0
+        return sum(1 for instance in model_instances if instance.user_id in existing_user_ids)
 
     @staticmethod
-    def save_bulk_data(data_frame: DataFrame | None) -> BulkUploadResult:
-        """Process a DataFrame to bulk upload new users, handling cleaning, deduplication, validation, and saving."""
+    def save_bulk_data(data_frame: DataFrame | None, insert_mode: InsertMode | str | None = None,
+                       commit_policy: CommitPolicy | str | None = None) -> BulkUploadResult:
+        """
+        Process a DataFrame to bulk upload new users, handling cleaning, deduplication, validation, and saving.
+
+        When rows fail validation, commit_policy decides whether the valid rows are still saved; the failed rows
+        are written to an error report either way.
+        """
+        insert_mode = BulkUploadService.get_insert_mode(insert_mode)
+        commit_policy = BulkUploadService.get_commit_policy(commit_policy)
         if data_frame is None:
-            all_users = [Users.model_validate(user) for user in UsersModel.objects.all()]
-            return BulkUploadService.get_empty_result_payload(all_users, input_empty_after_clean=False)
+            return BulkUploadService.get_empty_result_payload(LazyUsers(), input_empty_after_clean=False)
+
+        rows_read_count = len(data_frame)
 
         # Clean the input data
         cleaned_df = BulkUploadService.clean_dataframe(data_frame)
         if cleaned_df.empty:
-            all_users = [Users.model_validate(user) for user in UsersModel.objects.all()]
-            return BulkUploadService.get_empty_result_payload(all_users, input_empty_after_clean=True)
+            return BulkUploadService.get_empty_result_payload(LazyUsers(), input_empty_after_clean=True, rows_read_count=rows_read_count)
 
         # Deduplicate within the file
-        dedup_df, duplicates_removed = BulkUploadService.deduplicate_dataframe(cleaned_df)
-        if dedup_df.empty:
-            all_users = [Users.model_validate(user) for user in UsersModel.objects.all()]
-            return BulkUploadService.get_empty_result_payload(all_users, file_duplicates_count=duplicates_removed, input_empty_after_clean=True)
-
-        # Filter out existing users
-        existing_user_ids = BulkUploadService.get_existing_user_ids()
-        new_users_df = dedup_df[~dedup_df['user_id'].isin(existing_user_ids)]
+        detector = DuplicateDetector()
+        dedup_df, duplicates_removed = BulkUploadService.deduplicate_dataframe(cleaned_df, detector)
+        duplicate_groups = detector.get_groups()
+
+        # Filter out existing users, unless they are to be updated
+        existing_user_ids = BulkUploadService.get_existing_user_ids(dedup_df['user_id'])
+        new_users_df = BulkUploadService.select_rows_to_write(dedup_df, existing_user_ids, insert_mode)
         attempted_new_rows_count = len(new_users_df)
         all_users_in_file_existed = len(dedup_df) > 0 and attempted_new_rows_count == 0
 
         if attempted_new_rows_count == 0:
-            all_users = [Users.model_validate(user) for user in UsersModel.objects.all()]
             return {
                 "successful_users": [],
                 "failed_rows": [],
                 "newly_created_count": 0,
-                "total_users_after_upload": all_users,
+                "total_users_after_upload": LazyUsers(),
                 "attempted_new_rows_count": 0,
                 "all_users_in_file_existed": all_users_in_file_existed,
                 "input_data_was_empty_after_cleaning": False,
-                "file_internal_duplicates_removed_count": duplicates_removed
+                "file_internal_duplicates_removed_count": duplicates_removed,
+                "rows_read_count": rows_read_count,
+                "updated_count": 0,
+                "rejected_by_commit_policy": False,
+                "failed_count": 0,
+                "error_summary": None,
+                "rejects_file_id": None,
+                "duplicate_groups": duplicate_groups
             }
 
         # Validate new users
         validated_users, model_instances, failed_rows = BulkUploadService.validate_new_users(new_users_df)
+        error_report = ErrorReport()
         if failed_rows:
+            error_report.add(BulkUploadService.build_rejects_frame(new_users_df, failed_rows), failed_rows)
+        rejects_file_id = error_report.save()
+        error_summary = error_report.get_summary() if failed_rows else None
+        if not BulkUploadService.allows_commit(commit_policy, len(failed_rows), attempted_new_rows_count):
             return {
                 "successful_users": [],
                 "failed_rows": failed_rows,
                 "newly_created_count": 0,
-                "total_users_after_upload": [],
+                "total_users_after_upload": LazyUsers(),
                 "attempted_new_rows_count": attempted_new_rows_count,
                 "all_users_in_file_existed": False,
                 "input_data_was_empty_after_cleaning": False,
-                "file_internal_duplicates_removed_count": duplicates_removed
+                "file_internal_duplicates_removed_count": duplicates_removed,
+                "rows_read_count": rows_read_count,
+                "updated_count": 0,
+                "rejected_by_commit_policy": True,
+                "failed_count": len(failed_rows),
+                "error_summary": error_summary,
+                "rejects_file_id": rejects_file_id,
+                "duplicate_groups": duplicate_groups
             }
 
-        # Save new users
-        newly_created_count = BulkUploadService.save_new_users(model_instances)
-        all_users_after_upload = [Users.model_validate(user) for user in UsersModel.objects.all()]
+        # Save new users, and in UPDATE mode the existing users that changed
+        model_instances = BulkUploadService.drop_unchanged_users(model_instances, existing_user_ids, insert_mode)
+        written_count = BulkUploadService.save_new_users(model_instances, insert_mode)
+        updated_count = BulkUploadService.count_updated_users(model_instances, existing_user_ids, insert_mode)
+        newly_created_count = written_count - updated_count
 
         return {
-            "successful_users": validated_users if newly_created_count > 0 else [],
-            "failed_rows": [],
+            "successful_users": validated_users if written_count > 0 else [],
+            "failed_rows": failed_rows,
             "newly_created_count": newly_created_count,
-            "total_users_after_upload": all_users_after_upload,
+            "total_users_after_upload": LazyUsers(),
             "attempted_new_rows_count": attempted_new_rows_count,
             "all_users_in_file_existed": False,
             "input_data_was_empty_after_cleaning": False,
-            "file_internal_duplicates_removed_count": duplicates_removed
+            "file_internal_duplicates_removed_count": duplicates_removed,
+            "rows_read_count": rows_read_count,
+            "updated_count": updated_count,
+            "rejected_by_commit_policy": False,
+            "failed_count": len(failed_rows),
+            "error_summary": error_summary,
+            "rejects_file_id": rejects_file_id,
+            "duplicate_groups": duplicate_groups
         }
 
     @staticmethod
-    def get_paginated_users(page_number: int, per_page: int) -> Dict:
-        """Fetch and paginate users from the database."""
-        user_queryset = UsersModel.objects.all().order_by('user_id')
-        paginator = Paginator(user_queryset, per_page)
+    def save_bulk_data_in_chunks(chunks: Iterable[DataFrame], insert_mode: InsertMode | str | None = None,
+                                 progress_callback: Callable[[UploadProgress], None] | None = None,
+                                 commit_policy: CommitPolicy | str | None = None, row_count: int | None = None) -> BulkUploadResult:
+        """
+        Run each DataFrame chunk through clean -> dedupe -> existing-id filter -> validate -> insert.
+
+        Only one chunk is held in memory at a time, plus the hashes of the user IDs and emails seen so far for
+        cross-chunk deduplication (see DuplicateDetector). The whole upload runs in one transaction, so
+        commit_policy is applied to the upload as a whole: under ALL_OR_NOTHING nothing more is inserted once a
+        row fails (the remaining chunks are still validated to report every failure), under MAX_FAILURE_RATE the
+        valid rows are inserted as they come; in both cases the inserts are rolled back at the end if the policy
+        rejects the upload. Neither validated users nor failed rows are retained, so successful_users and
+        failed_rows are always empty in this mode: failures go to the error report as each chunk is validated.
+        progress_callback, if given, is called with the running counters after every chunk.
+
+        The existing-id lookup (see get_existing_id_strategy) is chosen once for the whole upload, from row_count
+        (the rows in the file, e.g. from count_upload_rows) or, if that is not known, from the first chunk.
+
+        Once the rows read so far reach the parallel validation threshold (see get_validation_workers), one
+        pool of worker processes is started for the rest of the upload. Each chunk is then validated in the
+        pool while the next chunks are read, cleaned and deduplicated, with up to one chunk per worker in
+        flight; chunks are still inserted in file order.
+        """
+        insert_mode = BulkUploadService.get_insert_mode(insert_mode)
+        commit_policy = BulkUploadService.get_commit_policy(commit_policy)
+        rows_read_count = 0
+        duplicates_removed = 0
+        unique_rows_count = 0
+        attempted_new_rows_count = 0
+        newly_created_count = 0
+        updated_count = 0
+        error_report = ErrorReport()
+        detector = DuplicateDetector()
+        existing_id_strategy: str | None = None
+        validation_pool: ProcessPoolExecutor | None = None
+        validation_workers = 1
+        # Chunks being validated in the pool, oldest first: (rows to write, their existing user IDs, shard result)
+        pending_chunks: Deque[Tuple[DataFrame, Set[str], Future]] = deque()
+
+        def write_chunk(new_users_df: DataFrame, existing_user_ids: Set[str], model_instances: List[UsersModel],
+                        chunk_failed_rows: List[ValidationFailure]) -> None:
+            nonlocal newly_created_count, updated_count
+            if chunk_failed_rows:
+                error_report.add(BulkUploadService.build_rejects_frame(new_users_df, chunk_failed_rows), chunk_failed_rows)
+            keep_inserting = not error_report.failed_count or commit_policy != CommitPolicy.ALL_OR_NOTHING
+            if keep_inserting:
+                model_instances = BulkUploadService.drop_unchanged_users(model_instances, existing_user_ids, insert_mode)
+            if keep_inserting and model_instances:
+                written_count = BulkUploadService.save_new_users(model_instances, insert_mode)
+                chunk_updated_count = BulkUploadService.count_updated_users(model_instances, existing_user_ids, insert_mode)
+                updated_count += chunk_updated_count
+                newly_created_count += written_count - chunk_updated_count
+
+        def write_oldest_pending_chunk() -> None:
+            new_users_df, existing_user_ids, future = pending_chunks.popleft()
+            with Instrumentation.stage('validate_new_users', rows_in=len(new_users_df)) as recorder:
+                validation = VectorizedUsersValidator.merge_shard_results(new_users_df, [future.result()])
+                _, model_instances, chunk_failed_rows = BulkUploadService.prepare_valid_users(validation)
+                recorder.rows_out = len(model_instances)
+            write_chunk(new_users_df, existing_user_ids, model_instances, chunk_failed_rows)
+
+        try:
+            with BulkWriteEngine.bulk_load(), transaction.atomic():
+                for chunk in Instrumentation.iterate('read', chunks):
+                    rows_read_count += len(chunk)
+                    cleaned_df = BulkUploadService.clean_dataframe(chunk)
+
+                    # Deduplicate within the chunk and against the chunks already processed
+                    dedup_df, chunk_duplicates = BulkUploadService.deduplicate_dataframe(cleaned_df, detector)
+                    duplicates_removed += chunk_duplicates
+                    unique_rows_count += len(dedup_df)
+
+                    if validation_pool is None:
+                        # The threshold applies to the upload as a whole, not to each chunk
+                        validation_workers = BulkUploadService.get_validation_workers(rows_read_count)
+                        if validation_workers > 1:
+                            validation_pool = VectorizedUsersValidator.create_pool(validation_workers)
+
+                    if not dedup_df.empty:
+                        if existing_id_strategy is None:
+                            existing_id_strategy = BulkUploadService.get_existing_id_strategy(row_count or len(dedup_df))
+                        existing_user_ids = BulkUploadService.get_existing_user_ids(dedup_df['user_id'], existing_id_strategy)
+                        new_users_df = BulkUploadService.select_rows_to_write(dedup_df, existing_user_ids, insert_mode)
+                        attempted_new_rows_count += len(new_users_df)
+                        if validation_pool is None or new_users_df.empty:
+                            _, model_instances, chunk_failed_rows = BulkUploadService.validate_new_users(new_users_df)
+                            write_chunk(new_users_df, existing_user_ids, model_instances, chunk_failed_rows)
+                        else:
+                            pending_chunks.append((new_users_df, existing_user_ids, VectorizedUsersValidator.submit(validation_pool, new_users_df)))
+                            while len(pending_chunks) >= validation_workers:
+                                write_oldest_pending_chunk()
+
+                    if progress_callback:
+                        progress_callback({
+                            "rows_read": rows_read_count,
+                            "rows_validated": attempted_new_rows_count,
+                            "rows_inserted": newly_created_count + updated_count,
+                            "rows_failed": error_report.failed_count
+                        })
+
+                while pending_chunks:
+                    write_oldest_pending_chunk()
+
+                rejected_by_commit_policy = not BulkUploadService.allows_commit(commit_policy, error_report.failed_count, attempted_new_rows_count)
+                if rejected_by_commit_policy:
+                    transaction.set_rollback(True)
+                    newly_created_count = 0
+                    updated_count = 0
+        finally:
+            if validation_pool is not None:
+                validation_pool.shutdown(cancel_futures=True)
+
+        if unique_rows_count == 0:
+            return BulkUploadService.get_empty_result_payload(LazyUsers(), file_duplicates_count=duplicates_removed, input_empty_after_clean=rows_read_count > 0,
+                                                              rows_read_count=rows_read_count, duplicate_groups=detector.get_groups())
+
+        return {
+            "successful_users": [],
+            "failed_rows": [],
+            "newly_created_count": newly_created_count,
+            "total_users_after_upload": LazyUsers(),
+            "attempted_new_rows_count": attempted_new_rows_count,
+            "all_users_in_file_existed": attempted_new_rows_count == 0,
+            "input_data_was_empty_after_cleaning": False,
+            "file_internal_duplicates_removed_count": duplicates_removed,
+            "rows_read_count": rows_read_count,
+            "updated_count": updated_count,
+            "rejected_by_commit_policy": rejected_by_commit_policy,
+            "failed_count": error_report.failed_count,
+            "error_summary": error_report.get_summary() if error_report.failed_count else None,
+            "rejects_file_id": error_report.save(),
+            "duplicate_groups": detector.get_groups()
+        }
+
+    @staticmethod
+    def get_pagination_mode() -> str:
+        """Return BULK_UPLOAD_PAGINATION: 'page' for numbered pages or 'keyset' for cursor pagination."""
+        pagination_mode = getattr(settings, 'BULK_UPLOAD_PAGINATION', DEFAULT_PAGINATION_MODE)
+        if pagination_mode not in ('page', 'keyset'):
+            raise ValueError(f"Invalid BULK_UPLOAD_PAGINATION '{pagination_mode}'. Use 'page' or 'keyset'.")
+        return pagination_mode
+
+    @staticmethod
+    def encode_cursor(user_id: str) -> str:
+        """Encode a user_id as an opaque, URL-safe page cursor."""
+        return base64.urlsafe_b64encode(user_id.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str | None) -> str | None:
+        """Decode a page cursor back to a user_id; malformed cursors decode to None (the first page)."""
+        if not cursor:
+            return None
+        try:
+            return base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    @staticmethod
+    def get_user_filters(params: Any) -> UserFilters:
+        """Read the user list filters from request parameters; blank and invalid values are left out."""
+        filters: UserFilters = {}
+        search = ' '.join(str(params.get('search') or '').split())[:MAX_SEARCH_LENGTH]
+        if search:
+            filters['search'] = search
+        if params.get('business_unit') in BusinessUnitChoices.values:
+            filters['business_unit'] = params.get('business_unit')
+        if params.get('department') in DepartmentChoices.values:
+            filters['department'] = params.get('department')
+        for key in ('joined_from', 'joined_to'):
+            try:
+                filters[key] = date.fromisoformat(params.get(key) or '')
+            except ValueError:
+                pass
+        return filters
+
+    @staticmethod
+    def get_filter_params(filters: UserFilters | None) -> List[Tuple[str, str]]:
+        """Filters as (parameter, value) pairs, e.g. for hidden form inputs."""
+        return [(key, value.isoformat() if isinstance(value, date) else value) for key, value in sorted((filters or {}).items())]
+
+    @staticmethod
+    def get_filter_query(filters: UserFilters | None) -> str:
+        """Encode filters as a query string, for pagination links."""
+        return urlencode(BulkUploadService.get_filter_params(filters))
+
+    @staticmethod
+    def get_filter_key(filters: UserFilters | None) -> str:
+        """A short key naming a set of filters in cache keys; empty when nothing is filtered."""
+        if not filters:
+            return ''
+        return hashlib.md5(BulkUploadService.get_filter_query(filters).encode()).hexdigest()
+
+    @staticmethod
+    def filter_users(filters: UserFilters | None = None) -> QuerySet:
+        """
+        Return the users matching the filters (unordered).
+
+        Business unit and department use the composite (business_unit, department, user_id) index, the joining
+        date range the date_of_joining index and the search the name/email search index (see search_users).
+        """
+        user_queryset = UsersModel.objects.all()
+        if not filters:
+            return user_queryset
+        if 'business_unit' in filters:
+            user_queryset = user_queryset.filter(business_unit=filters['business_unit'])
+        if 'department' in filters:
+            user_queryset = user_queryset.filter(department=filters['department'])
+        if 'joined_from' in filters:
+            user_queryset = user_queryset.filter(date_of_joining__gte=filters['joined_from'])
+        if 'joined_to' in filters:
+            user_queryset = user_queryset.filter(date_of_joining__lte=filters['joined_to'])
+        if filters.get('search'):
+            user_queryset = BulkUploadService.search_users(user_queryset, filters['search'])
+        return user_queryset
+
+    @staticmethod
+    def search_users(user_queryset: QuerySet, search: str) -> QuerySet:
+        """
+        Keep the users whose name or email has, for every word of the search, a word starting with it.
+
+        SQLite answers from the FTS5 table and PostgreSQL from the pg_trgm indexes that migration 0006 creates;
+        other databases fall back to matching the start of the whole name or email, without an index.
+        """
+        words = [word for word in search.split() if any(character.isalnum() for character in word)]
+        if not words:
+            return user_queryset
+        if connection.vendor == 'sqlite':
+            # Each word is quoted so FTS5 syntax in it is searched for literally, and made a prefix query
+            match = ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+            return user_queryset.filter(id__in=RawSQL(
+                f'SELECT rowid FROM {USER_SEARCH_TABLE} WHERE {USER_SEARCH_TABLE} MATCH %s', [match]))
+        for word in words:
+            if connection.vendor == 'postgresql':
+                pattern = r'\m' + re.escape(word)
+                user_queryset = user_queryset.filter(Q(user_name__iregex=pattern) | Q(email__iregex=pattern))
+            else:
+                user_queryset = user_queryset.filter(Q(user_name__istartswith=word) | Q(email__istartswith=word))
+        return user_queryset
+
+    @staticmethod
+    def get_user_count(filters: UserFilters | None = None) -> int:
+        """Return the number of users matching the filters, cached until the next upload."""
+        return UserListCache.get_or_set('count', BulkUploadService.get_filter_key(filters),
+                                        default=BulkUploadService.filter_users(filters).count)
+
+    @staticmethod
+    async def aget_user_count(filters: UserFilters | None = None) -> int:
+        return await UserListCache.aget_or_set('count', BulkUploadService.get_filter_key(filters),
+                                               default=BulkUploadService.filter_users(filters).acount)
+
+    @staticmethod
+    def _with_cache_metadata(users_data: Dict, version: int, fragment_key: str) -> Dict:
+        """Add what the template's fragment cache needs to a page of users."""
+        return {**users_data, 'cache_version': version, 'fragment_key': fragment_key, 'cache_timeout': UserListCache.get_timeout()}
+
+    @staticmethod
+    def get_keyset_users(per_page: int, after: str | None = None, before: str | None = None,
+                         filters: UserFilters | None = None) -> Dict:
+        """
+        Fetch one page of users ordered by user_id, starting after (or ending before) a cursor.
+
+        Each page is a single index seek on user_id that reads per_page + 1 rows, however deep the page is;
+        the extra row tells whether there is a page beyond it. Pages are cached until the next upload.
+        """
+        version = UserListCache.get_version()
+        fragment_key = f'keyset:{after or ""}:{before or ""}:{per_page}:{BulkUploadService.get_filter_key(filters)}'
+        return UserListCache.get_or_set(
+            'page', fragment_key, default=lambda: BulkUploadService._with_cache_metadata(
+                BulkUploadService._load_keyset_users(per_page, after, before, filters), version, fragment_key))
+
+    @staticmethod
+    async def aget_keyset_users(per_page: int, after: str | None = None, before: str | None = None,
+                                filters: UserFilters | None = None) -> Dict:
+        """get_keyset_users for async views, reading through the async ORM."""
+        version = await UserListCache.aget_version()
+        fragment_key = f'keyset:{after or ""}:{before or ""}:{per_page}:{BulkUploadService.get_filter_key(filters)}'
+
+        async def load_page() -> Dict:
+            return BulkUploadService._with_cache_metadata(
+                await BulkUploadService._aload_keyset_users(per_page, after, before, filters), version, fragment_key)
+        return await UserListCache.aget_or_set('page', fragment_key, default=load_page)
+
+    @staticmethod
+    def _load_keyset_users(per_page: int, after: str | None, before: str | None, filters: UserFilters | None = None) -> Dict:
+        after_user_id = BulkUploadService.decode_cursor(after)
+        before_user_id = BulkUploadService.decode_cursor(before)
+        rows = list(BulkUploadService._keyset_queryset(per_page, after_user_id, before_user_id, filters))
+        users_data = BulkUploadService._keyset_payload(rows, per_page, after_user_id, before_user_id)
+        if users_data is None:
+            return BulkUploadService._load_keyset_users(per_page, None, None, filters)
+        return {**users_data, 'total_users': BulkUploadService.get_user_count(filters)}
+
+    @staticmethod
+    async def _aload_keyset_users(per_page: int, after: str | None, before: str | None, filters: UserFilters | None = None) -> Dict:
+        after_user_id = BulkUploadService.decode_cursor(after)
+        before_user_id = BulkUploadService.decode_cursor(before)
+        rows = [user async for user in BulkUploadService._keyset_queryset(per_page, after_user_id, before_user_id, filters).aiterator()]
+        users_data = BulkUploadService._keyset_payload(rows, per_page, after_user_id, before_user_id)
+        if users_data is None:
+            return await BulkUploadService._aload_keyset_users(per_page, None, None, filters)
+        return {**users_data, 'total_users': await BulkUploadService.aget_user_count(filters)}
+
+    @staticmethod
+    def _keyset_queryset(per_page: int, after_user_id: str | None, before_user_id: str | None,
+                         filters: UserFilters | None = None) -> QuerySet:
+        """The per_page + 1 matching rows after after_user_id, or before before_user_id (in descending order)."""
+        user_queryset = BulkUploadService.filter_users(filters)
+        if before_user_id is not None:
+            return user_queryset.filter(user_id__lt=before_user_id).order_by('-user_id')[:per_page + 1]
+        if after_user_id is not None:
+            user_queryset = user_queryset.filter(user_id__gt=after_user_id)
+        return user_queryset.order_by('user_id')[:per_page + 1]
+
+    @staticmethod
+    def _keyset_payload(rows: List[UsersModel], per_page: int, after_user_id: str | None, before_user_id: str | None) -> Dict | None:
+        """Build a keyset page (without its total) from the rows of _keyset_queryset; None if the cursor is out of range."""
+        has_more = len(rows) > per_page
+        if before_user_id is not None:
+            rows = rows[:per_page][::-1]
+            has_previous, has_next = has_more, True
+        else:
+            rows = rows[:per_page]
+            has_previous, has_next = after_user_id is not None, has_more
+
+        if not rows and (after_user_id is not None or before_user_id is not None):
+            # The cursor points past the end (or before the start) of the table
+            return None
+
+        return {
+            'pagination': 'keyset',
+            'users': [Users.model_validate(user) for user in rows],
+            'per_page': per_page,
+            'has_previous': has_previous and bool(rows),
+            'previous_cursor': BulkUploadService.encode_cursor(rows[0].user_id) if rows else '',
+            'has_next': has_next and bool(rows),
+            'next_cursor': BulkUploadService.encode_cursor(rows[-1].user_id) if rows else '',
+        }
+
+    @staticmethod
+    def get_paginated_users(page_number: int, per_page: int, filters: UserFilters | None = None) -> Dict:
+        """Fetch and paginate users from the database; pages are cached until the next upload."""
+        version = UserListCache.get_version()
+        fragment_key = f'page:{page_number}:{per_page}:{BulkUploadService.get_filter_key(filters)}'
+        return UserListCache.get_or_set(
+            'page', fragment_key, default=lambda: BulkUploadService._with_cache_metadata(
+                BulkUploadService._load_paginated_users(page_number, per_page, filters), version, fragment_key))
+
+    @staticmethod
+    async def aget_paginated_users(page_number: int, per_page: int, filters: UserFilters | None = None) -> Dict:
+        """get_paginated_users for async views, reading through the async ORM."""
+        version = await UserListCache.aget_version()
+        fragment_key = f'page:{page_number}:{per_page}:{BulkUploadService.get_filter_key(filters)}'
+
+        async def load_page() -> Dict:
+            paginator, users_page_obj = BulkUploadService._get_users_page(
+                page_number, per_page, await BulkUploadService.aget_user_count(filters), filters)
+            rows = [user async for user in users_page_obj.object_list.aiterator()]
+            return BulkUploadService._with_cache_metadata(
+                BulkUploadService._page_payload(paginator, users_page_obj, rows), version, fragment_key)
+        return await UserListCache.aget_or_set('page', fragment_key, default=load_page)
+
+    @staticmethod
+    def _load_paginated_users(page_number: int, per_page: int, filters: UserFilters | None = None) -> Dict:
+        paginator, users_page_obj = BulkUploadService._get_users_page(
+            page_number, per_page, BulkUploadService.get_user_count(filters), filters)
+        return BulkUploadService._page_payload(paginator, users_page_obj, list(users_page_obj.object_list))
+
+    @staticmethod
+    def _get_users_page(page_number: int, per_page: int, user_count: int,
+                        filters: UserFilters | None = None) -> Tuple[CountedPaginator, Page]:
+        """Return the paginator and the requested (or nearest) page; the page's rows are not fetched yet."""
+        user_queryset = BulkUploadService.filter_users(filters).order_by('user_id')
+        paginator = CountedPaginator(user_queryset, per_page, user_count)
         try:
             users_page_obj = paginator.page(page_number)
         except PageNotAnInteger:
             users_page_obj = paginator.page(1)
         except EmptyPage:
             users_page_obj = paginator.page(paginator.num_pages)
+        return paginator, users_page_obj
 
-        pydantic_users_list = [Users.model_validate(user) for user in users_page_obj.object_list]
+    @staticmethod
+    def get_page_window(paginator: Paginator, page_number: int) -> List[int | None]:
+        """
+        Return the page links to show: the first and last pages and BULK_UPLOAD_PAGE_LINKS_ON_EACH_SIDE pages
+        either side of the current one, with None wherever pages are skipped. Its length does not grow with the
+        table, unlike paginator.page_range.
+        """
+        on_each_side = getattr(settings, 'BULK_UPLOAD_PAGE_LINKS_ON_EACH_SIDE', DEFAULT_PAGE_LINKS_ON_EACH_SIDE)
+        return [page if page != Paginator.ELLIPSIS else None
+                for page in paginator.get_elided_page_range(page_number, on_each_side=on_each_side, on_ends=1)]
+
+    @staticmethod
+    def _page_payload(paginator: CountedPaginator, users_page_obj: Page, rows: List[UsersModel]) -> Dict:
+        pydantic_users_list = [Users.model_validate(user) for user in rows]
 
         return {
+            'pagination': 'page',
             'users': pydantic_users_list,
-            'page': users_page_obj,
-            'per_page': per_page,
+            'page_number': users_page_obj.number,
+            'page_range': BulkUploadService.get_page_window(paginator, users_page_obj.number),
+            'num_pages': paginator.num_pages,
+            'per_page': paginator.per_page,
             'total_users': paginator.count,
             'has_previous': users_page_obj.has_previous(),
             'previous_page_number': users_page_obj.previous_page_number() if users_page_obj.has_previous() else users_page_obj.number,
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from bulkupload import views
+from bulkupload.tests.utils import make_upload_df, to_xlsx
+
+
+@override_settings(BULK_UPLOAD_WORKER_THREADS=2)
+class AsyncUploadViewTests(TestCase):
+    async def test_list_requests_are_served_during_an_upload(self):
+        list_served = threading.Event()
+        upload_waits = []
+
+        def slow_upload(*args):
+            # Only returns early if the list request gets through while the upload holds its thread
+            upload_waits.append(list_served.wait(timeout=5))
+            return {}
+
+        async def get_list():
+            await asyncio.sleep(0.1)
+            response = await self.async_client.get('/list-picker/')
+            list_served.set()
+            return response
+
+        upload_file = SimpleUploadedFile('users.xlsx', to_xlsx(make_upload_df(3)).read())
+        with mock.patch.object(views, 'process_upload', side_effect=slow_upload):
+            upload_response, list_response = await asyncio.gather(self.async_client.post('/', {'myfile': upload_file}), get_list())
+        self.assertEqual(upload_waits, [True])
+        self.assertEqual((upload_response.status_code, list_response.status_code), (200, 200))
+
+    def test_worker_threads(self):
+        executor = views.get_upload_executor()
+        self.assertEqual(executor._max_workers, 2)
+        self.assertIs(views.get_upload_executor(), executor)
+        with override_settings(BULK_UPLOAD_WORKER_THREADS=0):
+            self.assertIsNone(views.get_upload_executor())
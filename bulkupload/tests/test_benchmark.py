@@ -0,0 +1,42 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from bulkupload.models import UsersModel
+
+PIPELINE_STAGES = ['read', 'clean_dataframe', 'deduplicate_dataframe', 'get_existing_user_ids', 'validate_new_users', 'save_new_users']
+
+
+class BenchmarkCommandTests(TestCase):
+    def run_benchmark(self, *args: str) -> str:
+        stdout, stderr = StringIO(), StringIO()
+        call_command('benchmark_upload', *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue()
+
+    def test_report(self):
+        results = json.loads(self.run_benchmark('--rows', '20', '40', '--format', 'xlsx', 'csv', '--invalid-email-rate', '0.5',
+                                                '--existing-rate', '0.5', '--seed', '3'))
+        self.assertEqual([(result['rows'], result['format']) for result in results], [(20, 'xlsx'), (40, 'xlsx'), (20, 'csv'), (40, 'csv')])
+        for result in results:
+            with self.subTest(rows=result['rows'], format=result['format']):
+                self.assertEqual(list(result['stages']), PIPELINE_STAGES)
+                self.assertEqual(result['stages']['read']['rows_out'], result['rows'])
+                self.assertAlmostEqual(result['total_seconds'], sum(stage['seconds'] for stage in result['stages'].values()), places=5)
+                self.assertGreater(result['failed_rows'], 0)
+                self.assertGreater(result['existing_user_ids'], 0)
+                self.assertGreater(result['file_size_bytes'], 0)
+                self.assertEqual((result['insert_mode'], result['seed'], result['database']), ('skip', 3, 'sqlite'))
+                self.assertEqual(result['mix']['invalid_email_rate'], 0.5)
+        # Everything the benchmark wrote was rolled back
+        self.assertFalse(UsersModel.objects.exists())
+
+    def test_output_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'benchmark.json')
+            self.assertIn('Wrote 1 benchmark result(s)', self.run_benchmark('--rows', '10', '--output', path))
+            with open(path) as report:
+                self.assertEqual(json.load(report)[0]['rows'], 10)
@@ -0,0 +1,76 @@
+import datetime
+import os
+import tempfile
+from unittest import mock
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+from bulkupload import bulk_write
+from bulkupload.bulk_write import BulkWriteEngine
+from bulkupload.models import UsersModel
+from bulkupload.schema import InsertMode
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import UploadTestCase, make_upload_df
+
+
+class BulkWriterTests(UploadTestCase):
+    def test_writers_agree(self):
+        df = make_upload_df(8).assign(**{'User Name': 'Changed'})
+        for writer in ['orm', 'executemany']:
+            with self.subTest(writer=writer), override_settings(BULK_UPLOAD_BULK_WRITER=writer, BULK_UPLOAD_INSERT_BATCH_SIZE=3):
+                UsersModel.objects.all().delete()
+                BulkUploadService.save_bulk_data(make_upload_df(5))
+                result = BulkUploadService.save_bulk_data(df.copy(), InsertMode.UPDATE)
+                self.assertEqual((result['newly_created_count'], result['updated_count']), (3, 5))
+                self.assertEqual(UsersModel.objects.filter(user_name='Changed').count(), 8)
+                self.assertEqual(UsersModel.objects.get(user_id='U00007').date_of_joining, datetime.date(2023, 1, 1))
+
+    @override_settings(BULK_UPLOAD_BULK_WRITER='fast')
+    def test_unknown_writer(self):
+        with self.assertRaisesMessage(ValueError, "Invalid BULK_UPLOAD_BULK_WRITER 'fast'"):
+            BulkUploadService.save_bulk_data(make_upload_df(2))
+
+
+class BulkLoadPragmaTests(SimpleTestCase):
+    # Only a separate file database is used
+    databases = {'default'}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # The test database is in memory, where WAL is not available
+        self.connection = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(directory.name, 'load.sqlite3'),
+                                           'OPTIONS': {'timeout': 0.1}})
+        self.addCleanup(self.connection.close)
+        patcher = mock.patch.object(bulk_write, 'connection', self.connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pragma(self, name: str):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_restored(self):
+        self.assertEqual((self.pragma('journal_mode'), self.pragma('synchronous')), ('delete', 2))
+        with BulkWriteEngine.bulk_load():
+            self.assertEqual((self.pragma('journal_mode'), self.pragma('synchronous')), ('wal', 1))
+        self.assertEqual((self.pragma('journal_mode'), self.pragma('synchronous')), ('delete', 2))
+
+    @override_settings(BULK_UPLOAD_SQLITE_PRAGMAS=False)
+    def test_pragmas_can_be_turned_off(self):
+        with BulkWriteEngine.bulk_load():
+            self.assertEqual((self.pragma('journal_mode'), self.pragma('synchronous')), ('delete', 2))
+
+    def test_journal_mode_stays_when_the_database_is_busy(self):
+        reader = DatabaseWrapper(self.connection.settings_dict)
+        self.addCleanup(reader.close)
+        with self.assertLogs('bulkupload.bulk_write', 'WARNING') as logs:
+            with BulkWriteEngine.bulk_load():
+                # Another connection is in the middle of reading
+                reader.cursor().execute('BEGIN')
+                reader.cursor().execute('SELECT * FROM sqlite_master').fetchall()
+        self.assertIn('Could not switch SQLite back to journal_mode=delete', logs.output[0])
+        self.assertEqual(self.pragma('synchronous'), 2)
@@ -0,0 +1,44 @@
+from unittest import mock
+
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from bulkupload.column_mapping import UPLOAD_COLUMN_MAPPING
+from bulkupload.models import UsersModel
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import UploadTestCase, make_upload_df, to_xlsx
+
+
+class ChunkedUploadTests(UploadTestCase):
+    def test_chunked_and_whole_file_uploads_agree(self):
+        df = make_upload_df(25, bad_emails={4, 17})
+        df = pd.concat([df, df.iloc[:3]], ignore_index=True)
+        whole = BulkUploadService.save_bulk_data(df.copy(), commit_policy='commit_valid')
+        whole_users = list(UsersModel.objects.order_by('user_id').values_list(*UPLOAD_COLUMN_MAPPING.values()))
+        whole_report = pd.read_excel(self.read_rejects(whole['rejects_file_id']))
+        UsersModel.objects.all().delete()
+
+        chunked = BulkUploadService.save_bulk_data_in_chunks(BulkUploadService.read_excel_in_chunks(to_xlsx(df), chunk_size=7),
+                                                             commit_policy='commit_valid')
+        for key in ['newly_created_count', 'failed_count', 'rows_read_count', 'file_internal_duplicates_removed_count']:
+            self.assertEqual(chunked[key], whole[key], key)
+        self.assertEqual((chunked['newly_created_count'], chunked['file_internal_duplicates_removed_count']), (23, 3))
+        self.assertEqual(list(UsersModel.objects.order_by('user_id').values_list(*UPLOAD_COLUMN_MAPPING.values())), whole_users)
+        chunked_report = pd.read_excel(self.read_rejects(chunked['rejects_file_id']))
+        self.assertEqual(chunked_report['Row'].tolist(), [6, 19])
+        self.assertTrue(chunked_report.equals(whole_report))
+
+    def test_rows_already_in_the_table(self):
+        BulkUploadService.save_bulk_data(make_upload_df(5))
+        result = BulkUploadService.save_bulk_data_in_chunks(BulkUploadService.read_excel_in_chunks(to_xlsx(make_upload_df(5)), chunk_size=2))
+        self.assertEqual(result['newly_created_count'], 0)
+        self.assertTrue(result['all_users_in_file_existed'])
+
+    @override_settings(BULK_UPLOAD_STREAMING_THRESHOLD=0, BULK_UPLOAD_CHUNK_SIZE=4)
+    def test_large_uploads_are_streamed(self):
+        with mock.patch.object(BulkUploadService, 'read_upload_in_chunks', wraps=BulkUploadService.read_upload_in_chunks) as read_chunks:
+            response = self.client.post('/', {'myfile': SimpleUploadedFile('users.xlsx', to_xlsx(make_upload_df(9)).read())})
+        read_chunks.assert_called_once()
+        self.assertContains(response, '9 user(s) uploaded')
+        self.assertEqual(UsersModel.objects.count(), 9)
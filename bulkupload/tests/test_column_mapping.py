@@ -0,0 +1,101 @@
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from openpyxl import Workbook
+
+from bulkupload.column_mapping import UPLOAD_COLUMN_MAPPING, ColumnMapping
+from bulkupload.models import UsersModel
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import UploadTestCase, make_upload_df
+
+MADURAI_PROFILES = {'madurai': {'user_id': ['Emp Code'], 'date_of_joining': ['DOJ']}}
+MADURAI_HEADERS = ['Emp Code', 'User Name', 'Email', 'Business Unit', 'Department', 'DOJ', 'Mobile Number']
+
+
+def to_titled_xlsx(headers, rows, titles=(('Staff list',), ())) -> io.BytesIO:
+    """An .xlsx sheet with title rows above the header row."""
+    workbook = Workbook()
+    for row in [*titles, headers, *rows]:
+        workbook.active.append(list(row))
+    excel_file = io.BytesIO()
+    workbook.save(excel_file)
+    excel_file.seek(0)
+    return excel_file
+
+
+@override_settings(BULK_UPLOAD_COLUMN_PROFILES=MADURAI_PROFILES)
+class ColumnMappingTests(SimpleTestCase):
+    def test_headers_match_ignoring_case_and_spaces(self):
+        headers = ['  user   ID', 'USER NAME', 'email', 'Business\tUnit', 'department', 'Date of joining', 'mobile number ']
+        self.assertEqual(ColumnMapping.resolve(headers), dict(enumerate(UPLOAD_COLUMN_MAPPING.values())))
+
+    def test_aliases(self):
+        positions = ColumnMapping.resolve(['Notes', *MADURAI_HEADERS], 'madurai')
+        self.assertEqual(positions[1], 'user_id')
+        self.assertEqual(positions[6], 'date_of_joining')
+        # Profiles also accept the default headers, and without a profile every one is tried
+        self.assertEqual(ColumnMapping.resolve(list(UPLOAD_COLUMN_MAPPING), 'madurai'), dict(enumerate(UPLOAD_COLUMN_MAPPING.values())))
+        self.assertEqual(ColumnMapping.resolve(MADURAI_HEADERS)[0], 'user_id')
+        with self.assertRaisesMessage(ValueError, 'Missing columns: User ID, Date of Joining'):
+            ColumnMapping.resolve(MADURAI_HEADERS, 'default')
+
+    def test_first_matching_column_wins(self):
+        positions = ColumnMapping.resolve([*UPLOAD_COLUMN_MAPPING, 'Email'])
+        self.assertEqual(positions[2], 'email')
+        self.assertNotIn(7, positions)
+
+    def test_header_row_below_titles(self):
+        rows = [['Staff list', None], [], ['Exported', '2024-01-01'], MADURAI_HEADERS, ['M1', 'Ann']]
+        row_position, positions = ColumnMapping.find_header_row(rows)
+        self.assertEqual(row_position, 3)
+        self.assertEqual(positions[5], 'date_of_joining')
+
+    @override_settings(BULK_UPLOAD_HEADER_SEARCH_ROWS=2)
+    def test_header_row_search_is_limited(self):
+        with self.assertRaisesMessage(ValueError, 'Missing columns: User ID, User Name'):
+            ColumnMapping.find_header_row([[], ['Title'], list(UPLOAD_COLUMN_MAPPING)])
+
+    def test_missing_columns_are_named(self):
+        with self.assertRaisesMessage(ValueError, 'Missing columns: Email, Mobile Number'):
+            ColumnMapping.resolve([header for header in UPLOAD_COLUMN_MAPPING if header not in ('Email', 'Mobile Number')])
+
+    def test_unknown_profile(self):
+        with self.assertRaisesMessage(ValueError, "Unknown column profile 'chennai'. Expected one of: default, madurai"):
+            ColumnMapping.resolve(list(UPLOAD_COLUMN_MAPPING), 'chennai')
+        with override_settings(BULK_UPLOAD_COLUMN_PROFILE='chennai'), self.assertRaisesMessage(ValueError, "Unknown column profile 'chennai'"):
+            ColumnMapping.resolve(list(UPLOAD_COLUMN_MAPPING))
+
+    @override_settings(BULK_UPLOAD_COLUMN_PROFILES={'madurai': {'emp_code': ['Emp Code']}})
+    def test_profiles_only_map_known_fields(self):
+        with self.assertRaisesMessage(ValueError, "Column profile 'madurai' maps unknown fields: emp_code"):
+            ColumnMapping.get_profiles()
+
+
+@override_settings(BULK_UPLOAD_COLUMN_PROFILES=MADURAI_PROFILES)
+class ColumnProfileUploadTests(UploadTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rows = make_upload_df(5).assign(**{'Date of Joining': '2023-01-01'}).values.tolist()
+
+    def test_excel_with_titles_and_aliases(self):
+        chunks = list(BulkUploadService.read_excel_in_chunks(to_titled_xlsx(MADURAI_HEADERS, self.rows), chunk_size=2, column_profile='madurai'))
+        # Row numbers still count the title rows
+        self.assertEqual([chunk.index.tolist() for chunk in chunks], [[2, 3], [4, 5], [6]])
+        self.assertEqual(list(chunks[0].columns), list(UPLOAD_COLUMN_MAPPING))
+
+    def test_csv_with_titles(self):
+        csv_file = io.BytesIO(('Staff list,\n\n' + ','.join(MADURAI_HEADERS) + '\n' + '\n'.join(','.join(row) for row in self.rows)).encode())
+        chunks = list(BulkUploadService.read_upload_in_chunks(csv_file, 'users.csv'))
+        self.assertEqual(chunks[0].index.tolist(), list(range(2, 7)))
+        self.assertEqual(chunks[0]['User ID'].tolist(), [row[0] for row in self.rows])
+
+    def test_profile_chosen_in_the_form(self):
+        upload = to_titled_xlsx(MADURAI_HEADERS, self.rows).read()
+        response = self.client.post('/', {'myfile': SimpleUploadedFile('users.xlsx', upload), 'column_profile': 'madurai'})
+        self.assertContains(response, '5 user(s) uploaded')
+        response = self.client.post('/', {'myfile': SimpleUploadedFile('users.xlsx', upload), 'column_profile': 'default'})
+        self.assertContains(response, 'Missing columns: User ID, Date of Joining')
+        response = self.client.post('/', {'myfile': SimpleUploadedFile('users.xlsx', upload), 'column_profile': 'chennai'})
+        self.assertContains(response, 'Unknown column profile')
+        self.assertEqual(UsersModel.objects.count(), 5)
@@ -0,0 +1,56 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from bulkupload.models import UsersModel
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import UploadTestCase, make_upload_df, to_xlsx
+
+
+class CommitPolicyTests(UploadTestCase):
+    def test_all_or_nothing_saves_nothing_when_a_row_fails(self):
+        result = BulkUploadService.save_bulk_data(make_upload_df(10, bad_emails={0, 1}), commit_policy='all_or_nothing')
+        self.assertEqual(result['newly_created_count'], 0)
+        self.assertTrue(result['rejected_by_commit_policy'])
+        self.assertEqual([failure['row_index'] for failure in result['failed_rows']], [2, 3])
+        self.assertEqual(UsersModel.objects.count(), 0)
+
+    def test_commit_valid_saves_the_valid_rows(self):
+        result = BulkUploadService.save_bulk_data(make_upload_df(10, bad_emails={0, 1}), commit_policy='commit_valid')
+        self.assertEqual(result['newly_created_count'], 8)
+        self.assertFalse(result['rejected_by_commit_policy'])
+        self.assertEqual(UsersModel.objects.count(), 8)
+        self.assertIsNotNone(result['rejects_file_id'])
+
+    def test_max_failure_rate(self):
+        df = make_upload_df(10, bad_emails={0})
+        with override_settings(BULK_UPLOAD_MAX_FAILURE_RATE=5):
+            result = BulkUploadService.save_bulk_data(df.copy(), commit_policy='max_failure_rate')
+        self.assertTrue(result['rejected_by_commit_policy'])
+        self.assertEqual(UsersModel.objects.count(), 0)
+        with override_settings(BULK_UPLOAD_MAX_FAILURE_RATE=10):
+            result = BulkUploadService.save_bulk_data(df.copy(), commit_policy='max_failure_rate')
+        self.assertFalse(result['rejected_by_commit_policy'])
+        self.assertEqual(UsersModel.objects.count(), 9)
+
+    def test_chunked_upload_applies_the_policy_to_the_whole_file(self):
+        df = make_upload_df(25, bad_emails={3, 20})
+        result = BulkUploadService.save_bulk_data_in_chunks(BulkUploadService.read_excel_in_chunks(to_xlsx(df), chunk_size=7))
+        self.assertEqual((result['newly_created_count'], result['failed_count']), (0, 2))
+        self.assertEqual(UsersModel.objects.count(), 0)
+        result = BulkUploadService.save_bulk_data_in_chunks(BulkUploadService.read_excel_in_chunks(to_xlsx(df), chunk_size=7),
+                                                            commit_policy='commit_valid')
+        self.assertEqual(result['newly_created_count'], 23)
+        self.assertEqual(UsersModel.objects.count(), 23)
+
+    def test_unknown_policy(self):
+        with self.assertRaisesMessage(ValueError, "Invalid commit policy 'some'"):
+            BulkUploadService.save_bulk_data(make_upload_df(1), commit_policy='some')
+
+    def test_policy_chosen_in_the_form(self):
+        upload = to_xlsx(make_upload_df(4, bad_emails={2})).read()
+        response = self.client.post('/', {'myfile': SimpleUploadedFile('users.xlsx', upload), 'commit_policy': 'all_or_nothing'})
+        self.assertContains(response, 'No users were saved because 1 row(s) failed validation.')
+        self.assertEqual(UsersModel.objects.count(), 0)
+        response = self.client.post('/', {'myfile': SimpleUploadedFile('users.xlsx', upload), 'commit_policy': 'commit_valid'})
+        self.assertContains(response, '1 row(s) failed validation and were not saved.')
+        self.assertEqual(UsersModel.objects.count(), 3)
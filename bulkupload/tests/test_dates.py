@@ -0,0 +1,43 @@
+import datetime
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from bulkupload.services import BulkUploadService
+
+
+class DateNormalizationTests(SimpleTestCase):
+    def assertDates(self, column: pd.Series, expected_dates, expected_invalid):
+        dates, invalid = BulkUploadService.normalize_dates(column)
+        self.assertEqual([str(value)[:10] for value in dates], expected_dates)
+        self.assertEqual(invalid.tolist(), expected_invalid)
+
+    def test_excel_serials(self):
+        column = pd.Series([45000, 45000.75, '45001', 1, 110000, 132320, 0, 132321, 2958465, -3], dtype=object)
+        self.assertDates(column, ['2023-03-15', '2023-03-15', '2023-03-16', '1899-12-31', '2201-03-02', '2262-04-11', 'NaT', 'NaT', 'NaT', 'NaT'],
+                         [False] * 6 + [True] * 4)
+
+    def test_text_and_datetime_values(self):
+        column = pd.Series([datetime.datetime(2023, 5, 6, 13, 30), datetime.date(2023, 5, 7), '2023-05-08', '09/05/2023',
+                            '10-05-2023', '11.05.2023', '2023-02-30', 'soon', '', None], dtype=object)
+        self.assertDates(column, ['2023-05-06', '2023-05-07', '2023-05-08', '2023-05-09', '2023-05-10', '2023-05-11',
+                                  'NaT', 'NaT', 'NaT', 'NaT'],
+                         [False] * 6 + [True, True, False, False])
+
+    def test_dates_keep_their_local_day(self):
+        column = pd.Series(['2024-03-01T00:00+05:30', '2024-03-02T23:30:00-08:00', '2024-03-03', '15/01/2023', 'soon'], dtype=object)
+        self.assertDates(column, ['2024-03-01', '2024-03-02', '2024-03-03', '2023-01-15', 'NaT'], [False, False, False, False, True])
+
+    def test_datetime_columns(self):
+        column = pd.Series(pd.to_datetime(['2024-03-01 23:30', '2024-03-02 00:15'])).dt.tz_localize('Asia/Kolkata')
+        self.assertDates(column, ['2024-03-01', '2024-03-02'], [False, False])
+
+    def test_cleaned_frame_keeps_invalid_dates_for_the_report(self):
+        df = pd.DataFrame({
+            'User ID': ['1', '2'], 'User Name': ['Ann', 'Bob'], 'Email': ['ann@x.com', 'bob@x.com'], 'Business Unit': ['Chennai', 'Chennai'],
+            'Department': ['Sales', 'Sales'], 'Date of Joining': [45000, 'soon'], 'Mobile Number': ['1234567', '1234567'],
+        })
+        cleaned = BulkUploadService.clean_dataframe(df)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(cleaned['date_of_joining']))
+        self.assertEqual(cleaned['date_of_joining'].iloc[0], pd.Timestamp('2023-03-15'))
+        self.assertEqual(cleaned.filter(like='date_of_joining').iloc[1].dropna().tolist(), ['soon'])
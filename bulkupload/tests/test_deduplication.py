@@ -0,0 +1,73 @@
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+
+from bulkupload.deduplication import DuplicateDetector
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import UploadTestCase, make_upload_df, to_xlsx
+
+
+def make_chunk(rows, start: int) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=['User ID', 'User Name', 'Email', 'Business Unit', 'Department', 'Date of Joining', 'Mobile Number'])
+    df.index = pd.RangeIndex(start, start + len(df))
+    return BulkUploadService.clean_dataframe(df)
+
+
+def make_row(user_id, name='Ann', email='ann@x.com'):
+    return [user_id, name, email, 'Chennai', 'Sales', '2020-01-01', '1234567']
+
+
+class DuplicateDetectorTests(SimpleTestCase):
+    def test_duplicate_groups_across_chunks(self):
+        detector = DuplicateDetector()
+        first = detector.process(make_chunk([make_row('1'), make_row('2', email='B@x.com'), make_row('1')], 0))
+        second = detector.process(make_chunk([make_row('2', name='Bob', email='B@x.com'), make_row('3', email='b@X.com'), make_row('4')], 3))
+        self.assertEqual(list(first['user_id']) + list(second['user_id']), ['1', '2', '3', '4'])
+        self.assertEqual(detector.duplicates_removed, 2)
+
+        groups = {(group['field'], group['value']): group for group in detector.get_groups()}
+        self.assertEqual(groups[('user_id', '1')], {'field': 'user_id', 'value': '1', 'row_indexes': [2, 4], 'conflicting': False})
+        self.assertEqual(groups[('user_id', '2')]['row_indexes'], [3, 5])
+        self.assertTrue(groups[('user_id', '2')]['conflicting'])
+        self.assertEqual(groups[('email', 'b@x.com')]['row_indexes'], [3, 6])
+        self.assertFalse(groups[('email', 'ann@x.com')]['conflicting'])
+        self.assertEqual([group['row_indexes'][0] for group in detector.get_groups()], sorted(group['row_indexes'][0] for group in detector.get_groups()))
+
+    def test_empty_emails_are_not_grouped(self):
+        detector = DuplicateDetector()
+        kept = detector.process(make_chunk([make_row('1', email=''), make_row('2', email='')], 0))
+        self.assertEqual(len(kept), 2)
+        self.assertEqual(detector.get_groups(), [])
+
+    def test_groups_are_capped(self):
+        detector = DuplicateDetector(max_groups=2)
+        kept = detector.process(make_chunk([make_row(str(i % 4), email=f'u{i}@x.com') for i in range(12)], 0))
+        self.assertEqual(len(kept), 4)
+        # Rows are still dropped once the report is full
+        self.assertEqual(detector.duplicates_removed, 8)
+        self.assertEqual([group['value'] for group in detector.get_groups()], ['0', '1'])
+        self.assertEqual(detector.get_groups()[0]['row_indexes'], [2, 6, 10])
+
+
+class DuplicateUploadTests(UploadTestCase):
+    def test_chunked_and_whole_file_uploads_report_the_same_groups(self):
+        df = make_upload_df(12)
+        df.loc[7, 'User ID'] = 'U00002'
+        df.loc[9, ['User ID', 'User Name']] = ['U00003', 'Other']
+        df.loc[11, 'Email'] = 'U1@EXAMPLE.com'
+        whole = BulkUploadService.save_bulk_data(df.copy(), commit_policy='commit_valid')
+        self.assertEqual(whole['file_internal_duplicates_removed_count'], 2)
+        self.assertEqual([(group['field'], group['value'], group['row_indexes'], group['conflicting']) for group in whole['duplicate_groups']],
+                         [('email', 'u1@example.com', [3, 13], True), ('user_id', 'U00002', [4, 9], True), ('user_id', 'U00003', [5, 11], True)])
+
+        chunked = BulkUploadService.save_bulk_data_in_chunks(BulkUploadService.read_excel_in_chunks(to_xlsx(df), chunk_size=4),
+                                                             commit_policy='commit_valid')
+        self.assertEqual(chunked['duplicate_groups'], whole['duplicate_groups'])
+
+    def test_upload_messages(self):
+        df = make_upload_df(4)
+        df.loc[3, ['User ID', 'User Name']] = ['U00000', 'Other']
+        df.loc[2, 'Email'] = 'u1@example.com'
+        response = self.client.post('/', {'myfile': SimpleUploadedFile('users.xlsx', to_xlsx(df).read()), 'commit_policy': 'commit_valid'})
+        self.assertContains(response, 'User ID &#x27;U00000&#x27; appears in rows 2, 5 with different data; only row 2 was used.')
+        self.assertContains(response, 'Email &#x27;u1@example.com&#x27; is used by rows 3, 4, which have different user IDs and different data.')
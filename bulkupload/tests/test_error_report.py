@@ -0,0 +1,88 @@
+import io
+import uuid
+from unittest import mock
+
+import pandas as pd
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from bulkupload.error_report import ERROR_PAGE_SIZE, ErrorReport
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import UploadTestCase, make_upload_df, to_xlsx
+
+
+class ErrorReportTests(UploadTestCase):
+    def upload_with_failures(self):
+        df = make_upload_df(30, bad_emails=set(range(25)))
+        df.loc[[3, 26, 27], 'Mobile Number'] = '12'
+        return BulkUploadService.save_bulk_data_in_chunks(BulkUploadService.read_excel_in_chunks(to_xlsx(df), chunk_size=8),
+                                                          commit_policy='commit_valid')
+
+    def test_summary_groups_errors_by_column_and_type(self):
+        result = self.upload_with_failures()
+        summary = result['error_summary']
+        self.assertEqual(summary['failed_count'], 27)
+        self.assertEqual([(group['column'], group['count'], group['sample_rows']) for group in summary['groups']],
+                         [('Email', 25, [2, 3, 4, 5, 6]), ('Mobile Number', 3, [5, 28, 29])])
+        self.assertEqual(summary['groups'][0]['error_type'], 'value_error')
+        self.assertIn('valid email address', summary['groups'][0]['message'])
+        self.assertEqual(ErrorReport.load_summary(result['rejects_file_id']), summary)
+
+    def test_upload_page_shows_the_summary(self):
+        df = make_upload_df(8, bad_emails={1, 2, 3, 4, 5, 6})
+        response = self.client.post('/', {'myfile': SimpleUploadedFile('users.xlsx', to_xlsx(df).read()), 'commit_policy': 'commit_valid'})
+        self.assertContains(response, '6 row(s) failed validation')
+        self.assertContains(response, '<td class="px-4 py-2">Email</td>', html=False)
+        self.assertContains(response, '3, 4, 5, 6, 7, ...')
+        # One message for the whole upload rather than one per row
+        self.assertNotContains(response, 'Row 3:')
+
+    def test_error_table_pages(self):
+        rejects_file_id = self.upload_with_failures()['rejects_file_id']
+        response = self.client.get(f'/rejects/{rejects_file_id}/errors/')
+        self.assertEqual(len(response.context['rows']), ERROR_PAGE_SIZE)
+        self.assertEqual(response.context['header'][0], 'Row')
+        self.assertEqual(response.context['header'][-1], 'Errors')
+        self.assertContains(response, 'Page 1 of 2 (27 rejected rows)')
+        for page_number, shown_page, first_row in [('2', 2, '22'), ('99', 2, '22'), ('x', 1, '2'), ('-1', 1, '2')]:
+            with self.subTest(page_number=page_number):
+                response = self.client.get(f'/rejects/{rejects_file_id}/errors/', {'page_number': page_number})
+                self.assertEqual(response.context['page_number'], shown_page)
+                self.assertEqual(response.context['rows'][0][0], first_row)
+        self.assertEqual(len(response.context['rows']), ERROR_PAGE_SIZE)
+
+    def test_unknown_report(self):
+        report_id = uuid.uuid4()
+        for url in [f'/rejects/{report_id}/errors/', f'/rejects/{report_id}/', f'/rejects/{report_id}/?format=csv']:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get('/rejects/not-a-uuid/errors/').status_code, 404)
+
+    def test_workbook_is_written_on_first_download(self):
+        rejects_file_id = self.upload_with_failures()['rejects_file_id']
+        workbook_name = ErrorReport.get_file_name(rejects_file_id, 'xlsx')
+        self.assertFalse(default_storage.exists(workbook_name))
+
+        response = self.client.get(f'/rejects/{rejects_file_id}/')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="rejected_rows.xlsx"')
+        workbook = pd.read_excel(io.BytesIO(b''.join(response.streaming_content)), dtype={'Mobile Number': str})
+        self.assertTrue(default_storage.exists(workbook_name))
+        self.assertEqual(list(workbook.columns), ['Row', 'User ID', 'User Name', 'Email', 'Business Unit', 'Department',
+                                                 'Date of Joining', 'Mobile Number', 'Errors'])
+        self.assertEqual(workbook['Row'].tolist(), list(range(2, 27)) + [28, 29])
+        self.assertEqual(workbook.loc[0, 'Email'], 'bad')
+        self.assertEqual(workbook.loc[26, 'Mobile Number'], '12')
+
+        # Later downloads reuse the workbook
+        with mock.patch('bulkupload.error_report.Workbook') as workbook_class:
+            response = self.client.get(f'/rejects/{rejects_file_id}/')
+            b''.join(response.streaming_content)
+        workbook_class.assert_not_called()
+
+    def test_csv_download(self):
+        rejects_file_id = self.upload_with_failures()['rejects_file_id']
+        response = self.client.get(f'/rejects/{rejects_file_id}/', {'format': 'csv'})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="rejected_rows.csv"')
+        rows = pd.read_csv(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(rows), 27)
+        self.assertTrue(rows['Errors'].str.startswith('email: ').head(25).all())
@@ -0,0 +1,68 @@
+import io
+from unittest import mock
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.test import override_settings
+
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import UploadTestCase, make_upload_df, make_users, to_xlsx
+
+
+class ExistingUserIdTests(UploadTestCase):
+    def setUp(self):
+        super().setUp()
+        make_users(30)
+
+    def test_every_strategy_finds_the_same_users(self):
+        user_ids = [f'U{i:05d}' for i in range(25, 40)] + ['X' * 20]
+        for strategy in ['full_scan', 'in_batches', 'temp_table', 'auto']:
+            with self.subTest(strategy=strategy), override_settings(BULK_UPLOAD_EXISTING_ID_STRATEGY=strategy,
+                                                                    BULK_UPLOAD_EXISTING_ID_BATCH_SIZE=4):
+                self.assertEqual(BulkUploadService.get_existing_user_ids(user_ids), {f'U{i:05d}' for i in range(25, 30)})
+                self.assertEqual(BulkUploadService.get_existing_user_ids([]), set())
+
+    def test_an_explicit_strategy_wins(self):
+        with mock.patch.object(BulkUploadService, '_existing_ids_temp_table', return_value=set()) as temp_table:
+            BulkUploadService.get_existing_user_ids(['U00001'], 'temp_table')
+        temp_table.assert_called_once_with({'U00001'})
+
+    @override_settings(BULK_UPLOAD_FULL_SCAN_MAX_ROWS=40, BULK_UPLOAD_TEMP_TABLE_MIN_IDS=100)
+    def test_auto_strategy(self):
+        cases = [(30, 30, 'full_scan'), (30, 10, 'in_batches'), (30, 100, 'full_scan'), (50, 60, 'in_batches'), (200, 100, 'temp_table')]
+        for table_size, file_id_count, strategy in cases:
+            with self.subTest(table_size=table_size, file_id_count=file_id_count), \
+                    mock.patch.object(BulkUploadService, 'estimate_user_count', return_value=table_size):
+                self.assertEqual(BulkUploadService.choose_existing_id_strategy(file_id_count), strategy)
+
+    @override_settings(BULK_UPLOAD_FULL_SCAN_MAX_ROWS=0, BULK_UPLOAD_TEMP_TABLE_MIN_IDS=12)
+    def test_chunked_uploads_choose_once_from_the_file_size(self):
+        chunks = BulkUploadService.read_excel_in_chunks(to_xlsx(make_upload_df(12, start=25)), chunk_size=5)
+        with mock.patch.object(BulkUploadService, 'estimate_user_count', wraps=BulkUploadService.estimate_user_count) as estimate, \
+                mock.patch.object(BulkUploadService, '_existing_ids_temp_table', wraps=BulkUploadService._existing_ids_temp_table) as temp_table:
+            result = BulkUploadService.save_bulk_data_in_chunks(chunks, row_count=12)
+        estimate.assert_called_once()
+        self.assertEqual(temp_table.call_count, 3)
+        self.assertEqual(result['newly_created_count'], 7)
+
+    def test_count_upload_rows(self):
+        df = make_upload_df(6)
+        table = pa.Table.from_pandas(df.astype({'Date of Joining': str}), preserve_index=False)
+        parquet_file, arrow_file, arrow_stream = io.BytesIO(), io.BytesIO(), io.BytesIO()
+        pq.write_table(table, parquet_file)
+        with pa.ipc.new_file(arrow_file, table.schema) as writer:
+            writer.write_table(table)
+        with pa.ipc.new_stream(arrow_stream, table.schema) as writer:
+            writer.write_table(table)
+        files = {
+            'users.xlsx': (to_xlsx(df), 7),
+            'users.csv': (io.BytesIO(df.to_csv(index=False).encode()), 7),
+            'users.parquet': (parquet_file, 6),
+            'users.arrow': (arrow_file, 6),
+            'users.feather': (arrow_stream, None),
+        }
+        for file_name, (uploaded_file, row_count) in files.items():
+            with self.subTest(file_name=file_name):
+                uploaded_file.seek(3)
+                self.assertEqual(BulkUploadService.count_upload_rows(uploaded_file, file_name), row_count)
+                self.assertEqual(uploaded_file.tell(), 0)
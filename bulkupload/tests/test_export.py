@@ -0,0 +1,94 @@
+import datetime
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from bulkupload.column_mapping import UPLOAD_COLUMN_MAPPING
+from bulkupload.export import UserExportService
+from bulkupload.models import UsersModel
+from bulkupload.tests.utils import UploadTestCase, make_users
+
+
+def read_export(export_format: str, content: bytes) -> pd.DataFrame:
+    if export_format == 'csv':
+        return pd.read_csv(io.BytesIO(content), dtype=str)
+    if export_format == 'xlsx':
+        return pd.read_excel(io.BytesIO(content), dtype={'Mobile Number': str})
+    return pd.read_parquet(io.BytesIO(content))
+
+
+def encode_parts(parts: list) -> bytes:
+    return b''.join(part.encode() if isinstance(part, str) else part for part in parts)
+
+
+@override_settings(BULK_UPLOAD_EXPORT_CHUNK_SIZE=3)
+class UserExportTests(UploadTestCase):
+    def setUp(self):
+        super().setUp()
+        make_users(5)
+        make_users(3, prefix='M', business_unit='Madurai', user_name='Mira Das', date_of_joining=datetime.date(2024, 2, 29))
+
+    def export(self, export_format: str, **params) -> pd.DataFrame:
+        response = self.client.get(f'/export/{export_format}/', params)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="users.{export_format}"')
+        return read_export(export_format, b''.join(response.streaming_content))
+
+    def test_every_format_reads_back(self):
+        expected = list(UsersModel.objects.order_by('user_id').values_list(*UPLOAD_COLUMN_MAPPING.values()))
+        for export_format in ['csv', 'xlsx', 'parquet']:
+            with self.subTest(export_format=export_format):
+                exported = self.export(export_format)
+                self.assertEqual(list(exported.columns), list(UPLOAD_COLUMN_MAPPING))
+                exported['Date of Joining'] = pd.to_datetime(exported['Date of Joining']).dt.date
+                self.assertEqual([tuple(row) for row in exported.itertuples(index=False)], expected)
+
+    def test_parquet_is_written_a_chunk_at_a_time(self):
+        response = self.client.get('/export/parquet/')
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+        parquet_file = pq.ParquetFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        self.assertEqual(str(parquet_file.schema_arrow.field('Date of Joining').type), 'date32[day]')
+
+    def test_filters_are_honored(self):
+        for export_format in ['csv', 'xlsx', 'parquet']:
+            with self.subTest(export_format=export_format):
+                self.assertEqual(self.export(export_format, business_unit='Madurai')['User ID'].tolist(), ['M00000', 'M00001', 'M00002'])
+                self.assertEqual(self.export(export_format, search='mira', joined_from='2024-03-01')['User ID'].tolist(), [])
+                self.assertEqual(len(self.export(export_format, business_unit='Nowhere')), 8)
+
+    def test_empty_export(self):
+        UsersModel.objects.all().delete()
+        for export_format in ['csv', 'xlsx', 'parquet']:
+            with self.subTest(export_format=export_format):
+                exported = self.export(export_format)
+                self.assertEqual((len(exported), list(exported.columns)), (0, list(UPLOAD_COLUMN_MAPPING)))
+
+    def test_exports_can_be_uploaded_again(self):
+        content = b''.join(self.client.get('/export/xlsx/').streaming_content)
+        UsersModel.objects.all().delete()
+        response = self.client.post('/', {'myfile': SimpleUploadedFile('users.xlsx', content)})
+        self.assertContains(response, '8 user(s) uploaded')
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get('/export/json/').status_code, 404)
+
+    async def test_async_export_matches_sync_export(self):
+        filters = {'business_unit': 'Madurai'}
+        for export_format in ['csv', 'xlsx', 'parquet']:
+            with self.subTest(export_format=export_format):
+                parts = [part async for part in UserExportService.aiter_export(export_format, filters)]
+                sync_parts = await sync_to_async(list)(UserExportService.iter_export(export_format, filters))
+                self.assertEqual(len(parts), len(sync_parts))
+                exported = read_export(export_format, encode_parts(parts))
+                self.assertEqual(exported['User ID'].tolist(), ['M00000', 'M00001', 'M00002'])
+                self.assertTrue(exported.equals(read_export(export_format, encode_parts(sync_parts))))
+
+    async def test_asgi_requests_stream_asynchronously(self):
+        response = await self.async_client.get('/export/csv/', {'department': 'Software'})
+        self.assertTrue(response.is_async)
+        content = b''.join([part async for part in response.streaming_content])
+        self.assertEqual(len(read_export('csv', content)), 8)
@@ -0,0 +1,79 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from bulkupload.models import UsersModel
+from bulkupload.schema import InsertMode
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import UploadTestCase, make_upload_df, to_xlsx
+
+
+class InsertModeTests(UploadTestCase):
+    def setUp(self):
+        super().setUp()
+        BulkUploadService.save_bulk_data(make_upload_df(5))
+        self.df = make_upload_df(8).assign(**{'User Name': 'Changed'})
+
+    def test_skip_leaves_existing_users_alone(self):
+        result = BulkUploadService.save_bulk_data(self.df, InsertMode.SKIP)
+        self.assertEqual((result['newly_created_count'], result['updated_count']), (3, 0))
+        self.assertEqual(UsersModel.objects.filter(user_name='Changed').count(), 3)
+
+    def test_update_overwrites_existing_users(self):
+        result = BulkUploadService.save_bulk_data(self.df, InsertMode.UPDATE)
+        self.assertEqual((result['newly_created_count'], result['updated_count']), (3, 5))
+        self.assertEqual(UsersModel.objects.filter(user_name='Changed').count(), 8)
+
+    def test_update_only_writes_users_that_changed(self):
+        df = make_upload_df(6)
+        df.loc[1, 'Email'] = 'new@example.com'
+        result = BulkUploadService.save_bulk_data(df, InsertMode.UPDATE)
+        self.assertEqual((result['newly_created_count'], result['updated_count']), (1, 1))
+        self.assertEqual(UsersModel.objects.get(user_id='U00001').email, 'new@example.com')
+
+        # Nothing left to change
+        result = BulkUploadService.save_bulk_data(df, InsertMode.UPDATE)
+        self.assertEqual((result['newly_created_count'], result['updated_count']), (0, 0))
+
+    def test_update_in_chunks(self):
+        self.df.loc[5:, 'User Name'] = [f'Name {i}' for i in range(5, 8)]
+        result = BulkUploadService.save_bulk_data_in_chunks([self.df.iloc[:4], self.df.iloc[4:]], InsertMode.UPDATE)
+        self.assertEqual((result['newly_created_count'], result['updated_count']), (3, 5))
+        self.assertEqual(UsersModel.objects.filter(user_name='Changed').count(), 5)
+        result = BulkUploadService.save_bulk_data_in_chunks(BulkUploadService.read_excel_in_chunks(to_xlsx(self.df), chunk_size=3),
+                                                            InsertMode.UPDATE)
+        self.assertEqual((result['newly_created_count'], result['updated_count']), (0, 0))
+
+    def test_fail_rejects_the_upload(self):
+        with self.assertRaises(ValueError):
+            BulkUploadService.save_bulk_data(self.df, InsertMode.FAIL)
+        self.assertEqual(UsersModel.objects.count(), 5)
+        self.assertFalse(UsersModel.objects.filter(user_name='Changed').exists())
+
+    def test_user_id_is_unique(self):
+        self.assertTrue(UsersModel._meta.get_field('user_id').unique)
+
+
+class UniqueUserIdMigrationTests(TransactionTestCase):
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('bulkupload', target)])
+        return executor.loader.project_state([('bulkupload', target)]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicate_user_ids_stop_the_migration(self):
+        old_apps = self.migrate('0001_initial')
+        OldUsersModel = old_apps.get_model('bulkupload', 'UsersModel')
+        for name in ['Ann', 'Ann again', 'Bob']:
+            OldUsersModel.objects.create(user_id='A1' if name.startswith('Ann') else 'B1', user_name=name, email='a@b.com',
+                                         business_unit='Chennai', department='Sales', date_of_joining='2023-01-01', mobile_number='1234567')
+        with self.assertRaisesMessage(ValueError, '1 user_id(s) belong to more than one user: A1 (2 rows)'):
+            self.migrate('0002_unique_user_id')
+        # Nothing was deleted
+        self.assertEqual(OldUsersModel.objects.count(), 3)
+        OldUsersModel.objects.filter(user_name='Ann again').delete()
+        self.migrate('0002_unique_user_id')
@@ -0,0 +1,39 @@
+from django.test import TestCase, override_settings
+
+from bulkupload.instrumentation import Instrumentation
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import make_upload_df
+
+
+class InstrumentationTests(TestCase):
+    def test_stages_are_recorded(self):
+        with Instrumentation.collect(trace_memory=True) as collector:
+            BulkUploadService.save_bulk_data(make_upload_df(12, bad_emails={0, 1}))
+        self.assertEqual([record['stage'] for record in collector.records],
+                         ['clean_dataframe', 'deduplicate_dataframe', 'get_existing_user_ids', 'validate_new_users'])
+        self.assertEqual(collector.by_stage('validate_new_users')[0]['rows_out'], 10)
+        # The table size estimate and the lookup
+        self.assertEqual(collector.by_stage('get_existing_user_ids')[0]['query_count'], 2)
+        self.assertGreater(collector.by_stage('clean_dataframe')[0]['peak_memory_bytes'], 0)
+
+    def test_chunk_reads_are_recorded(self):
+        df = make_upload_df(5)
+        with Instrumentation.collect() as collector:
+            chunks = list(Instrumentation.iterate('read', [df.iloc[:3], df.iloc[3:]]))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual([record['rows_out'] for record in collector.by_stage('read')], [3, 2])
+        self.assertIsNone(collector.records[0]['peak_memory_bytes'])
+
+    @override_settings(BULK_UPLOAD_INSTRUMENTATION_HOOKS=['bulkupload.instrumentation.PrometheusHook',
+                                                          'bulkupload.instrumentation.LoggingHook'])
+    def test_prometheus_metrics(self):
+        with self.assertLogs('bulkupload.instrumentation', 'INFO') as logs:
+            BulkUploadService.save_bulk_data(make_upload_df(3))
+        self.assertTrue(logs.output[0].startswith('INFO:bulkupload.instrumentation:clean_dataframe: '))
+        response = self.client.get('/metrics/')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertContains(response, 'bulkupload_stage_runs_total{stage="save_new_users"} 1\n')
+        self.assertContains(response, 'bulkupload_stage_rows_out_total{stage="validate_new_users"} 3\n')
+
+    def test_metrics_need_a_prometheus_hook(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
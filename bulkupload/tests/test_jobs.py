@@ -0,0 +1,75 @@
+import datetime
+import io
+import os
+import socket
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from bulkupload.jobs import UploadJobService
+from bulkupload.models import UploadJob, UploadJobStatus
+from bulkupload.tests.utils import UploadTestCase, make_upload_df, to_xlsx
+
+
+@override_settings(BULK_UPLOAD_BACKGROUND_JOBS=True, BULK_UPLOAD_JOB_EXECUTOR='inline')
+class UploadJobTests(UploadTestCase):
+    def make_job(self, worker: str, started_at: datetime.datetime | None) -> UploadJob:
+        job = UploadJob(original_name='users.xlsx', status=UploadJobStatus.running, worker=worker, started_at=started_at)
+        job.file.save('users.xlsx', ContentFile(to_xlsx(make_upload_df(3)).read()))
+        return job
+
+    def test_job_lifecycle(self):
+        response = self.client.post('/', {'myfile': SimpleUploadedFile('users.xlsx', to_xlsx(make_upload_df(9)).read())})
+        job = UploadJob.objects.get()
+        self.assertContains(response, str(job.pk))
+        self.assertEqual(job.status, UploadJobStatus.succeeded, job.error)
+        self.assertEqual((job.rows_read, job.rows_inserted), (9, 9))
+        self.assertEqual(job.result['newly_created_count'], 9)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(job.file.storage.exists(job.file.name))
+        self.assertContains(self.client.get(f'/jobs/{job.pk}/'), '9 user(s) uploaded')
+
+    def test_failed_result_save_still_finishes_the_job(self):
+        with mock.patch.object(UploadJobService, 'serialize_result', return_value={'unserializable': object()}):
+            job = UploadJobService.create_job(SimpleUploadedFile('users.xlsx', to_xlsx(make_upload_df(3)).read()))
+        job.refresh_from_db()
+        self.assertEqual(job.status, UploadJobStatus.failed)
+        self.assertIn('Could not save the job result', job.error)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(cache.get(UploadJobService.progress_cache_key(job.pk)))
+
+    def test_resume_only_requeues_orphaned_jobs(self):
+        now = timezone.now()
+        host = socket.gethostname()
+        running_here = self.make_job(f'{host}:{os.getppid()}', now)
+        dead_here = self.make_job(f'{host}:999999', now)
+        running_elsewhere = self.make_job('otherhost:1', now)
+        stale_elsewhere = self.make_job('otherhost:1', now - datetime.timedelta(days=1))
+        unclaimed = self.make_job('', None)
+
+        self.assertEqual(UploadJobService.resume_pending_jobs(), 3)
+        statuses = {job.pk: job.status for job in UploadJob.objects.all()}
+        self.assertEqual(statuses[running_here.pk], UploadJobStatus.running)
+        self.assertEqual(statuses[running_elsewhere.pk], UploadJobStatus.running)
+        for job in [dead_here, stale_elsewhere, unclaimed]:
+            self.assertEqual(statuses[job.pk], UploadJobStatus.succeeded)
+
+    def test_unreadable_worker_is_orphaned_once_stale(self):
+        now = timezone.now()
+        host = socket.gethostname()
+        fresh = self.make_job(f'{host}:not-a-pid', now)
+        stale = self.make_job(f'{host}:not-a-pid', now - datetime.timedelta(days=1))
+        self.assertFalse(UploadJobService.is_orphaned(fresh))
+        self.assertTrue(UploadJobService.is_orphaned(stale))
+
+    def test_run_upload_jobs_command(self):
+        self.make_job('', None)
+        output = io.StringIO()
+        call_command('run_upload_jobs', stdout=output)
+        self.assertIn('Ran 1 upload job(s)', output.getvalue())
+        self.assertEqual(UploadJob.objects.get().status, UploadJobStatus.succeeded)
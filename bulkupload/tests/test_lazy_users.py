@@ -0,0 +1,40 @@
+from django.test import TestCase
+
+from bulkupload.schema import LazyUsers, Users
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import UploadTestCase, make_upload_df, make_users
+
+
+class LazyUsersTests(TestCase):
+    def setUp(self):
+        make_users(7)
+
+    def test_nothing_is_queried_until_asked(self):
+        with self.assertNumQueries(0):
+            users = LazyUsers(chunk_size=3)
+        with self.assertNumQueries(1):
+            self.assertEqual(users.count(), 7)
+
+    def test_page(self):
+        users = LazyUsers()
+        with self.assertNumQueries(1):
+            page = users.page(2, 3)
+        self.assertTrue(all(isinstance(user, Users) for user in page))
+        self.assertEqual([user.user_id for user in page], ['U00003', 'U00004', 'U00005'])
+        self.assertEqual([user.user_id for user in users.page(3, 3)], ['U00006'])
+        self.assertEqual([user.user_id for user in users.page(0, 3)], ['U00000', 'U00001', 'U00002'])
+
+    def test_iteration_streams_every_user_in_order(self):
+        with self.assertNumQueries(1):
+            user_ids = [user.user_id for user in LazyUsers(chunk_size=3)]
+        self.assertEqual(user_ids, [f'U{i:05d}' for i in range(7)])
+
+
+class UploadResultTests(UploadTestCase):
+    def test_upload_does_not_load_the_table(self):
+        make_users(50, prefix='X')
+        result = BulkUploadService.save_bulk_data(make_upload_df(5))
+        total = result['total_users_after_upload']
+        self.assertIsInstance(total, LazyUsers)
+        with self.assertNumQueries(1):
+            self.assertEqual(total.count(), 55)
@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import make_users
+
+
+class PageWindowTests(SimpleTestCase):
+    def page_window(self, page_number: int, num_pages: int = 1000):
+        return BulkUploadService.get_page_window(Paginator(range(num_pages), 1), page_number)
+
+    def test_window(self):
+        self.assertEqual(self.page_window(500), [1, None, 498, 499, 500, 501, 502, None, 1000])
+        self.assertEqual(self.page_window(1), [1, 2, 3, None, 1000])
+        self.assertEqual(self.page_window(1000), [1, None, 998, 999, 1000])
+        self.assertEqual(self.page_window(4), [1, 2, 3, 4, 5, 6, None, 1000])
+        self.assertEqual(self.page_window(3, num_pages=6), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(self.page_window(1, num_pages=1), [1])
+
+    def test_window_size_does_not_grow_with_the_table(self):
+        for num_pages in [10, 1000, 10 ** 6]:
+            with self.subTest(num_pages=num_pages):
+                self.assertLessEqual(len(self.page_window(num_pages // 2, num_pages)), 9)
+
+    @override_settings(BULK_UPLOAD_PAGE_LINKS_ON_EACH_SIDE=1)
+    def test_links_on_each_side(self):
+        self.assertEqual(self.page_window(500), [1, None, 499, 500, 501, None, 1000])
+
+
+class PagerRenderingTests(TestCase):
+    def setUp(self):
+        # The first visit sets the CSRF cookie, which the page embeds; users are then added outside an upload
+        self.client.get('/')
+        cache.clear()
+
+    def test_page_window_is_elided(self):
+        make_users(5000)
+        page = BulkUploadService.get_paginated_users(500, 5)
+        self.assertEqual(page['num_pages'], 1000)
+        self.assertEqual(page['page_range'], [1, None, 498, 499, 500, 501, 502, None, 1000])
+
+        response = self.client.get('/', {'page_number': 500, 'per_page': 5}, headers={'HX-Request': 'true', 'HX-Target': 'user-table'})
+        self.assertContains(response, 'page_number=1000')
+        self.assertContains(response, '&hellip;')
+        self.assertNotContains(response, 'page_number=600')
+        self.assertContains(response, 'Go to page')
+        self.assertContains(response, 'max="1000"')
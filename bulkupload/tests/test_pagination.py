@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import make_users
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        # The first visit sets the CSRF cookie, which the page embeds; users are then added outside an upload
+        self.client.get('/')
+        cache.clear()
+        make_users(23)
+
+    def test_keyset_cursors(self):
+        first = BulkUploadService.get_keyset_users(10)
+        self.assertEqual(first['users'][0].user_id, 'U00000')
+        self.assertFalse(first['has_previous'])
+        self.assertTrue(first['has_next'])
+        self.assertEqual(first['total_users'], 23)
+        second = BulkUploadService.get_keyset_users(10, after=first['next_cursor'])
+        self.assertEqual(second['users'][0].user_id, 'U00010')
+        last = BulkUploadService.get_keyset_users(10, after=second['next_cursor'])
+        self.assertEqual(len(last['users']), 3)
+        self.assertFalse(last['has_next'])
+        back = BulkUploadService.get_keyset_users(10, before=last['previous_cursor'])
+        self.assertEqual([user.user_id for user in back['users']], [user.user_id for user in second['users']])
+        # A broken cursor starts from the beginning
+        self.assertEqual(BulkUploadService.get_keyset_users(10, after='!!!')['users'][0].user_id, 'U00000')
+
+    def test_keyset_cursors_keep_filters(self):
+        make_users(5, prefix='X', business_unit='Madurai')
+        filters = {'business_unit': 'Madurai'}
+        first = BulkUploadService.get_keyset_users(3, filters=filters)
+        self.assertEqual([user.user_id for user in first['users']], ['X00000', 'X00001', 'X00002'])
+        second = BulkUploadService.get_keyset_users(3, after=first['next_cursor'], filters=filters)
+        self.assertEqual([user.user_id for user in second['users']], ['X00003', 'X00004'])
+        self.assertFalse(second['has_next'])
+
+    @override_settings(BULK_UPLOAD_PAGINATION='keyset')
+    def test_keyset_view(self):
+        headers = {'HX-Request': 'true', 'HX-Target': 'user-table'}
+        first = BulkUploadService.get_keyset_users(10)
+        response = self.client.get('/', {'per_page': 10}, headers=headers)
+        self.assertContains(response, f'after={first["next_cursor"]}')
+        self.assertNotContains(response, 'page_number=')
+        response = self.client.get('/', {'per_page': 10, 'after': first['next_cursor']}, headers=headers)
+        self.assertContains(response, 'U00010')
+        self.assertNotContains(response, 'U00009')
+
+    @override_settings(BULK_UPLOAD_PAGINATION='pages')
+    def test_unknown_pagination_mode(self):
+        with self.assertRaisesMessage(ValueError, "Invalid BULK_UPLOAD_PAGINATION 'pages'"):
+            BulkUploadService.get_pagination_mode()
@@ -0,0 +1,33 @@
+import datetime
+from unittest import mock
+
+import pandas as pd
+from django.test import override_settings
+
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import UploadTestCase, make_upload_df, to_xlsx
+from bulkupload.validation import VectorizedUsersValidator
+
+
+class ParallelValidationTests(UploadTestCase):
+    def test_parallel_and_serial_validation_agree(self):
+        df = pd.DataFrame([{
+            'user_id': str(i), 'user_name': f'Name {i}', 'email': 'bad' if i % 4 == 0 else f'u{i}@example.com',
+            'business_unit': 'Chennai', 'department': 'Sales', 'date_of_joining': datetime.date(2023, 1, 1),
+            'mobile_number': '12' if i % 7 == 0 else '1234567',
+        } for i in range(30)], index=range(5, 35))
+        serial = VectorizedUsersValidator.validate(df)
+        parallel = VectorizedUsersValidator.validate_parallel(df, 3)
+        self.assertTrue(parallel['valid_mask'].equals(serial['valid_mask']))
+        self.assertEqual(parallel['failures'], serial['failures'])
+        self.assertTrue(parallel['valid_users'].equals(serial['valid_users']))
+
+    def test_one_validation_pool_per_upload(self):
+        df = make_upload_df(20, bad_emails={2, 13})
+        with override_settings(BULK_UPLOAD_PARALLEL_VALIDATION=True, BULK_UPLOAD_VALIDATION_WORKERS=2), \
+                mock.patch.object(VectorizedUsersValidator, 'create_pool', wraps=VectorizedUsersValidator.create_pool) as create_pool:
+            result = BulkUploadService.save_bulk_data_in_chunks(BulkUploadService.read_excel_in_chunks(to_xlsx(df), chunk_size=6),
+                                                                commit_policy='commit_valid')
+        create_pool.assert_called_once_with(2)
+        self.assertEqual((result['newly_created_count'], result['failed_count']), (18, 2))
+        self.assertEqual(pd.read_excel(self.read_rejects(result['rejects_file_id']))['Row'].tolist(), [4, 15])
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib import messages
+from django.contrib.messages.storage.session import SessionStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import make_upload_df, make_users
+
+TABLE_HEADERS = {'HX-Request': 'true', 'HX-Target': 'user-table'}
+
+
+class UserListRenderingTests(TestCase):
+    def setUp(self):
+        # The first visit sets the CSRF cookie, which the page embeds; users are then added outside an upload
+        self.client.get('/')
+        cache.clear()
+        make_users(25)
+
+    def queue_message(self, text: str):
+        """Leave a flash message in the session, as a view that redirects would."""
+        session = self.client.session
+        request = RequestFactory().get('/')
+        request.session = session
+        storage = SessionStorage(request)
+        storage.add(messages.SUCCESS, text)
+        storage.update(HttpResponse())
+        session.save()
+
+    def test_table_fragment(self):
+        response = self.client.get('/', {'page_number': 2, 'per_page': 10}, headers=TABLE_HEADERS)
+        self.assertNotContains(response, '<html')
+        self.assertContains(response, 'id="user-table"')
+        self.assertContains(response, 'U00010')
+        self.assertNotContains(response, 'U00009')
+
+    def test_conditional_get(self):
+        full = self.client.get('/', {'page_number': 2, 'per_page': 10})
+        self.assertEqual(full.status_code, 200)
+        self.assertIn('HX-Request', full['Vary'])
+        partial = self.client.get('/', {'page_number': 2, 'per_page': 10}, headers=TABLE_HEADERS)
+        self.assertNotEqual(partial['ETag'], full['ETag'])
+
+        response = self.client.get('/', {'page_number': 2, 'per_page': 10}, headers={'If-None-Match': full['ETag']})
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get('/', {'page_number': 2, 'per_page': 10}, headers={'If-Modified-Since': full['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+        # An upload changes the list
+        with self.captureOnCommitCallbacks(execute=True):
+            BulkUploadService.save_bulk_data(make_upload_df(1, start=100))
+        response = self.client.get('/', {'page_number': 2, 'per_page': 10}, headers={'If-None-Match': full['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], full['ETag'])
+
+    def test_pending_messages_are_always_shown(self):
+        etag = self.client.get('/')['ETag']
+        self.queue_message('Saved while you were away.')
+        response = self.client.get('/', headers={'If-None-Match': etag})
+        self.assertContains(response, 'Saved while you were away.')
+        self.assertNotIn('ETag', response)
+        # Shown once, after which the page is unchanged again
+        self.assertEqual(self.client.get('/', headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_validators_expire_with_the_page_cache(self):
+        now = (timezone.now().timestamp() // 60 + 2) * 60
+        with override_settings(BULK_UPLOAD_PAGE_CACHE_TIMEOUT=60):
+            with mock.patch('bulkupload.views.time.time', return_value=now):
+                etag = self.client.get('/')['ETag']
+            with mock.patch('bulkupload.views.time.time', return_value=now + 59):
+                self.assertEqual(self.client.get('/', headers={'If-None-Match': etag}).status_code, 304)
+            with mock.patch('bulkupload.views.time.time', return_value=now + 60):
+                self.assertEqual(self.client.get('/', headers={'If-None-Match': etag}).status_code, 200)
@@ -0,0 +1,84 @@
+import datetime
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from bulkupload.column_mapping import UPLOAD_COLUMN_MAPPING
+from bulkupload.models import UsersModel
+from bulkupload.services import BulkUploadService
+from bulkupload.tests.utils import UploadTestCase, make_upload_df
+
+
+def to_parquet(df: pd.DataFrame) -> io.BytesIO:
+    parquet_file = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), parquet_file, row_group_size=4)
+    parquet_file.seek(0)
+    return parquet_file
+
+
+def to_arrow(df: pd.DataFrame, stream: bool = False) -> io.BytesIO:
+    arrow_file = io.BytesIO()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with (pa.ipc.new_stream if stream else pa.ipc.new_file)(arrow_file, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=4):
+            writer.write_batch(batch)
+    arrow_file.seek(0)
+    return arrow_file
+
+
+class UploadReaderTests(UploadTestCase):
+    def setUp(self):
+        super().setUp()
+        # Extra and reordered columns are ignored
+        self.df = make_upload_df(11, bad_emails={7}).assign(Notes='ignored')[['Notes', *reversed(UPLOAD_COLUMN_MAPPING)]]
+
+    def assertRoundTrip(self, uploaded_file, file_name: str):
+        chunks = list(BulkUploadService.read_upload_in_chunks(uploaded_file, file_name, chunk_size=5))
+        self.assertTrue(len(chunks) > 1 and all(len(chunk) <= 5 for chunk in chunks))
+        self.assertEqual(pd.concat(chunks).index.tolist(), list(range(11)))
+        self.assertEqual(set(chunks[0].columns), set(UPLOAD_COLUMN_MAPPING))
+
+        result = BulkUploadService.save_bulk_data_in_chunks(iter(chunks), commit_policy='commit_valid')
+        self.assertEqual((result['newly_created_count'], result['failed_count']), (10, 1))
+        self.assertEqual(pd.read_excel(self.read_rejects(result['rejects_file_id']))['Row'].tolist(), [9])
+        user = UsersModel.objects.get(user_id='U00003')
+        self.assertEqual((user.user_name, user.email, user.date_of_joining, user.mobile_number),
+                         ('Name 3', 'u3@example.com', datetime.date(2023, 1, 1), '91 98765 43210'))
+
+    def test_csv(self):
+        self.assertRoundTrip(io.BytesIO(self.df.to_csv(index=False).encode('utf-8-sig')), 'users.csv')
+
+    def test_parquet(self):
+        self.assertRoundTrip(to_parquet(self.df), 'users.parquet')
+
+    def test_arrow_file(self):
+        self.assertRoundTrip(to_arrow(self.df), 'users.arrow')
+
+    def test_arrow_stream(self):
+        self.assertRoundTrip(to_arrow(self.df, stream=True), 'users.feather')
+
+    def test_missing_column(self):
+        df = self.df.drop(columns=['Email'])
+        files = {
+            'users.csv': io.BytesIO(df.to_csv(index=False).encode()),
+            'users.parquet': to_parquet(df),
+            'users.arrow': to_arrow(df),
+            'users.feather': to_arrow(df, stream=True),
+        }
+        for file_name, uploaded_file in files.items():
+            with self.subTest(file_name=file_name), self.assertRaisesMessage(ValueError, 'Missing columns: Email'):
+                list(BulkUploadService.read_upload_in_chunks(uploaded_file, file_name))
+
+    def test_unsupported_extension(self):
+        with self.assertRaisesMessage(ValueError, "Unsupported file type '.txt'"):
+            BulkUploadService.read_upload_in_chunks(io.BytesIO(b''), 'users.txt')
+
+    @override_settings(BULK_UPLOAD_CHUNK_SIZE=4)
+    def test_parquet_upload_view(self):
+        response = self.client.post('/', {'myfile': SimpleUploadedFile('users.parquet', to_parquet(make_upload_df(9)).read())})
+        self.assertContains(response, '9 user(s) uploaded')
+        self.assertEqual(UsersModel.objects.count(), 9)
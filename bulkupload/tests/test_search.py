@@ -0,0 +1,122 @@
+import datetime
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase
+
+from bulkupload.models import UsersModel
+from bulkupload.services import USER_SEARCH_TABLE, BulkUploadService
+from bulkupload.tests.utils import make_upload_df
+
+USERS = [
+    # user_id, user_name, email, business_unit, department, date_of_joining
+    ('1', 'Ann Lee', 'ann.lee@example.com', 'Chennai', 'Software', datetime.date(2021, 1, 10)),
+    ('2', 'Annie Kay', 'akay@corp.in', 'Madurai', 'Software', datetime.date(2022, 6, 1)),
+    ('3', 'Bob Anderson', 'bob@example.com', 'Chennai', 'Testing', datetime.date(2023, 3, 15)),
+    ('4', 'José Ortiz', 'jortiz@example.com', 'Madurai', 'Testing', datetime.date(2024, 9, 30)),
+    ('5', 'Or Near', 'near.quote@example.com', 'Chennai', 'Human Resource', datetime.date(2020, 5, 5)),
+]
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        UsersModel.objects.bulk_create([
+            UsersModel(user_id=user_id, user_name=name, email=email, business_unit=business_unit, department=department,
+                       date_of_joining=joined, mobile_number='1234567')
+            for user_id, name, email, business_unit, department, joined in USERS
+        ])
+
+    def user_ids(self, **filters):
+        return sorted(BulkUploadService.filter_users(filters).values_list('user_id', flat=True))
+
+    def search(self, search: str):
+        return self.user_ids(search=search)
+
+    def assertSearchIndexInSync(self):
+        # Raises if the FTS index differs from the users table
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {USER_SEARCH_TABLE}({USER_SEARCH_TABLE}) VALUES ('integrity-check')")
+
+    def test_field_filters(self):
+        self.assertEqual(self.user_ids(), ['1', '2', '3', '4', '5'])
+        self.assertEqual(self.user_ids(business_unit='Chennai'), ['1', '3', '5'])
+        self.assertEqual(self.user_ids(business_unit='Madurai', department='Testing'), ['4'])
+        self.assertEqual(self.user_ids(joined_from=datetime.date(2022, 6, 1)), ['2', '3', '4'])
+        self.assertEqual(self.user_ids(joined_from=datetime.date(2021, 1, 1), joined_to=datetime.date(2022, 6, 1)), ['1', '2'])
+        self.assertEqual(self.user_ids(department='Testing', search='bob'), ['3'])
+
+    def test_filters_from_request_parameters(self):
+        params = QueryDict('search=%20ann%20%20lee%20&business_unit=Nowhere&department=Software&joined_from=2021-01-01&joined_to=soon')
+        self.assertEqual(BulkUploadService.get_user_filters(params),
+                         {'search': 'ann lee', 'department': 'Software', 'joined_from': datetime.date(2021, 1, 1)})
+        self.assertEqual(BulkUploadService.get_user_filters(QueryDict('search=' + 'a' * 150))['search'], 'a' * 100)
+        self.assertEqual(BulkUploadService.get_user_filters(QueryDict('search=&business_unit=')), {})
+
+    def test_prefix_search(self):
+        self.assertEqual(self.search('ann'), ['1', '2'])
+        self.assertEqual(self.search('ANN'), ['1', '2'])
+        self.assertEqual(self.search('annie'), ['2'])
+        # Every word must match the start of a word of the name or email
+        self.assertEqual(self.search('ann lee'), ['1'])
+        self.assertEqual(self.search('ann example'), ['1'])
+        self.assertEqual(self.search('nderson'), [])
+        self.assertEqual(self.search('corp'), ['2'])
+        self.assertEqual(self.search('jose'), ['4'])
+
+    def test_fts_syntax_is_searched_literally(self):
+        for search, user_ids in [
+            ('ann OR bob', []),
+            ('or near', ['5']),
+            ('NEAR(ann bob)', []),
+            ('ann AND lee', []),
+            ('NOT bob', []),
+            ('-bob', ['3']),
+            ('bob*', ['3']),
+            ('^ann', ['1', '2']),
+            ('user_name:ann', []),
+            ('near"quote', ['5']),
+            ('"ann', ['1', '2']),
+            ('"', ['1', '2', '3', '4', '5']),
+            ('* - ()', ['1', '2', '3', '4', '5']),
+        ]:
+            with self.subTest(search=search):
+                self.assertEqual(self.search(search), user_ids)
+
+    def test_triggers_keep_the_index_in_sync(self):
+        UsersModel.objects.create(user_id='6', user_name='Zed Quill', email='zq@example.com', business_unit='Chennai',
+                                  department='Software', date_of_joining=datetime.date(2024, 1, 1), mobile_number='1234567')
+        self.assertEqual(self.search('zed'), ['6'])
+
+        UsersModel.objects.filter(user_id='6').update(user_name='Yara Quill')
+        self.assertEqual(self.search('zed'), [])
+        self.assertEqual(self.search('yara quill'), ['6'])
+        user = UsersModel.objects.get(user_id='1')
+        user.email = 'lee.ann@newmail.org'
+        user.save()
+        self.assertEqual(self.search('newmail'), ['1'])
+        # Updates of other columns leave the index alone
+        UsersModel.objects.filter(user_id='2').update(department='Testing')
+        self.assertEqual(self.search('annie'), ['2'])
+
+        UsersModel.objects.filter(user_id__in=['3', '6']).delete()
+        self.assertEqual(self.search('bob'), [])
+        self.assertEqual(self.search('quill'), [])
+        self.assertSearchIndexInSync()
+
+    def test_uploads_are_searchable(self):
+        BulkUploadService.save_bulk_data(make_upload_df(3).assign(**{'User Name': ['Xavi One', 'Xavi Two', 'Yan Three']}))
+        self.assertEqual(self.search('xavi'), ['U00000', 'U00001'])
+        df = make_upload_df(2).assign(**{'User Name': ['Quinn One', 'Xavi Two']})
+        BulkUploadService.save_bulk_data(df, 'update')
+        self.assertEqual(self.search('xavi'), ['U00001'])
+        self.assertEqual(self.search('quinn'), ['U00000'])
+        self.assertSearchIndexInSync()
+
+    def test_user_list_view(self):
+        self.client.get('/')
+        cache.clear()
+        response = self.client.get('/', {'search': 'ann', 'business_unit': 'Madurai'}, headers={'HX-Request': 'true', 'HX-Target': 'user-table'})
+        self.assertContains(response, 'Annie Kay')
+        self.assertNotContains(response, 'Ann Lee')
+        self.assertContains(response, 'search=ann')
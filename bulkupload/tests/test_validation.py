@@ -0,0 +1,64 @@
+import datetime
+
+import pandas as pd
+from django.test import TestCase
+from pydantic import ValidationError
+
+from bulkupload.schema import Users
+from bulkupload.services import BulkUploadService
+from bulkupload.validation import VectorizedUsersValidator
+
+
+class ValidationParityTests(TestCase):
+    def validate_rows(self, df: pd.DataFrame):
+        """Validate each row with the Users model, as the upload did before vectorized validation."""
+        valid_users, failures = [], []
+        for index, row in df.iterrows():
+            try:
+                valid_users.append(Users.model_validate(row.to_dict()).model_dump())
+            except ValidationError as e:
+                failures.append((index + 2, [(error['type'], error['loc'], error['msg']) for error in e.errors()]))
+        return valid_users, failures
+
+    def assertSameValidation(self, df: pd.DataFrame):
+        valid_users, failures = self.validate_rows(df)
+        result = VectorizedUsersValidator.validate(df)
+        self.assertEqual(result['valid_users'].to_dict('records'), valid_users)
+        self.assertEqual([(failure['row_index'], [(error['type'], tuple(error['loc']), error['msg']) for error in failure['errors']])
+                          for failure in result['failures']], failures)
+        self.assertEqual(result['valid_mask'].tolist(), [index + 2 not in dict(failures) for index in df.index])
+
+    def test_vectorized_validation_matches_pydantic(self):
+        emails = ['a@b.com', 'Foo.Bar@Example.COM', 'bad', '', 'a@b', 'a..b@x.com', 'x+y@sub.dom.io', 'José@exämple.com', '"q"@x.com']
+        business_units = ['Chennai', 'Madurai', 'chennai', '']
+        dates = [datetime.date(2023, 1, 1), None, '2023-02-30', '15/01/2023', '2023-01-15', '2023-01-15T00:00:00']
+        mobiles = ['+91 98765 43210', '', '+', '12a', '123', '1' * 16, ' +1234567 ', '(044) 123-4567', '+ 1234567']
+        df = pd.DataFrame([{
+            'user_id': str(i), 'user_name': f'Name {i}', 'email': emails[i % len(emails)],
+            'business_unit': business_units[i % len(business_units)], 'department': 'Sales' if i % 5 else 'Unknown',
+            'date_of_joining': dates[i % len(dates)], 'mobile_number': mobiles[i % len(mobiles)],
+        } for i in range(len(emails) * len(dates) * len(mobiles))])
+        self.assertSameValidation(df)
+
+    def test_unicode_digits_match_pydantic(self):
+        mobiles = ['１２３４５６７８', '١٢٣٤٥٦٧', '12３', '+९८७६५४३२१०', '1234567']
+        for dtype in [object, 'string[pyarrow]']:
+            with self.subTest(dtype=dtype):
+                df = pd.DataFrame([{
+                    'user_id': str(i), 'user_name': 'Name', 'email': f'u{i}@example.com', 'business_unit': 'Chennai',
+                    'department': 'Sales', 'date_of_joining': datetime.date(2023, 1, 1), 'mobile_number': mobile,
+                } for i, mobile in enumerate(mobiles)])
+                df['mobile_number'] = df['mobile_number'].astype(dtype)
+                self.assertSameValidation(df)
+
+    def test_cleaned_frames_match_pydantic(self):
+        df = pd.DataFrame({
+            'User ID': ['1', '2', '3'], 'User Name': ['Ann', 'Bob', ''], 'Email': ['ann@x.com', 'bob', 'cid@x.com'],
+            'Business Unit': ['Chennai', 'Chennai', 'Nowhere'], 'Department': ['Sales', 'Sales', 'Sales'],
+            'Date of Joining': ['2023-01-01', 'soon', '2023-01-03'], 'Mobile Number': ['1234567', '1234567', '12'],
+        })
+        users, instances, failures = BulkUploadService.validate_new_users(BulkUploadService.clean_dataframe(df))
+        self.assertEqual([user.user_id for user in users], ['1'])
+        self.assertEqual(len(instances), 1)
+        self.assertEqual([failure['row_index'] for failure in failures], [3, 4])
+        self.assertEqual(failures[0]['data']['date_of_joining'], 'soon')
@@ -0,0 +1,68 @@
+import datetime
+import io
+import shutil
+import tempfile
+
+import pandas as pd
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from bulkupload.models import UsersModel
+
+
+def make_upload_df(count: int, bad_emails=(), start: int = 0) -> pd.DataFrame:
+    """An upload file's rows as read from disk, with invalid emails in the given rows."""
+    return pd.DataFrame([{
+        'User ID': f'U{i:05d}',
+        'User Name': f'Name {i}',
+        'Email': 'bad' if i in bad_emails else f'u{i}@example.com',
+        'Business Unit': 'Chennai',
+        'Department': 'Software',
+        'Date of Joining': datetime.datetime(2023, 1, 1),
+        'Mobile Number': '+91 98765 43210',
+    } for i in range(start, start + count)])
+
+
+def to_xlsx(df: pd.DataFrame) -> io.BytesIO:
+    xlsx_file = io.BytesIO()
+    df.to_excel(xlsx_file, index=False)
+    xlsx_file.seek(0)
+    return xlsx_file
+
+
+def make_users(count: int, prefix: str = 'U', **fields) -> None:
+    """Add users directly to the table, bypassing the upload pipeline (and its cache invalidation)."""
+    UsersModel.objects.bulk_create([
+        UsersModel(**{
+            'user_id': f'{prefix}{i:05d}', 'user_name': f'Name {i}', 'email': f'u{i}@example.com', 'business_unit': 'Chennai',
+            'department': 'Software', 'date_of_joining': datetime.date(2023, 1, 1), 'mobile_number': '9876543210', **fields,
+        })
+        for i in range(count)
+    ])
+
+
+class UploadTestCase(TestCase):
+    """
+    Uploads write error reports and job files to MEDIA_ROOT; keep them in a temporary directory. Uploads run on
+    the test's thread, inside its transaction.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root, BULK_UPLOAD_WORKER_THREADS=0)
+        cls.media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def read_rejects(self, rejects_file_id: str) -> io.BytesIO:
+        response = self.client.get(f'/rejects/{rejects_file_id}/')
+        return io.BytesIO(b''.join(response.streaming_content))
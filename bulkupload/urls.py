@@ -4,4 +4,9 @@ from bulkupload import views
 app_name = 'bulkupload'
 urlpatterns = [
     path('', views.import_data_pandas, name='import_data'),
+    path('jobs/<uuid:job_id>/', views.upload_job_status, name='upload_job_status'),
+    path('rejects/<uuid:rejects_file_id>/', views.download_rejects, name='download_rejects'),
+    path('rejects/<uuid:rejects_file_id>/errors/', views.upload_errors, name='upload_errors'),
+    path('export/<str:export_format>/', views.export_users, name='export_users'),
+    path('metrics/', views.instrumentation_metrics, name='instrumentation_metrics'),
 ]
\ No newline at end of file
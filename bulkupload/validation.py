@@ -0,0 +1,316 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from enum import Enum
+from typing import Any, Dict, List, Tuple, Type
+from django.apps import apps
+from email_validator import SPECIAL_USE_DOMAIN_NAMES
+import django
+from pydantic import ValidationError
+from pandas import DataFrame, Series
+from pandas.api.extensions import ExtensionArray
+import numpy as np
+import pandas as pd
+
+from bulkupload.schema import (
+    BusinessUnitEnum, DepartmentEnum, FrameValidationResult, Users, ValidationFailure, INVALID_DATE_COLUMN, INVALID_VALUE_COLUMNS,
+    MOBILE_NUMBER_ALLOWED_PATTERN, MOBILE_NUMBER_MAX_LENGTH, MOBILE_NUMBER_MIN_DIGITS,
+)
+
+# Deliberately narrower than EmailStr: every address matching it is accepted by EmailStr as well.
+# Addresses with an @-sign that do not match are handed to Pydantic, which knows the full rules.
+SIMPLE_EMAIL_PATTERN = (
+    r'[A-Za-z0-9_%+\-]+(?:\.[A-Za-z0-9_%+\-]+)*'
+    r'@(?:[A-Za-z0-9](?:[A-Za-z0-9\-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}'
+)
+# Dates already parsed by pandas (or typed as ISO dates) render like this; anything else goes to Pydantic.
+ISO_DATE_PATTERN = r'\d{4}-\d{2}-\d{2}(?:[ T]00:00:00)?'
+
+INVALID_DATE_MESSAGE = 'Input should be a valid date (YYYY-MM-DD, DD/MM/YYYY or an Excel date)'
+
+# (normalized values, undecided mask, error message or None per cell, Pydantic error type)
+FieldCheck = Tuple[Series, Series, Series, str]
+# Columns as arrays, keeping extension dtypes (categoricals, pyarrow strings) compact when sent to workers
+ShardColumns = Dict[str, np.ndarray | ExtensionArray]
+# What a worker process sends back: (valid mask, failures, valid users' columns, valid users' index)
+ShardResult = Tuple[np.ndarray, List[ValidationFailure], ShardColumns, np.ndarray]
+
+
+def _init_validation_worker() -> None:
+    """Make sure Django is set up in worker processes that were spawned rather than forked."""
+    if not apps.ready:
+        django.setup()
+
+
+def _validate_shard(columns: ShardColumns, index: np.ndarray) -> ShardResult:
+    """Validate one shard in a worker process; columns travel as arrays rather than pickled rows."""
+    result = VectorizedUsersValidator.validate(DataFrame(columns, index=index))
+    valid_users = result['valid_users']
+    return (
+        result['valid_mask'].to_numpy(),
+        result['failures'],
+        {field: valid_users[field].array for field in valid_users.columns},
+        valid_users.index.to_numpy()
+    )
+
+
+class VectorizedUsersValidator:
+    @staticmethod
+    def validate(users_df: DataFrame) -> FrameValidationResult:
+        """
+        Validate a DataFrame against the rules of the Users schema column by column.
+
+        Rows the vectorized checks cannot decide (unusual email syntax, non-ISO dates, non-string cells, ...)
+        are validated individually with Users.model_validate, so the outcome matches the per-row validation.
+        """
+        index = users_df.index
+        if users_df.empty:
+            return {"valid_mask": Series(True, index=index), "failures": [], "valid_users": DataFrame(columns=list(Users.model_fields.keys()))}
+
+        checks: Dict[str, FieldCheck] = {}
+        for field in Users.model_fields.keys():
+            if field in users_df.columns:
+                checks[field] = VectorizedUsersValidator._check_field(field, users_df)
+            else:
+                # Let Pydantic report the missing field
+                column = Series(None, index=index, dtype=object)
+                checks[field] = (column, Series(True, index=index), column, 'missing')
+
+        undecided = np.zeros(len(index), dtype=bool)
+        has_errors = np.zeros(len(index), dtype=bool)
+        for _, field_undecided, field_errors, _ in checks.values():
+            undecided |= field_undecided.to_numpy(dtype=bool)
+            has_errors |= field_errors.notna().to_numpy()
+        has_errors &= ~undecided
+
+        failures: List[ValidationFailure] = []
+        for position in np.flatnonzero(has_errors):
+            label = index[position]
+            row_data = VectorizedUsersValidator._restore_invalid_values(users_df.loc[label].to_dict())
+            errors = [
+                {"type": error_type, "loc": (field,), "msg": field_errors.iat[position], "input": row_data.get(field)}
+                for field, (_, _, field_errors, error_type) in checks.items()
+                if pd.notna(field_errors.iat[position])
+            ]
+            failures.append({
+                "row_index": int(label) + 2,
+                "data": VectorizedUsersValidator._failure_data(row_data),
+                "errors": errors
+            })
+
+        valid = ~(has_errors | undecided)
+        valid_users = DataFrame({field: checks[field][0] for field in checks}, index=index)[valid]
+
+        # Fall back to Pydantic for the rows the column checks could not decide
+        fallback_users = []
+        for label in index[undecided]:
+            row_data = VectorizedUsersValidator._restore_invalid_values(users_df.loc[label].to_dict())
+            if 'date_of_joining' in row_data and pd.isna(row_data['date_of_joining']):
+                row_data['date_of_joining'] = None
+            try:
+                fallback_users.append((label, Users.model_validate(row_data).model_dump()))
+                valid[index.get_loc(label)] = True
+            except ValidationError as e:
+                failures.append({
+                    "row_index": int(label) + 2,
+                    "data": VectorizedUsersValidator._failure_data(row_data),
+                    "errors": e.errors()
+                })
+            except Exception as e:
+                failures.append({
+                    "row_index": int(label) + 2,
+                    "data": VectorizedUsersValidator._failure_data(row_data),
+                    "errors": [{"loc": ["general"], "msg": str(e), "type": "runtime_error"}]
+                })
+        if fallback_users:
+            fallback_df = DataFrame([values for _, values in fallback_users], index=[label for label, _ in fallback_users])
+            valid_users = pd.concat([valid_users, fallback_df]).reindex(index[valid])
+
+        failures.sort(key=lambda failure: failure['row_index'])
+        return {
+            "valid_mask": Series(valid, index=index),
+            "failures": failures,
+            "valid_users": valid_users
+        }
+
+    @staticmethod
+    def validate_parallel(users_df: DataFrame, workers: int) -> FrameValidationResult:
+        """
+        Validate a large DataFrame in a pool of worker processes, one contiguous shard per worker.
+
+        Shard results are merged back in the original row order, so failures keep their Excel row_index.
+        """
+        if users_df.empty or workers < 2:
+            return VectorizedUsersValidator.validate(users_df)
+
+        shard_size = -(-len(users_df) // workers)
+        with VectorizedUsersValidator.create_pool(workers) as executor:
+            futures = [
+                VectorizedUsersValidator.submit(executor, users_df.iloc[start:start + shard_size])
+                for start in range(0, len(users_df), shard_size)
+            ]
+            return VectorizedUsersValidator.merge_shard_results(users_df, [future.result() for future in futures])
+
+    @staticmethod
+    def create_pool(workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_validation_worker)
+
+    @staticmethod
+    def submit(executor: ProcessPoolExecutor, users_df: DataFrame) -> 'Future[ShardResult]':
+        """Start validating a DataFrame as one shard in the pool; merge_shard_results turns the result into a FrameValidationResult."""
+        return executor.submit(_validate_shard, {field: users_df[field].array for field in users_df.columns}, users_df.index.to_numpy())
+
+    @staticmethod
+    def merge_shard_results(users_df: DataFrame, shard_results: List[ShardResult]) -> FrameValidationResult:
+        """Merge the results of contiguous shards of users_df back in the original row order."""
+        failures = [failure for _, shard_failures, _, _ in shard_results for failure in shard_failures]
+        failures.sort(key=lambda failure: failure['row_index'])
+        return {
+            "valid_mask": Series(np.concatenate([valid_mask for valid_mask, _, _, _ in shard_results]), index=users_df.index),
+            "failures": failures,
+            "valid_users": pd.concat([DataFrame(valid_columns, index=valid_index) for _, _, valid_columns, valid_index in shard_results])
+        }
+
+    @staticmethod
+    def _failure_data(row_data: Dict[str, Any]) -> Dict[str, str]:
+        """Truncate a row's values for the failure report, as validate_new_users always has."""
+        return {k: str(None if k == 'date_of_joining' and pd.isna(v) else v)[:50] for k, v in row_data.items()}
+
+    @staticmethod
+    def _restore_invalid_values(row_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Put back the original values clean_dataframe could not convert, so reports show what was typed."""
+        for field, invalid_column in INVALID_VALUE_COLUMNS.items():
+            invalid_value = row_data.pop(invalid_column, None)
+            if invalid_value is not None and not pd.isna(invalid_value):
+                row_data[field] = invalid_value
+        return row_data
+
+    @staticmethod
+    def _check_field(field: str, users_df: DataFrame) -> FieldCheck:
+        column = users_df[field]
+        if field == 'email':
+            return VectorizedUsersValidator._check_email(column)
+        if field == 'business_unit':
+            return VectorizedUsersValidator._check_choice(column, BusinessUnitEnum)
+        if field == 'department':
+            return VectorizedUsersValidator._check_choice(column, DepartmentEnum)
+        if field == 'date_of_joining':
+            return VectorizedUsersValidator._check_date(column, users_df.get(INVALID_DATE_COLUMN))
+        if field == 'mobile_number':
+            return VectorizedUsersValidator._check_mobile_number(column)
+        return VectorizedUsersValidator._check_string(column)
+
+    @staticmethod
+    def _no_errors(column: Series) -> Series:
+        return Series(None, index=column.index, dtype=object)
+
+    @staticmethod
+    def _string_mask(column: Series) -> Series:
+        """True where the cell is a str; cheap when the whole column is strings."""
+        if pd.api.types.is_string_dtype(column) and not column.isna().any():
+            return Series(True, index=column.index)
+        return column.map(lambda value: isinstance(value, str)).astype(bool)
+
+    @staticmethod
+    def _text(column: Series, is_string: Series) -> Series:
+        """The column's strings, with '' for other cells; string-dtype columns stay in their (pyarrow) storage."""
+        if isinstance(column.dtype, pd.StringDtype):
+            return column.fillna('')
+        return column.where(is_string, '').astype(str)
+
+    @staticmethod
+    def _errors_where(column: Series, conditions: List[Tuple[Series, Any]]) -> Series:
+        """Build the error message series; the first matching condition wins, as in a sequential validator."""
+        errors = VectorizedUsersValidator._no_errors(column)
+        decided = Series(False, index=column.index)
+        for condition, message in conditions:
+            hit = condition & ~decided
+            if hit.any():
+                errors[hit] = message[hit] if isinstance(message, Series) else message
+                decided |= hit
+        return errors
+
+    @staticmethod
+    def _check_string(column: Series) -> FieldCheck:
+        return column, ~VectorizedUsersValidator._string_mask(column), VectorizedUsersValidator._no_errors(column), 'string_type'
+
+    @staticmethod
+    def _check_email(column: Series) -> FieldCheck:
+        is_string = VectorizedUsersValidator._string_mask(column)
+        text = VectorizedUsersValidator._text(column, is_string)
+        local_part, at_sign, domain = (part for _, part in text.str.partition('@').items())
+        domain = domain.str.lower()
+        no_at_sign = is_string & (at_sign == '')
+        simple = (
+            text.str.fullmatch(SIMPLE_EMAIL_PATTERN)
+            & (text.str.len() <= 254)
+            & (local_part.str.len() <= 64)
+            & ~domain.str.rpartition('.')[2].isin(SPECIAL_USE_DOMAIN_NAMES)
+        )
+        undecided = ~(simple | no_at_sign)
+
+        # EmailStr lower-cases the domain part
+        normalized = local_part + at_sign + domain
+
+        errors = VectorizedUsersValidator._errors_where(column, [
+            (no_at_sign, 'value is not a valid email address: An email address must have an @-sign.'),
+        ])
+        return normalized, undecided, errors, 'value_error'
+
+    @staticmethod
+    def _check_choice(column: Series, enum: Type[Enum]) -> FieldCheck:
+        values = [member.value for member in enum]
+        expected = ', '.join(f"'{value}'" for value in values[:-1]) + f" or '{values[-1]}'"
+        if isinstance(column.dtype, pd.CategoricalDtype) and set(column.cat.categories) <= set(values):
+            # Categorical of the choices (from clean_dataframe): anything else was coded -1
+            invalid = column.cat.codes == -1
+        else:
+            invalid = ~column.isin(values)
+        errors = VectorizedUsersValidator._errors_where(column, [
+            (invalid, f'Input should be {expected}'),
+        ])
+        return column, Series(False, index=column.index), errors, 'enum'
+
+    @staticmethod
+    def _check_date(column: Series, invalid_values: Series | None = None) -> FieldCheck:
+        if pd.api.types.is_datetime64_any_dtype(column):
+            # Already normalized by clean_dataframe: NaT cells were either empty or unparseable
+            invalid = invalid_values.notna() if invalid_values is not None else Series(False, index=column.index)
+            errors = VectorizedUsersValidator._errors_where(column, [
+                (invalid, INVALID_DATE_MESSAGE),
+                (column.isna(), 'Input should be a valid date'),
+            ])
+            return column.dt.date, Series(False, index=column.index), errors, 'date_type'
+
+        missing = column.isna()
+        text = column.astype(str)
+        iso_date = text.str.fullmatch(ISO_DATE_PATTERN) & ~missing
+        parsed = pd.to_datetime(text.str[:10].where(iso_date), format='%Y-%m-%d', errors='coerce')
+        undecided = ~missing & parsed.isna()
+        errors = VectorizedUsersValidator._errors_where(column, [
+            (missing, 'Input should be a valid date'),
+        ])
+        return parsed.dt.date, undecided, errors, 'date_type'
+
+    @staticmethod
+    def _check_mobile_number(column: Series) -> FieldCheck:
+        is_string = VectorizedUsersValidator._string_mask(column)
+        missing = column.isna()
+        stripped = VectorizedUsersValidator._text(column, is_string).str.strip()
+        has_plus = stripped.str.startswith('+')
+        number = stripped.where(~has_plus, stripped.str[1:])
+        length = number.str.len()
+        digits = number.str.count(r'\d')
+        # Regexes on pyarrow strings (RE2) only count ASCII digits as \d, Python's re any Unicode digit
+        non_ascii = is_string & stripped.str.contains(r'[^\x00-\x7f]').astype(bool)
+
+        errors = VectorizedUsersValidator._errors_where(column, [
+            (missing | (is_string & (stripped == '')), 'Value error, Mobile number is required.'),
+            (is_string & (number == ''), 'Value error, Mobile number is required after stripping "+".'),
+            (is_string & ~number.str.fullmatch(MOBILE_NUMBER_ALLOWED_PATTERN),
+             'Value error, Mobile number contains invalid characters. Allowed: digits, spaces, hyphens, parentheses (after optional leading "+").'),
+            (is_string & (length > MOBILE_NUMBER_MAX_LENGTH),
+             f'Value error, Mobile number too long (max {MOBILE_NUMBER_MAX_LENGTH} chars after stripping "+"), got ' + length.astype(str) + ' chars.'),
+            (is_string & (digits < MOBILE_NUMBER_MIN_DIGITS),
+             f'Value error, Mobile number must contain at least {MOBILE_NUMBER_MIN_DIGITS} digits, found ' + digits.astype(str) + '.'),
+        ])
+        # Numbers, other non-string cells and non-ASCII text are left to the Pydantic validator
+        return number, (~is_string & ~missing) | non_ascii, errors, 'value_error'
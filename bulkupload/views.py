@@ -1,15 +1,64 @@
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
 from django.contrib import messages
-from django.shortcuts import render
-from django.http import HttpRequest, HttpResponse
-import pandas as pd
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.shortcuts import get_object_or_404, render
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from typing import Any, Callable, Dict, List, Tuple
+from math import ceil
+import hashlib
+import threading
+import time
+import uuid
 
+from bulkupload.caching import UserListCache
+from bulkupload.column_mapping import ColumnMapping
+from bulkupload.error_report import ERROR_PAGE_SIZE, ErrorReport
+from bulkupload.export import EXPORT_CONTENT_TYPES, UserExportService
+from bulkupload.instrumentation import Instrumentation
+from bulkupload.jobs import UploadJobService
+from bulkupload.models import BusinessUnitChoices, DepartmentChoices, UploadJob, UploadJobStatus
 from bulkupload.schema import BulkUploadResult
-from bulkupload.services import BulkUploadService
+from bulkupload.services import BulkUploadService, SUPPORTED_UPLOAD_EXTENSIONS
 
+# Uploads at least this large (in bytes) are streamed in chunks; override with BULK_UPLOAD_STREAMING_THRESHOLD.
+DEFAULT_STREAMING_THRESHOLD = 5 * 1024 * 1024
+# Repeated user IDs (and, separately, shared emails) described one by one in the upload messages
+MAX_DUPLICATE_GROUP_MESSAGES = 5
+# id of the element wrapping the user table and its pager; htmx requests targeting it get only that fragment
+USER_TABLE_ID = 'user-table'
+# Uploads that can run at once, each in its own thread; override with BULK_UPLOAD_WORKER_THREADS.
+DEFAULT_UPLOAD_WORKER_THREADS = 4
 
-def render_paginated_users(request: HttpRequest, additional_context: dict | None = None) -> HttpResponse:
-    """Render paginated users using data from services."""
+_upload_executor: Tuple[int, ThreadPoolExecutor | None] = (0, None)
+_upload_executor_lock = threading.Lock()
+
+
+async def render_paginated_users(request: HttpRequest, additional_context: dict | None = None) -> HttpResponse:
+    """
+    Render paginated users using data from services, read through the async ORM.
+
+    htmx requests targeting the user table (paging, page size) get only the table fragment. Plain GETs are
+    conditional: their ETag and Last-Modified follow the user list's cache version, so a client that already
+    has the page gets a 304 without any query or template work until the next upload (or the cache timeout).
+    Pages with flash messages waiting to be shown are always rendered.
+    """
     print(request.GET)
+    partial = bool(request.htmx) and request.htmx.target == USER_TABLE_ID
+    validators = None
+    if request.method == 'GET' and not additional_context and not await has_pending_messages(request):
+        validators = get_user_list_validators(request, await UserListCache.aget_version(), partial)
+        not_modified_response = get_conditional_response(request, etag=validators[0], last_modified=validators[1])
+        if not_modified_response is not None:
+            return add_user_list_headers(not_modified_response, validators)
+
     page_number_str = request.GET.get('page_number', '1')
     try:
         page_number = int(page_number_str)
@@ -26,72 +75,308 @@ def render_paginated_users(request: HttpRequest, additional_context: dict | None
     except ValueError:
         per_page = 10
 
-    users_data = BulkUploadService.get_paginated_users(page_number, per_page)
-    context = {'users': users_data}
+    filters = BulkUploadService.get_user_filters(request.GET)
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after or before or BulkUploadService.get_pagination_mode() == 'keyset':
+        users_data = await BulkUploadService.aget_keyset_users(per_page, after=after, before=before, filters=filters)
+    else:
+        users_data = await BulkUploadService.aget_paginated_users(page_number, per_page, filters)
+    context = {
+        'users': users_data,
+        'filters': filters,
+        'filter_query': BulkUploadService.get_filter_query(filters),
+        'filter_params': BulkUploadService.get_filter_params(filters),
+    }
+    if partial:
+        # The fragment needs no context processors, so it is rendered without leaving the event loop
+        response = HttpResponse(render_to_string('bulkupload/partials/user_table.html', context))
+        return add_user_list_headers(response, validators)
+
+    context |= {
+        'business_units': BusinessUnitChoices.choices,
+        'departments': DepartmentChoices.choices,
+        'insert_mode': BulkUploadService.get_insert_mode().value,
+        'commit_policy': BulkUploadService.get_commit_policy().value,
+        'column_profiles': ColumnMapping.get_profile_names(),
+        'column_profile': getattr(settings, 'BULK_UPLOAD_COLUMN_PROFILE', None) or '',
+        'export_formats': UserExportService.get_formats(),
+    }
     if additional_context:
         context.update(additional_context)
 
-    return render(request, 'bulkupload/index.html', context)
+    # The context processors read the session and the user, which only sync code may do
+    response = await sync_to_async(render)(request, 'bulkupload/index.html', context)
+    return add_user_list_headers(response, validators)
+
+
+async def has_pending_messages(request: HttpRequest) -> bool:
+    """Whether flash messages wait to be shown; unlike iterating them, counting leaves them queued."""
+    return bool(await sync_to_async(len)(messages.get_messages(request)))
+
+
+def get_user_list_validators(request: HttpRequest, version: int, partial: bool) -> Tuple[str, int]:
+    """
+    Return the ETag and Last-Modified timestamp of a user list response.
+
+    The version is the time of the last upload (see UserListCache). Writes made elsewhere (the admin, a shell)
+    do not change it, so both validators also change every BULK_UPLOAD_PAGE_CACHE_TIMEOUT seconds, the same
+    bound the cached pages have. The ETag also covers the query string, whether only the fragment is rendered
+    and the CSRF cookie the page's upload form uses.
+    """
+    timeout = max(UserListCache.get_timeout(), 1)
+    timeout_started = int(time.time() // timeout * timeout)
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    fingerprint = f"{version}:{timeout_started}:{int(partial)}:{request.GET.urlencode()}:{csrf_cookie}"
+    return quote_etag(hashlib.md5(fingerprint.encode()).hexdigest()), max(version // 1_000_000_000, timeout_started)
+
 
-def import_data_pandas(request: HttpRequest) -> HttpResponse:
-    """Handle file upload and process user data."""
+def add_user_list_headers(response: HttpResponse, validators: Tuple[str, int] | None) -> HttpResponse:
+    """Mark user list responses as varying with htmx, and add their validators if they have any."""
+    patch_vary_headers(response, ['HX-Request', 'HX-Target'])
+    if validators is not None:
+        response.headers['ETag'] = validators[0]
+        response.headers['Last-Modified'] = http_date(validators[1])
+        # Let browsers keep the page but revalidate it on every use, so new uploads show at once
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+async def import_data_pandas(request: HttpRequest) -> HttpResponse:
+    """
+    Handle file upload and process user data.
+
+    Parsing and saving the upload run in a worker thread, so an ASGI worker keeps serving other requests
+    while uploads are in flight.
+    """
     if request.method != 'POST':
-        return render_paginated_users(request)
+        return await render_paginated_users(request)
 
-    uploaded_file = request.FILES.get('myfile')
+    # Parsing the multipart body writes large files to disk
+    uploaded_file = await run_in_worker_thread(lambda: request.FILES.get('myfile'))
     if not uploaded_file:
         messages.error(request, "No file uploaded.")
-        return render_paginated_users(request)
-    if uploaded_file.name.split('.')[-1].lower() not in ['xlsx']:
-        messages.error(request, "Invalid file type. Please upload an .xlsx file.")
-        return render_paginated_users(request)
+        return await render_paginated_users(request)
+    if BulkUploadService.get_file_extension(uploaded_file.name) not in SUPPORTED_UPLOAD_EXTENSIONS:
+        messages.error(request, "Invalid file type. Please upload an .xlsx, .csv, .parquet or .arrow file.")
+        return await render_paginated_users(request)
     if uploaded_file.size == 0:
         messages.error(request, "The uploaded file is empty.")
-        return render_paginated_users(request)
+        return await render_paginated_users(request)
+
+    insert_mode = request.POST.get('insert_mode') or None
+    commit_policy = request.POST.get('commit_policy') or None
+    column_profile = request.POST.get('column_profile') or None
+    if getattr(settings, 'BULK_UPLOAD_BACKGROUND_JOBS', False):
+        job = await run_in_worker_thread(UploadJobService.create_job, uploaded_file, insert_mode, commit_policy, column_profile)
+        return await render_paginated_users(request, {'upload_job': job})
+
+    additional_context = await run_in_worker_thread(process_upload, request, uploaded_file, insert_mode, commit_policy, column_profile)
+    return await render_paginated_users(request, additional_context)
+
+
+async def run_in_worker_thread(function: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run slow blocking work (parsing, validating and saving an upload) in the upload thread pool rather than the
+    thread that serves every thread-sensitive sync_to_async call, so list and page requests are not queued
+    behind it. The database connection the worker opened is closed when it is done.
+    """
+    executor = get_upload_executor()
+    if executor is None:
+        return await sync_to_async(function)(*args)
+
+    def run() -> Any:
+        try:
+            return function(*args)
+        finally:
+            connections.close_all()
+    return await sync_to_async(run, thread_sensitive=False, executor=executor)()
+
+
+def get_upload_executor() -> ThreadPoolExecutor | None:
+    """
+    Return the pool of BULK_UPLOAD_WORKER_THREADS threads that uploads run in, or None when it is 0: uploads
+    then share the thread-sensitive thread (and, in tests, the test's database transaction).
+    """
+    global _upload_executor
+    worker_threads = getattr(settings, 'BULK_UPLOAD_WORKER_THREADS', DEFAULT_UPLOAD_WORKER_THREADS)
+    if worker_threads != _upload_executor[0]:
+        with _upload_executor_lock:
+            if worker_threads != _upload_executor[0]:
+                executor = ThreadPoolExecutor(worker_threads, thread_name_prefix='bulkupload') if worker_threads else None
+                _upload_executor = (worker_threads, executor)
+    return _upload_executor[1]
+
 
+def process_upload(request: HttpRequest, uploaded_file: UploadedFile, insert_mode: str | None, commit_policy: str | None,
+                   column_profile: str | None) -> Dict[str, Any]:
+    """Read and save an upload, adding the outcome to the request's messages; returns extra context for the page."""
+    # Only .xlsx files are small enough to be worth loading whole; the other formats are always read in chunks
+    is_excel = BulkUploadService.get_file_extension(uploaded_file.name) == 'xlsx'
+    streaming = not is_excel or uploaded_file.size >= getattr(settings, 'BULK_UPLOAD_STREAMING_THRESHOLD', DEFAULT_STREAMING_THRESHOLD)
     try:
-        data_frame = pd.read_excel(uploaded_file)
-        if data_frame.empty:
-            messages.error(request, "The Excel file contains no data rows.")
-            return render_paginated_users(request)
+        if streaming:
+            row_count = BulkUploadService.count_upload_rows(uploaded_file, uploaded_file.name)
+            chunks = BulkUploadService.read_upload_in_chunks(uploaded_file, uploaded_file.name, column_profile=column_profile)
+        else:
+            with Instrumentation.stage('read') as read_stage:
+                data_frame = BulkUploadService.read_excel(uploaded_file, column_profile)
+                read_stage.rows_out = len(data_frame)
+            if data_frame.empty:
+                messages.error(request, "The uploaded file contains no data rows.")
+                return {}
     except Exception as e:
-        messages.error(request, f"Error reading Excel file: {e}")
-        return render_paginated_users(request)
+        messages.error(request, f"Error reading uploaded file: {e}")
+        return {}
 
     try:
-        upload_result: BulkUploadResult = BulkUploadService.save_bulk_data(data_frame.copy())
-        newly_created_count = upload_result['newly_created_count']
-        failed_rows = upload_result['failed_rows']
-        attempted_new_rows_count = upload_result['attempted_new_rows_count']
-        all_users_in_file_existed = upload_result['all_users_in_file_existed']
-        input_data_was_empty_after_cleaning = upload_result['input_data_was_empty_after_cleaning']
-        file_internal_duplicates_removed_count = upload_result['file_internal_duplicates_removed_count']
-
-        if file_internal_duplicates_removed_count > 0:
-            messages.info(request, f"{file_internal_duplicates_removed_count} duplicate row(s) within the uploaded file were ignored.")
-        if newly_created_count > 0:
-            messages.success(request, f"{newly_created_count} user(s) uploaded successfully.")
-        for failure in failed_rows:
-            error_messages_list = [f"Column '{ ' -> '.join(map(str, err_detail.get('loc', ['unknown field']))) }': {err_detail.get('msg', 'Unknown error')}" 
-                                   for err_detail in failure['errors']]
-            detailed_errors = "; ".join(error_messages_list)
-            display_data = {k: str(v)[:30] + '...' if len(str(v)) > 30 else str(v) for k, v in failure['data'].items()}
-            messages.warning(request, f"Excel Row {failure['row_index']} failed validation: {detailed_errors}. Data: {display_data}")
-        if newly_created_count == 0:
-            if input_data_was_empty_after_cleaning and not data_frame.empty:
-                messages.info(request, "No processable user data found after cleaning.")
-            elif all_users_in_file_existed:
-                messages.info(request, "All unique users from the file already exist.")
-            elif attempted_new_rows_count > 0 and not failed_rows:
-                messages.info(request, "Data valid but no new users saved, possibly due to conflicts.")
-            elif attempted_new_rows_count > 0 and len(failed_rows) == attempted_new_rows_count:
-                messages.info(request, "All new user entries failed validation.")
-            elif not failed_rows and not data_frame.empty and file_internal_duplicates_removed_count == 0 and attempted_new_rows_count == 0:
-                messages.info(request, "No new users added after processing.")
-
+        with Instrumentation.stage('import_data_pandas') as upload_stage:
+            if streaming:
+                upload_result: BulkUploadResult = BulkUploadService.save_bulk_data_in_chunks(chunks, insert_mode, commit_policy=commit_policy,
+                                                                                            row_count=row_count)
+            else:
+                upload_result = BulkUploadService.save_bulk_data(data_frame.copy(), insert_mode, commit_policy)
+            upload_stage.rows_in = upload_result['rows_read_count']
+            upload_stage.rows_out = upload_result['newly_created_count'] + upload_result['updated_count']
+        for level, message in get_upload_result_messages(upload_result):
+            messages.add_message(request, level, message)
     except ValueError as e:
         messages.error(request, f"Error processing data: {e}")
+        return {}
     except Exception as e:
         messages.error(request, f"An unexpected error occurred: {e}")
+        return {}
+
+    return {'rejects_file_id': upload_result['rejects_file_id'], 'error_summary': upload_result['error_summary']}
+
+
+def get_upload_result_messages(upload_result: BulkUploadResult | Dict[str, Any]) -> List[Tuple[int, str]]:
+    """Summarize an upload result (live or as stored on an UploadJob) as (message level, text) pairs."""
+    newly_created_count = upload_result['newly_created_count']
+    failed_count = upload_result.get('failed_count', len(upload_result.get('failed_rows', [])))  # Older job results list the failed rows
+    attempted_new_rows_count = upload_result['attempted_new_rows_count']
+    all_users_in_file_existed = upload_result['all_users_in_file_existed']
+    input_data_was_empty_after_cleaning = upload_result['input_data_was_empty_after_cleaning']
+    file_internal_duplicates_removed_count = upload_result['file_internal_duplicates_removed_count']
+    rows_were_read = upload_result['rows_read_count'] > 0
+    updated_count = upload_result['updated_count']
+    rejected_by_commit_policy = upload_result.get('rejected_by_commit_policy', False)  # Absent from older job results
+    duplicate_groups = upload_result.get('duplicate_groups', [])
+
+    if not rows_were_read:
+        return [(messages.ERROR, "The uploaded file contains no data rows.")]
+
+    result_messages = []
+    if file_internal_duplicates_removed_count > 0:
+        result_messages.append((messages.INFO, f"{file_internal_duplicates_removed_count} duplicate row(s) within the uploaded file were ignored."))
+    result_messages.extend(get_duplicate_group_messages(duplicate_groups))
+    if newly_created_count > 0:
+        result_messages.append((messages.SUCCESS, f"{newly_created_count} user(s) uploaded successfully."))
+    if updated_count > 0:
+        result_messages.append((messages.SUCCESS, f"{updated_count} existing user(s) updated."))
+    if rejected_by_commit_policy:
+        result_messages.append((messages.ERROR, f"No users were saved because {failed_count} row(s) failed validation. Fix the rejected rows and upload the file again."))
+    elif failed_count:
+        result_messages.append((messages.WARNING, f"{failed_count} row(s) failed validation and were not saved. Download the rejected rows to fix and upload them again."))
+    if newly_created_count == 0:
+        if input_data_was_empty_after_cleaning:
+            result_messages.append((messages.INFO, "No processable user data found after cleaning."))
+        elif all_users_in_file_existed:
+            result_messages.append((messages.INFO, "All unique users from the file already exist."))
+        elif attempted_new_rows_count > 0 and not failed_count and updated_count == 0:
+            result_messages.append((messages.INFO, "Data valid but no new users saved, possibly due to conflicts."))
+        elif attempted_new_rows_count > 0 and failed_count == attempted_new_rows_count:
+            result_messages.append((messages.INFO, "All new user entries failed validation."))
+        elif not failed_count and file_internal_duplicates_removed_count == 0 and attempted_new_rows_count == 0:
+            result_messages.append((messages.INFO, "No new users added after processing."))
+    return result_messages
+
+
+def get_duplicate_group_messages(duplicate_groups: List[Dict[str, Any]]) -> List[Tuple[int, str]]:
+    """Describe the user IDs repeated with different data and the emails shared by several user IDs."""
+    conflicting_ids = [group for group in duplicate_groups if group['field'] == 'user_id' and group['conflicting']]
+    shared_emails = [group for group in duplicate_groups if group['field'] == 'email']
+    result_messages = []
+    for group in conflicting_ids[:MAX_DUPLICATE_GROUP_MESSAGES]:
+        rows = ', '.join(map(str, group['row_indexes']))
+        result_messages.append((messages.WARNING, f"User ID '{group['value']}' appears in rows {rows} with different data; only row {group['row_indexes'][0]} was used."))
+    for group in shared_emails[:MAX_DUPLICATE_GROUP_MESSAGES]:
+        rows = ', '.join(map(str, group['row_indexes']))
+        agreement = "otherwise identical" if not group['conflicting'] else "different"
+        result_messages.append((messages.WARNING, f"Email '{group['value']}' is used by rows {rows}, which have different user IDs and {agreement} data."))
+    hidden_count = max(len(conflicting_ids) - MAX_DUPLICATE_GROUP_MESSAGES, 0) + max(len(shared_emails) - MAX_DUPLICATE_GROUP_MESSAGES, 0)
+    if hidden_count:
+        result_messages.append((messages.WARNING, f"{hidden_count} more repeated user ID(s) or email(s) were found in the file."))
+    return result_messages
+
+
+def upload_job_status(request: HttpRequest, job_id: uuid.UUID) -> HttpResponse:
+    """Render the progress of a background upload job; htmx polls this until the job finishes."""
+    job = get_object_or_404(UploadJob, pk=job_id)
+    result_messages = []
+    if job.status == UploadJobStatus.succeeded:
+        result_messages = [{'tags': messages.DEFAULT_TAGS[level], 'text': text} for level, text in get_upload_result_messages(job.result)]
+    elif job.status == UploadJobStatus.failed:
+        result_messages = [{'tags': 'error', 'text': f"Error processing data: {job.error}"}]
+
+    return render(request, 'bulkupload/partials/upload_job_progress.html', {
+        'job': job,
+        'progress': UploadJobService.get_progress(job),
+        'is_finished': job.status in (UploadJobStatus.succeeded, UploadJobStatus.failed),
+        'result_messages': result_messages,
+    })
 
-    return render_paginated_users(request)
\ No newline at end of file
+
+def instrumentation_metrics(request: HttpRequest) -> HttpResponse:
+    """Expose the per-stage upload metrics in the Prometheus text format, if a PrometheusHook is configured."""
+    prometheus_hook = Instrumentation.get_prometheus_hook()
+    if prometheus_hook is None:
+        raise Http404("Prometheus instrumentation is not enabled.")
+    return HttpResponse(prometheus_hook.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def download_rejects(request: HttpRequest, rejects_file_id: uuid.UUID) -> FileResponse:
+    """Download the rows that failed validation in an upload, as an .xlsx workbook or, with ?format=csv, as CSV."""
+    if request.GET.get('format') == 'csv':
+        file_name = ErrorReport.get_file_name(str(rejects_file_id), 'csv')
+        file_name = file_name if default_storage.exists(file_name) else None
+    else:
+        file_name = ErrorReport.get_workbook_name(str(rejects_file_id))
+    if file_name is None:
+        raise Http404("The rejected rows are no longer available.")
+    return FileResponse(default_storage.open(file_name, 'rb'), as_attachment=True, filename=f'rejected_rows.{file_name.rsplit(".", 1)[-1]}')
+
+
+def export_users(request: HttpRequest, export_format: str) -> StreamingHttpResponse:
+    """Stream the users matching the user list filters as CSV, .xlsx or Parquet."""
+    if export_format not in UserExportService.get_formats():
+        raise Http404("This export format is not available.")
+    filters = BulkUploadService.get_user_filters(request.GET)
+    # ASGI servers only stream asynchronous iterators; a synchronous one would be read whole before sending
+    if isinstance(request, ASGIRequest):
+        streaming_content = UserExportService.aiter_export(export_format, filters)
+    else:
+        streaming_content = UserExportService.iter_export(export_format, filters)
+    response = StreamingHttpResponse(streaming_content, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="users.{export_format}"'
+    return response
+
+
+def upload_errors(request: HttpRequest, rejects_file_id: uuid.UUID) -> HttpResponse:
+    """Render one page of the rows that failed validation in an upload; htmx swaps the pages in place."""
+    error_summary = ErrorReport.load_summary(str(rejects_file_id))
+    if error_summary is None:
+        raise Http404("The rejected rows are no longer available.")
+    num_pages = max(ceil(error_summary['failed_count'] / ERROR_PAGE_SIZE), 1)
+    try:
+        page_number = min(max(int(request.GET.get('page_number', '1')), 1), num_pages)
+    except ValueError:
+        page_number = 1
+    header, rows = ErrorReport.get_page(str(rejects_file_id), page_number)
+    return render(request, 'bulkupload/partials/error_table.html', {
+        'rejects_file_id': rejects_file_id,
+        'header': header,
+        'rows': rows,
+        'page_number': page_number,
+        'num_pages': num_pages,
+        'failed_count': error_summary['failed_count'],
+    })
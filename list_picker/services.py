@@ -1,5 +1,19 @@
+from typing import Iterable, List, Set, TypedDict
+import uuid
+
 from list_picker.models import Team, Employee
 
+# Session key holding the selections of the pickers opened in a session, by picker id
+SELECTION_SESSION_KEY = 'list_picker'
+# Selections kept per session; opening more pickers forgets the oldest
+MAX_PICKER_SELECTIONS = 10
+
+
+class PickerSelection(TypedDict):
+    teams: List[int]
+    employees: List[int]
+
+
 class ListPickerService:
     @staticmethod
     def get_all_teams():
@@ -20,11 +34,47 @@ class ListPickerService:
     @staticmethod
     def get_employees_not_in_list(employee_ids):
         return Employee.objects.exclude(id__in=employee_ids)
-        
+
     @staticmethod
     def get_employees_by_teams_not_in_list(selected_teams_ids, new_selected_employees_ids):
         return Employee.objects.filter(team_id__in=selected_teams_ids).exclude(id__in=new_selected_employees_ids)
 
     @staticmethod
     def get_employees_by_teams_in_list(new_selected_employees_ids):
-        return Employee.objects.filter(id__in=new_selected_employees_ids)
\ No newline at end of file
+        return Employee.objects.filter(id__in=new_selected_employees_ids)
+
+    @staticmethod
+    def get_team_employees(team_ids, employee_ids):
+        """Employees in the list that belong to one of the teams."""
+        return Employee.objects.filter(team_id__in=team_ids, id__in=employee_ids)
+
+    @staticmethod
+    def parse_ids(values: Iterable[str]) -> Set[int]:
+        """Posted option values as ids; anything that is not a number is ignored."""
+        return {int(value) for value in values if value.isdigit()}
+
+    @staticmethod
+    async def create_selection(session) -> str:
+        """Start an empty selection in the session and return the id of its picker."""
+        picker_id = uuid.uuid4().hex
+        selections = await session.aget(SELECTION_SESSION_KEY, {})
+        selections[picker_id] = {'teams': [], 'employees': []}
+        await session.aset(SELECTION_SESSION_KEY, dict(list(selections.items())[-MAX_PICKER_SELECTIONS:]))
+        return picker_id
+
+    @staticmethod
+    async def get_selection(session, picker_id: str) -> PickerSelection | None:
+        return (await session.aget(SELECTION_SESSION_KEY, {})).get(picker_id)
+
+    @staticmethod
+    async def save_selection(session, picker_id: str, selection: PickerSelection) -> None:
+        selections = await session.aget(SELECTION_SESSION_KEY, {})
+        selections[picker_id] = {'teams': sorted(selection['teams']), 'employees': sorted(selection['employees'])}
+        await session.aset(SELECTION_SESSION_KEY, selections)
+
+    @staticmethod
+    async def pop_selection(session, picker_id: str) -> PickerSelection | None:
+        selections = await session.aget(SELECTION_SESSION_KEY, {})
+        selection = selections.pop(picker_id, None)
+        await session.aset(SELECTION_SESSION_KEY, selections)
+        return selection
@@ -1,3 +1,107 @@
+import re
+
 from django.test import TestCase
 
-# Create your tests here.
+from list_picker.models import Team, Employee
+from list_picker.services import ListPickerService, MAX_PICKER_SELECTIONS, SELECTION_SESSION_KEY
+
+
+class ListPickerViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alpha = Team.objects.create(name='Alpha')
+        cls.beta = Team.objects.create(name='Beta')
+        cls.ann = Employee.objects.create(name='Ann', team=cls.alpha)
+        cls.bob = Employee.objects.create(name='Bob', team=cls.alpha)
+        cls.cid = Employee.objects.create(name='Cid', team=cls.beta)
+
+    async def open_picker(self) -> str:
+        response = await self.async_client.get('/list-picker/')
+        self.assertContains(response, 'Alpha')
+        return re.search(r'name="picker_id" value="(\w+)"', response.content.decode()).group(1)
+
+    async def post(self, action: str, picker_id: str, **data) -> str:
+        response = await self.async_client.post(f'/list-picker/{action}/', {'picker_id': picker_id, **data})
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    async def get_selection(self, picker_id: str):
+        session = await self.async_client.asession()
+        return (await session.aget(SELECTION_SESSION_KEY, {}))[picker_id]
+
+    def assertDeleted(self, html: str, *option_ids: str):
+        for option_id in option_ids:
+            self.assertIn(f'<option id="{option_id}" hx-swap-oob="delete"></option>', html)
+
+    async def test_add_teams_only_sends_the_changes(self):
+        picker_id = await self.open_picker()
+        html = await self.post('add-teams', picker_id, available_teams=[str(self.alpha.id)])
+        self.assertDeleted(html, f'available-team-{self.alpha.id}')
+        self.assertIn('hx-swap-oob="beforeend:#selected-teams-select"', html)
+        self.assertIn(f'id="selected-team-{self.alpha.id}"', html)
+        self.assertIn(f'id="available-employee-{self.ann.id}"', html)
+        self.assertNotIn('Beta', html)
+        self.assertNotIn('Cid', html)
+        self.assertEqual(await self.get_selection(picker_id), {'teams': [self.alpha.id], 'employees': []})
+
+        # Adding it again changes nothing
+        html = await self.post('add-teams', picker_id, available_teams=[str(self.alpha.id)])
+        self.assertNotIn('<option', html)
+
+    async def test_employees_must_belong_to_a_selected_team(self):
+        picker_id = await self.open_picker()
+        await self.post('add-teams', picker_id, available_teams=[str(self.alpha.id)])
+        html = await self.post('add-employees', picker_id, available_employees=[str(self.ann.id), str(self.cid.id), 'x'])
+        self.assertDeleted(html, f'available-employee-{self.ann.id}')
+        self.assertIn(f'id="selected-employee-{self.ann.id}"', html)
+        self.assertEqual(html.count('<option'), 2)
+        self.assertEqual(await self.get_selection(picker_id), {'teams': [self.alpha.id], 'employees': [self.ann.id]})
+
+        html = await self.post('remove-employees', picker_id, employees_to_remove=[str(self.ann.id)])
+        self.assertDeleted(html, f'selected-employee-{self.ann.id}')
+        self.assertIn('hx-swap-oob="beforeend:#available-employees-select"', html)
+        self.assertEqual((await self.get_selection(picker_id))['employees'], [])
+
+    async def test_remove_teams_removes_their_employees(self):
+        picker_id = await self.open_picker()
+        await self.post('add-teams', picker_id, available_teams=[str(self.alpha.id)])
+        await self.post('add-employees', picker_id, available_employees=[str(self.ann.id)])
+        html = await self.post('remove-teams', picker_id, teams_to_remove=[str(self.alpha.id)])
+        self.assertDeleted(html, f'selected-team-{self.alpha.id}', f'available-employee-{self.bob.id}', f'selected-employee-{self.ann.id}')
+        self.assertIn(f'id="available-team-{self.alpha.id}"', html)
+        self.assertEqual(html.count('<option'), 4)
+        self.assertEqual(await self.get_selection(picker_id), {'teams': [], 'employees': []})
+
+    async def test_pickers_keep_separate_selections(self):
+        first = await self.open_picker()
+        second = await self.open_picker()
+        await self.post('add-teams', first, available_teams=[str(self.alpha.id)])
+        await self.post('add-teams', second, available_teams=[str(self.beta.id)])
+        self.assertEqual((await self.get_selection(first))['teams'], [self.alpha.id])
+        self.assertEqual((await self.get_selection(second))['teams'], [self.beta.id])
+
+    async def test_unknown_picker_reloads_the_page(self):
+        response = await self.async_client.post('/list-picker/add-teams/', {'picker_id': 'unknown', 'available_teams': [str(self.alpha.id)]})
+        self.assertEqual(response['HX-Refresh'], 'true')
+
+    async def test_save_forgets_the_selection(self):
+        picker_id = await self.open_picker()
+        await self.post('add-teams', picker_id, available_teams=[str(self.beta.id), str(self.alpha.id)])
+        await self.post('add-employees', picker_id, available_employees=[str(self.cid.id)])
+        with self.assertLogs('list_picker.views', 'INFO') as logs:
+            response = await self.async_client.post('/list-picker/save/', {'picker_id': picker_id})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(logs.output, [f'INFO:list_picker.views:Saved selection: teams {[self.alpha.id, self.beta.id]}, employees {[self.cid.id]}'])
+        session = await self.async_client.asession()
+        self.assertNotIn(picker_id, await session.aget(SELECTION_SESSION_KEY, {}))
+
+
+class ListPickerServiceTests(TestCase):
+    def test_parse_ids_ignores_anything_but_numbers(self):
+        self.assertEqual(ListPickerService.parse_ids(['1', '02', '-3', 'x', '', '4.5']), {1, 2})
+
+    async def test_only_the_latest_selections_are_kept(self):
+        session = await self.async_client.asession()
+        picker_ids = [await ListPickerService.create_selection(session) for _ in range(MAX_PICKER_SELECTIONS + 2)]
+        selections = await session.aget(SELECTION_SESSION_KEY)
+        self.assertEqual(list(selections), picker_ids[2:])
@@ -1,117 +1,122 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
 from django.shortcuts import render, redirect
 from django.http import HttpResponse
 from django.template.loader import render_to_string
+from django_htmx.http import HttpResponseClientRefresh
 from list_picker.services import ListPickerService
 
-def index(request):
-    teams = ListPickerService.get_all_teams()
-    employees = ListPickerService.get_employees_by_teams([])  # Initially no teams selected
-    return render(request, 'list_picker/index.html', {'teams': teams, 'employees': employees})
-
-def add_teams(request):
-    # Get selected team IDs from the request
-    current_selected_teams_ids = request.POST.get('selected_teams', '').split(',')
-    to_add = request.POST.getlist('available_teams')
-    new_selected_teams_ids = list(set(current_selected_teams_ids + to_add) - {''})
-    
-    # Fetch teams and employees
-    available_teams = ListPickerService.get_available_teams(new_selected_teams_ids)
-    selected_teams = ListPickerService.get_selected_teams(new_selected_teams_ids)
-    employees = ListPickerService.get_employees_by_teams(new_selected_teams_ids)
-    
-    # Render partial templates
-    available_teams_html = render_to_string('list_picker/partials/available_teams.html', {'teams': available_teams})
-    selected_teams_html = render_to_string('list_picker/partials/selected_teams.html', {'teams': selected_teams})
-    available_employees_html = render_to_string('list_picker/partials/available_employees.html', {'employees': employees})
-    selected_teams_ids_html = f'<input type="hidden" id="selected-teams-ids" name="selected_teams" value="{','.join(new_selected_teams_ids)}" hx-swap-oob="true">'
-    
-    # Build response
-    response = HttpResponse()
-    response.write(selected_teams_ids_html)
-    response.write(f'<div id="available-teams" hx-swap-oob="true">{available_teams_html}</div>')
-    response.write(f'<div id="selected-teams" hx-swap-oob="true">{selected_teams_html}</div>')
-    response.write(available_employees_html)  # Updates #available-employees-select
-    return response
-
-def remove_teams(request):
-    # Get current selected teams from hidden input
-    current_selected_teams = request.POST.get('selected_teams', '').split(',')
-    # Get teams to remove from the select multiple
-    to_remove = request.POST.getlist('teams_to_remove')
-    
-    # Update selected teams by removing only the specified ones
-    new_selected_teams_ids = [tid for tid in current_selected_teams if tid not in to_remove and tid != '']
-    
-    # Get available and selected teams
-    available_teams = ListPickerService.get_available_teams(new_selected_teams_ids)
-    selected_teams = ListPickerService.get_selected_teams(new_selected_teams_ids)
-    
-    # Update available employees based on new selected teams
-    employees = ListPickerService.get_employees_by_teams(new_selected_teams_ids)
-    
-    # Render partial templates
-    available_teams_html = render_to_string('list_picker/partials/available_teams.html', {'teams': available_teams})
-    selected_teams_html = render_to_string('list_picker/partials/selected_teams.html', {'teams': selected_teams})
-    available_employees_html = render_to_string('list_picker/partials/available_employees.html', {'employees': employees})
-    selected_teams_ids_html = f'<input type="hidden" id="selected-teams-ids" name="selected_teams" value="{','.join(new_selected_teams_ids)}" hx-swap-oob="true">'
-    
-    # Build response
-    response = HttpResponse()
-    response.write(selected_teams_ids_html)
-    response.write(f'<div id="available-teams" hx-swap-oob="true">{available_teams_html}</div>')
-    response.write(f'<div id="selected-teams" hx-swap-oob="true">{selected_teams_html}</div>')
-    response.write(f'<div id="available-employees" hx-swap-oob="true">{available_employees_html}</div>')
-    return response
-
-def add_employees(request):
-    selected_teams_ids = request.POST.get('selected_teams', '').split(',')
-    current_selected_employees_ids = request.POST.get('selected_employees', '').split(',')
-    to_add = request.POST.getlist('available_employees')
-    new_selected_employees_ids = list(set(current_selected_employees_ids + to_add) - {''})
-    
-    # Fetch available employees: from selected teams, not in selected employees
-    available_employees = ListPickerService.get_employees_by_teams_not_in_list(selected_teams_ids, new_selected_employees_ids)
-    selected_employees = ListPickerService.get_employees_by_teams_in_list(new_selected_employees_ids)
-    
-    available_employees_html = render_to_string('list_picker/partials/available_employees.html', {'employees': available_employees})
-    selected_employees_html = render_to_string('list_picker/partials/selected_employees.html', {'employees': selected_employees})
-    selected_employees_ids_html = f'<input type="hidden" id="selected-employees-ids" name="selected_employees" value="{','.join(new_selected_employees_ids)}" hx-swap-oob="true">'
-    
-    response = HttpResponse()
-    response.write(selected_employees_ids_html)
-    response.write(f'<div id="available-employees" hx-swap-oob="true">{available_employees_html}</div>')
-    response.write(f'<div id="selected-employees" hx-swap-oob="true">{selected_employees_html}</div>')
-    return response
-
-def remove_employees(request):
-    # Get current selected teams and employees from hidden inputs
-    selected_teams_ids = request.POST.get('selected_teams', '').split(',')
-    current_selected_employees = request.POST.get('selected_employees', '').split(',')
-    # Get employees to remove from the select multiple
-    to_remove = request.POST.getlist('employees_to_remove')
-    
-    # Update selected employees by removing only the specified ones
-    new_selected_employees_ids = [eid for eid in current_selected_employees if eid not in to_remove and eid != '']
-    
-    # Get available and selected employees
-    available_employees = ListPickerService.get_employees_by_teams_not_in_list(selected_teams_ids, new_selected_employees_ids)
-    selected_employees = ListPickerService.get_employees_by_teams_in_list(new_selected_employees_ids)
-    
-    # Render partial templates
-    available_employees_html = render_to_string('list_picker/partials/available_employees.html', {'employees': available_employees})
-    selected_employees_html = render_to_string('list_picker/partials/selected_employees.html', {'employees': selected_employees})
-    selected_employees_ids_html = f'<input type="hidden" id="selected-employees-ids" name="selected_employees" value="{','.join(new_selected_employees_ids)}" hx-swap-oob="true">'
-    
-    # Build response
-    response = HttpResponse()
-    response.write(selected_employees_ids_html)
-    response.write(f'<div id="available-employees" hx-swap-oob="true">{available_employees_html}</div>')
-    response.write(f'<div id="selected-employees" hx-swap-oob="true">{selected_employees_html}</div>')
-    return response
-
-def save(request):
-    selected_teams = request.POST.get('selected_teams', '').split(',')
-    selected_employees = request.POST.get('selected_employees', '').split(',')
-    print(f"Selected Teams: {selected_teams}")
-    print(f"Selected Employees: {selected_employees}")
-    return redirect('list_picker:index')
\ No newline at end of file
+logger = logging.getLogger('list_picker.views')
+
+async def fetch_all(queryset: QuerySet) -> list:
+    """Evaluate a queryset through the async ORM, so templates only loop over loaded objects."""
+    return [obj async for obj in queryset.aiterator()]
+
+def get_option_delta(select_id: str, option_prefix: str, removed_ids=(), added=(), selected: bool = False) -> dict:
+    """
+    Describe the changes to one of the four selects: the ids of the options to delete and the objects to
+    append as options. Options have the id '<option_prefix>-<object id>'.
+    """
+    return {'select_id': select_id, 'option_prefix': option_prefix, 'removed_ids': sorted(removed_ids), 'added': added, 'selected': selected}
+
+def render_option_deltas(deltas: list) -> HttpResponse:
+    """Render only the changed options, as out-of-band swaps, so a click costs as much as it changes."""
+    return HttpResponse(render_to_string('list_picker/partials/option_deltas.html', {'deltas': deltas}))
+
+async def index(request):
+    teams = await fetch_all(ListPickerService.get_all_teams())
+    employees = await fetch_all(ListPickerService.get_employees_by_teams([]))  # Initially no teams selected
+    picker_id = await ListPickerService.create_selection(request.session)
+    # The context processors read the session and the user, which only sync code may do
+    return await sync_to_async(render)(request, 'list_picker/index.html', {'teams': teams, 'employees': employees, 'picker_id': picker_id})
+
+async def add_teams(request):
+    # The selection is kept in the session; an unknown picker (e.g. the session expired) reloads the page
+    picker_id = request.POST.get('picker_id', '')
+    selection = await ListPickerService.get_selection(request.session, picker_id)
+    if selection is None:
+        return HttpResponseClientRefresh()
+    selected_teams_ids = set(selection['teams'])
+    to_add = ListPickerService.parse_ids(request.POST.getlist('available_teams')) - selected_teams_ids
+
+    # Fetch the added teams and their employees
+    added_teams = await fetch_all(ListPickerService.get_selected_teams(to_add))
+    added_teams_ids = {team.id for team in added_teams}
+    added_employees = await fetch_all(ListPickerService.get_employees_by_teams(added_teams_ids))
+
+    selection['teams'] = list(selected_teams_ids | added_teams_ids)
+    await ListPickerService.save_selection(request.session, picker_id, selection)
+    return render_option_deltas([
+        get_option_delta('available-teams-select', 'available-team', removed_ids=added_teams_ids),
+        get_option_delta('selected-teams-select', 'selected-team', added=added_teams, selected=True),
+        get_option_delta('available-employees-select', 'available-employee', added=added_employees),
+    ])
+
+async def remove_teams(request):
+    picker_id = request.POST.get('picker_id', '')
+    selection = await ListPickerService.get_selection(request.session, picker_id)
+    if selection is None:
+        return HttpResponseClientRefresh()
+    selected_teams_ids = set(selection['teams'])
+    selected_employees_ids = set(selection['employees'])
+    to_remove = ListPickerService.parse_ids(request.POST.getlist('teams_to_remove')) & selected_teams_ids
+
+    # Removed teams go back to the available teams, and their employees leave both employee lists
+    removed_teams = await fetch_all(ListPickerService.get_selected_teams(to_remove))
+    removed_employees_ids = {employee.id async for employee in ListPickerService.get_employees_by_teams(to_remove).only('id').aiterator()}
+    deselected_employees_ids = removed_employees_ids & selected_employees_ids
+
+    selection['teams'] = list(selected_teams_ids - to_remove)
+    selection['employees'] = list(selected_employees_ids - deselected_employees_ids)
+    await ListPickerService.save_selection(request.session, picker_id, selection)
+    return render_option_deltas([
+        get_option_delta('selected-teams-select', 'selected-team', removed_ids=to_remove),
+        get_option_delta('available-teams-select', 'available-team', added=removed_teams),
+        get_option_delta('available-employees-select', 'available-employee', removed_ids=removed_employees_ids - deselected_employees_ids),
+        get_option_delta('selected-employees-select', 'selected-employee', removed_ids=deselected_employees_ids),
+    ])
+
+async def add_employees(request):
+    picker_id = request.POST.get('picker_id', '')
+    selection = await ListPickerService.get_selection(request.session, picker_id)
+    if selection is None:
+        return HttpResponseClientRefresh()
+    selected_employees_ids = set(selection['employees'])
+    to_add = ListPickerService.parse_ids(request.POST.getlist('available_employees')) - selected_employees_ids
+
+    # Only employees of the selected teams can be selected
+    added_employees = await fetch_all(ListPickerService.get_team_employees(selection['teams'], to_add))
+    added_employees_ids = {employee.id for employee in added_employees}
+
+    selection['employees'] = list(selected_employees_ids | added_employees_ids)
+    await ListPickerService.save_selection(request.session, picker_id, selection)
+    return render_option_deltas([
+        get_option_delta('available-employees-select', 'available-employee', removed_ids=added_employees_ids),
+        get_option_delta('selected-employees-select', 'selected-employee', added=added_employees, selected=True),
+    ])
+
+async def remove_employees(request):
+    picker_id = request.POST.get('picker_id', '')
+    selection = await ListPickerService.get_selection(request.session, picker_id)
+    if selection is None:
+        return HttpResponseClientRefresh()
+    selected_employees_ids = set(selection['employees'])
+    to_remove = ListPickerService.parse_ids(request.POST.getlist('employees_to_remove')) & selected_employees_ids
+
+    # Removed employees go back to the available employees
+    removed_employees = await fetch_all(ListPickerService.get_team_employees(selection['teams'], to_remove))
+
+    selection['employees'] = list(selected_employees_ids - to_remove)
+    await ListPickerService.save_selection(request.session, picker_id, selection)
+    return render_option_deltas([
+        get_option_delta('selected-employees-select', 'selected-employee', removed_ids=to_remove),
+        get_option_delta('available-employees-select', 'available-employee', added=removed_employees),
+    ])
+
+async def save(request):
+    selection = await ListPickerService.pop_selection(request.session, request.POST.get('picker_id', ''))
+    if selection is not None:
+        logger.info('Saved selection: teams %s, employees %s', sorted(selection['teams']), sorted(selection['employees']))
+    return redirect('list_picker:index')
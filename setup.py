@@ -10,6 +10,9 @@ setup(
         "pandas>=2.2.3",
         "pydantic>=2.10.5",
     ],
+    extras_require={
+        "arrow": ["pyarrow>=15.0"],
+    },
     author="Vishnu Vardhan",
     author_email="vishnupouley@gmail.com",
     description="Bulk Upload for Django",
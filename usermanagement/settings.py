@@ -35,6 +35,14 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'DEBUG',
         },
+        'bulkupload': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'list_picker': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
     },
 }
 
@@ -168,6 +176,16 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# Uploaded files (background upload jobs store their file here until they finish)
+
+MEDIA_URL = 'media/'
+
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Set to True to run uploads as background jobs and poll their progress over htmx. Live progress is kept
+# in the cache, so use a cache shared between processes (e.g. file-based) when running several workers.
+BULK_UPLOAD_BACKGROUND_JOBS = False
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 